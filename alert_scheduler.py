@@ -0,0 +1,135 @@
+import collections
+import datetime
+import heapq
+import itertools
+import threading
+import time
+
+# --------------------------------------------------------------------------------
+# 정기 알림 스케줄러 (기능 6)
+# --------------------------------------------------------------------------------
+# 예전에는 알림 시간이 되었는지를 그 사용자의 스크립트가 다시 실행될 때만 확인했기 때문에,
+# 딱 그 시간에 화면을 누르고 있지 않으면 알림을 받을 수 없었습니다.
+# 이제는 모든 사용자의 (층, 알림 시간)을 힙 하나에 넣어 두고, 백그라운드 스레드 하나가
+# 알림 창이 열리는 시각(알림 시간 - window)에 한 번만 울려서 사용자별 받은편지함(큐)에 넣습니다.
+#   - 등록/해제: O(log n) (해제는 지연 삭제 - 힙에서 꺼낼 때 버림)
+#   - 울린 알림은 다음 날 같은 시각으로 다시 예약됩니다. (정기 알림)
+#   - bus(change_bus.ChangeBus)를 넘기면 알림을 배달할 때 'alerts' 주제로 알립니다.
+#     (세션은 이 버전이 바뀌었을 때만 받은편지함을 확인합니다)
+
+_Alert = collections.namedtuple('_Alert', ['floor', 'time', 'window_minutes', 'generation'])
+
+# 사용자가 오래 접속하지 않아도 받은편지함이 계속 쌓이지 않도록 최근 몇 개만 보관합니다.
+INBOX_SIZE = 10
+
+
+def _next_fire(time_obj, window_minutes, now):
+    """now 이후 가장 가까운 알림 창 시작 시각(timestamp)을 반환합니다. 이미 창 안이면 지금."""
+    now_dt = datetime.datetime.fromtimestamp(now)
+    window = datetime.timedelta(minutes=window_minutes)
+    start = datetime.datetime.combine(now_dt.date(), time_obj) - window
+    if now_dt > start + 2 * window:
+        start += datetime.timedelta(days=1)
+    return max(start.timestamp(), now)
+
+
+def _window_end(time_obj, window_minutes, at):
+    """at을 포함하는(또는 at 이후 가장 가까운) 알림 창의 끝 시각(timestamp)을 반환합니다."""
+    at_dt = datetime.datetime.fromtimestamp(at)
+    window = datetime.timedelta(minutes=window_minutes)
+    for days in (-1, 0, 1):
+        end = datetime.datetime.combine(at_dt.date() + datetime.timedelta(days=days), time_obj) + window
+        if end.timestamp() >= at:
+            return end.timestamp()
+    return at
+
+
+class AlertScheduler:
+    """모든 사용자의 정기 알림을 힙 하나로 관리하고, 백그라운드 스레드 하나가 울립니다."""
+
+    def __init__(self, clock=time.time, bus=None):
+        self._clock = clock
+        self._bus = bus
+        self._heap = []          # (울릴 시각, generation, user_id)
+        self._alerts = {}        # user_id -> _Alert (가장 최근에 등록한 것만 유효)
+        self._inbox = {}         # user_id -> deque[알림 이벤트]
+        self._cond = threading.Condition()
+        self._generation = itertools.count(1)
+        self._stop = False
+        self._thread = None
+        self.fired_total = 0
+
+    def register(self, user_id, floor, time_obj, window_minutes=5):
+        """user_id의 정기 알림을 등록(또는 교체)합니다."""
+        with self._cond:
+            alert = _Alert(floor, time_obj, window_minutes, next(self._generation))
+            self._alerts[user_id] = alert
+            fire_at = _next_fire(time_obj, window_minutes, self._clock())
+            heapq.heappush(self._heap, (fire_at, alert.generation, user_id))
+            # 새 알림이 지금 힙의 맨 앞일 수 있으므로 스레드를 깨워 대기 시간을 다시 계산하게 합니다.
+            self._cond.notify_all()
+
+    def unregister(self, user_id):
+        """user_id의 정기 알림을 해제합니다. 힙에 남은 항목은 꺼낼 때 버립니다."""
+        with self._cond:
+            self._alerts.pop(user_id, None)
+
+    def get(self, user_id):
+        """user_id의 현재 알림 설정 (floor, time, window_minutes)을 반환합니다. 없으면 None."""
+        with self._cond:
+            alert = self._alerts.get(user_id)
+        return None if alert is None else (alert.floor, alert.time, alert.window_minutes)
+
+    def poll(self, user_id):
+        """user_id에게 배달된 알림 이벤트를 모두 꺼내서 반환합니다."""
+        with self._cond:
+            inbox = self._inbox.pop(user_id, None)
+        return list(inbox) if inbox else []
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._alerts)
+
+    def _fire_due(self, now):
+        """now까지 울려야 할 알림을 모두 배달합니다. (self._cond를 잡은 상태에서 호출)"""
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, generation, user_id = heapq.heappop(self._heap)
+            alert = self._alerts.get(user_id)
+            if alert is None or alert.generation != generation:
+                continue  # 해제되었거나 새로 등록되어 무효가 된 항목
+            event = {
+                'floor': alert.floor,
+                'time': alert.time.strftime('%H:%M'),
+                'window_minutes': alert.window_minutes,
+                'fired_at': fire_at,
+                # 알림 창이 끝나는 시각 (화면에 '갈 시간입니다'를 이때까지 보여줌)
+                'until': _window_end(alert.time, alert.window_minutes, fire_at),
+            }
+            self._inbox.setdefault(user_id, collections.deque(maxlen=INBOX_SIZE)).append(event)
+            self.fired_total += 1
+            if self._bus is not None:
+                self._bus.publish('alerts', (alert.floor,))
+            # 정기 알림이므로 다음 날 같은 시각으로 다시 예약합니다.
+            heapq.heappush(self._heap, (_next_fire(alert.time, alert.window_minutes, event['until'] + 1),
+                                        generation, user_id))
+
+    def start(self):
+        """알림을 울리는 백그라운드 스레드를 시작합니다."""
+        if self._thread is not None:
+            return
+
+        def run():
+            with self._cond:
+                while not self._stop:
+                    now = self._clock()
+                    self._fire_due(now)
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    self._cond.wait(timeout)
+
+        self._thread = threading.Thread(target=run, name="alert-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
@@ -0,0 +1,1033 @@
+"""탈래말래 부하/성능 측정 스크립트
+
+사용법:
+    python benchmark.py stress      # 공유 예약 저장소 동시성 스트레스 검사
+    python benchmark.py index       # 정렬 인덱스 vs 리스트+sorted() 비교
+    python benchmark.py render      # 실행(rerun)당 전송량 / 스크립트 실행 시간 측정
+    python benchmark.py multiprocess  # 여러 워커 프로세스가 상태 서버를 통해 같은 예약을 보는지 검사
+    python benchmark.py sessions --output bench.json  # 동시 접속 세션 수별 부하 테스트 (JSON 결과)
+    python benchmark.py cashwalk    # 쉬는 시간 걸음 수 제출 몰림 (중복 제출 / 일일 한도 / 일괄 저장) 검사
+    python benchmark.py history     # 혼잡도 시계열 기록 속도 / 메모리 / 구간 집계 시간 측정
+    python benchmark.py capacity    # 같은 시간 칸에 동시에 예약해도 정원을 넘지 않는지 / 요청 속도 제한 검사
+    python benchmark.py dispatch    # 하루 치 예약으로 운행 계획을 다시 계산하는 시간 측정
+    python benchmark.py bulk        # 예약 일괄 등록(검증 + 추가 + 로그) / 내보내기 / 재시작 복구 시간 측정
+    python benchmark.py metrics     # 구간 측정(timed / section)이 꺼져 있을 때와 켜져 있을 때의 호출당 비용
+    python benchmark.py memory      # 세션 1,000개의 세션당 메모리 (예전 dict 방식 vs UserSession) / 오래 쉰 세션 정리
+    python benchmark.py buildings   # 건물이 많은 학교에서 건물 하나의 층별 현황을 읽는 시간 (층 번호 배열 vs 층별 조회)
+    python benchmark.py bus         # 예약 100건이 몰릴 때 세션이 화면을 몇 번 새로 그리는지 / 바뀐 것이 없을 때 확인 비용
+    python benchmark.py cameras     # 층 600개 카메라를 초당 5번씩 수집할 때 처리량 / CPU / 버린 프레임 / 혼잡도 게시 횟수
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import multiprocessing
+import os
+import random
+import secrets
+import socket
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from camera_ingest import CameraIngestPipeline, CountEvent, SimulatedCameraSource
+from campus import BANKS, CAMPUS, FLOORS, Campus
+from cashwalk_ledger import DAILY_CASH_CAP, CashwalkLedger
+from change_bus import ChangeBus
+from congestion_feed import CONGESTION_COLORS, CONGESTION_LEVELS, CongestionSnapshot
+from congestion_history import CongestionHistory
+from dispatch_sim import simulate
+from floor_grid import FloorCardCache
+from metrics import Metrics
+from profile_store import ProfileStore
+from rate_limiter import TokenBucketLimiter
+from reservation_bulk import iter_export, parse_reservations
+from reservation_log import ReservationLog
+from reservation_store import RateLimitedError, ReservationStore, SlotFullError
+from user_session import SessionRegistry, UserSession
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "탈래말래.py")
+
+
+# --------------------------------------------------------------------------------
+# 1. 예약 저장소 동시성 스트레스 검사 (08:50 러시 재현)
+# --------------------------------------------------------------------------------
+def stress_reservations(threads=64, ops_per_thread=2000):
+    """여러 스레드가 동시에 예약/취소해도 업데이트가 사라지지 않는지 확인합니다."""
+    store = ReservationStore(FLOORS)
+    time_obj = datetime.time(8, 50)
+    barrier = threading.Barrier(threads)
+
+    def worker(worker_id):
+        # 스레드마다 '남길 사용자'와 '취소할 사용자'를 따로 두어 최종 개수를 예측할 수 있게 합니다.
+        keep_name = f"keep-{worker_id}"
+        drop_name = f"drop-{worker_id}"
+        barrier.wait()
+        for i in range(ops_per_thread):
+            floor = FLOORS[(worker_id + i) % len(FLOORS)]
+            store.reserve(floor, time_obj, keep_name)
+            store.reserve(floor, time_obj, drop_name)
+            store.cancel(floor, drop_name)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    expected = threads * ops_per_thread
+    actual = sum(len(res) for res in store.snapshot_all().values())
+    leftover = sum(1 for res_list in store.snapshot_all().values()
+                   for res in res_list if res['name'].startswith('drop-'))
+    print(f"[stress] 예상 {expected}건 / 실제 {actual}건 / 취소 누락 {leftover}건")
+    return actual == expected and leftover == 0
+
+
+# --------------------------------------------------------------------------------
+# 2. 층별 정렬 인덱스 vs 기존 방식(리스트 + 매 렌더마다 sorted()) 비교
+# --------------------------------------------------------------------------------
+def bench_index(per_floor=10000, reruns=50, cancels=500):
+    """층마다 per_floor건을 예약한 뒤, 렌더(reruns회)와 사용자별 취소 비용을 비교합니다."""
+    rng = random.Random(42)
+    bookings = [
+        (FLOORS[i % len(FLOORS)], datetime.time(rng.randrange(24), rng.randrange(60)), f"user-{i % 3000}")
+        for i in range(per_floor * len(FLOORS))
+    ]
+    cancel_users = [f"user-{i}" for i in range(cancels)]
+
+    # --- 기존 방식 ---
+    start = time.perf_counter()
+    legacy = {floor: [] for floor in FLOORS}
+    for floor, time_obj, name in bookings:
+        legacy[floor].append({'name': name, 'time': time_obj})
+    legacy_insert = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(reruns):
+        for floor in FLOORS:
+            sorted(legacy[floor], key=lambda x: x['time'])
+    legacy_render = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in cancel_users:
+        floor = FLOORS[0]
+        legacy[floor] = [res for res in legacy[floor] if res['name'] != name]
+    legacy_cancel = time.perf_counter() - start
+
+    # --- 정렬 인덱스 ---
+    store = ReservationStore(FLOORS)
+    start = time.perf_counter()
+    for floor, time_obj, name in bookings:
+        store.reserve(floor, time_obj, name)
+    store_insert = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(reruns):
+        for floor in FLOORS:
+            store.snapshot(floor)
+    store_render = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in cancel_users:
+        store.cancel(FLOORS[0], name)
+    store_cancel = time.perf_counter() - start
+
+    print(f"[index] 층당 {per_floor}건, 렌더 {reruns}회, 취소 {cancels}명")
+    print(f"  {'':10}{'기존(list+sorted)':>20}{'정렬 인덱스':>16}")
+    for label, old, new in (
+        ("예약 추가", legacy_insert, store_insert),
+        ("렌더", legacy_render, store_render),
+        ("취소", legacy_cancel, store_cancel),
+    ):
+        print(f"  {label:10}{old * 1000:>17.1f} ms{new * 1000:>13.1f} ms")
+
+
+# --------------------------------------------------------------------------------
+# 3. 실행(rerun)당 전송량 / 스크립트 실행 시간
+# --------------------------------------------------------------------------------
+# user-007 이전의 전역 CSS 첫 부분: 로컬 @font-face 대신 Google Fonts @import를 썼습니다.
+# (나머지 CSS는 styles.GLOBAL_CSS_SOURCE와 같고, minify 없이 매 실행마다 그대로 보냈습니다.)
+BASELINE_FONT_CSS = """/* Google Noto Sans KR 폰트 불러오기 */
+    @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+KR:wght@400;500;700&display=swap');"""
+
+# 앱 스크립트에서 렌더링 경로만 예전 방식으로 바꿀 부분 (현재 코드 -> 예전 코드)
+BASELINE_RENDER_SWAPS = (
+    ("st.markdown(GLOBAL_CSS, unsafe_allow_html=True)",
+     "st.markdown(_baseline_global_css(), unsafe_allow_html=True)"),
+    ("st.image(load_logo(), width=80)",
+     "st.image(LOGO_FILE, width=80)"),  # 경로를 넘기면 매 실행마다 디스크에서 다시 읽음
+)
+
+
+def baseline_global_css():
+    """user-007 이전처럼 @import 폰트가 들어간 원본(minify 안 한) CSS를 매번 새로 만듭니다."""
+    import styles
+
+    source = styles.GLOBAL_CSS_SOURCE
+    start = source.index("/* Noto Sans KR")
+    end = source.index("}", source.index("@font-face")) + 1
+    return source[:start] + BASELINE_FONT_CSS + source[end:]
+
+
+def _render_script(baseline):
+    """AppTest.from_string으로 실행할 앱 스크립트. baseline이면 CSS/로고 경로만 예전 방식으로 바꿉니다."""
+    with open(APP_FILE, encoding="utf-8") as f:
+        source = f.read()
+    # from_string은 임시 파일에서 실행되므로 __file__ 기준 경로를 원래 앱 위치로 고정합니다. (두 경로 공통)
+    source = source.replace("__file__", repr(APP_FILE))
+    if baseline:
+        for current, previous in BASELINE_RENDER_SWAPS:
+            if current not in source:
+                raise RuntimeError(f"앱 스크립트에서 바꿀 부분을 찾지 못했습니다: {current}")
+            source = source.replace(current, previous)
+        source = "from benchmark import baseline_global_css as _baseline_global_css\n" + source
+    return source
+
+
+def bench_render(runs=20):
+    """예전(user-007 이전) 렌더링 경로와 현재 경로를 같은 AppTest 방식으로 runs회씩 실행해 비교합니다.
+
+    두 경로는 같은 앱 스크립트에서 전역 CSS(@import + 원본 vs 로컬 폰트 + minify)와
+    로고 읽기(매번 파일 경로 vs 캐시된 bytes)만 다릅니다. 번갈아 실행해 시간에 따른 차이를 줄입니다.
+    (AppTest에는 브라우저가 없으므로 @import 폰트의 네트워크 요청 시간은 여기에 잡히지 않습니다.)
+    """
+    import styles
+
+    raw_size = len(baseline_global_css().encode('utf-8'))
+    min_size = len(styles.GLOBAL_CSS.encode('utf-8'))
+    print(f"[render] 전역 CSS: 예전 {raw_size:,} B -> 현재 {min_size:,} B ({min_size / raw_size:.0%})")
+
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("[render] streamlit이 설치되어 있지 않아 실행 시간 측정은 건너뜁니다.")
+        return
+
+    apps = {
+        "예전": AppTest.from_string(_render_script(baseline=True), default_timeout=30),
+        "현재": AppTest.from_string(_render_script(baseline=False), default_timeout=30),
+    }
+    for at in apps.values():
+        at.run()  # 첫 실행 (캐시/공유 상태 준비) 은 측정에서 제외
+        if at.exception:
+            raise RuntimeError(f"앱 실행 실패: {at.exception[0].message}")
+    timings = {label: [] for label in apps}
+    for _ in range(runs):
+        for label, at in apps.items():
+            start = time.perf_counter()
+            at.run()
+            timings[label].append(time.perf_counter() - start)
+    for label, at in apps.items():
+        payload = sum(len(m.value.encode('utf-8')) for m in at.markdown)
+        samples = sorted(timings[label])
+        print(f"[render] {label} 경로 rerun {runs}회: 중앙값 {samples[len(samples) // 2] * 1000:.1f} ms, "
+              f"최대 {samples[-1] * 1000:.1f} ms, markdown 전송량 {payload:,} B/회")
+
+
+# --------------------------------------------------------------------------------
+# 4. 여러 워커 프로세스 (상태 서버 공유) 일관성 검사
+# --------------------------------------------------------------------------------
+def _multiprocess_worker(address, authkey, worker_id, ops, results):
+    from state_backend import ManagerBackend
+
+    backend = ManagerBackend(address, authkey)
+    store = backend.reservations
+    time_obj = datetime.time(23, 59)
+    for i in range(ops):
+        store.reserve(FLOORS[i % len(FLOORS)], time_obj, f"worker-{worker_id}")
+    # 자기 예약 일부를 취소해 봅니다. (취소도 다른 프로세스에 보여야 함)
+    store.cancel(FLOORS[0], f"worker-{worker_id}")
+    results.put(worker_id)
+
+
+def _multiprocess_reader(address, authkey, results):
+    from state_backend import ManagerBackend
+
+    store = ManagerBackend(address, authkey).reservations
+    counts = {floor: store.count(floor) for floor in FLOORS}
+    results.put((store.version(), counts))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def check_multiprocess(workers=4, ops=300):
+    """상태 서버 하나 + 워커 프로세스 여러 개를 띄우고, 모든 프로세스가 같은 예약을 보는지 확인합니다."""
+    from state_backend import ManagerBackend, serve
+
+    ctx = multiprocessing.get_context("spawn")
+    address = ("127.0.0.1", _free_port())
+    authkey = secrets.token_hex(16).encode()
+    with tempfile.TemporaryDirectory() as data_dir:
+        # 같은 시각에 대량으로 예약하므로 정원/속도 제한은 끕니다. (일관성만 검사)
+        server = ctx.Process(target=serve, kwargs={'host': address[0], 'port': address[1], 'authkey': authkey,
+                                                   'data_dir': data_dir,
+                                                   'slot_capacity': 0, 'rate_per_minute': 0},
+                             daemon=True)
+        server.start()
+        deadline = time.time() + 10
+        while True:
+            try:
+                observer = ManagerBackend(address, authkey).reservations
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.1)
+        start_version = observer.version()
+
+        results = ctx.Queue()
+        procs = [ctx.Process(target=_multiprocess_worker, args=(address, authkey, n, ops, results)) for n in range(workers)]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        # 변경 알림: 워커들이 쓰기 시작하면 관찰자가 깨어나야 합니다.
+        woke_version = observer.wait_for_change(start_version, 10)
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+        for _ in procs:
+            results.get()
+
+        readers = [ctx.Process(target=_multiprocess_reader, args=(address, authkey, results)) for _ in range(workers)]
+        for p in readers:
+            p.start()
+        for p in readers:
+            p.join()
+        views = [results.get() for _ in readers]
+        server.terminate()
+
+    per_worker = ops - len(range(0, ops, len(FLOORS)))  # 첫 번째 층 예약은 취소됨
+    expected = workers * per_worker
+    totals = {sum(counts.values()) for _, counts in views}
+    agree = len({(version, tuple(sorted(counts.items()))) for version, counts in views}) == 1
+    print(f"[multiprocess] 워커 {workers}개 x {ops}건: {elapsed * 1000:.0f} ms, "
+          f"변경 알림 {'수신' if woke_version != start_version else '없음'}, "
+          f"예상 {expected}건 / 관찰 {sorted(totals)}, 프로세스 간 일치: {agree}")
+    return agree and totals == {expected} and woke_version != start_version
+
+
+# --------------------------------------------------------------------------------
+# 5. 동시 접속 세션 부하 테스트 (AppTest로 앱을 화면 없이 실행)
+# --------------------------------------------------------------------------------
+# 세션(AppTest 인스턴스) N개를 워커 프로세스 여러 개에 나누어 만들고 로그인시킨 뒤, 모든 프로세스가 동시에 아래 동작을 실행합니다.
+#   render   : 아무것도 누르지 않고 다시 실행 (대시보드 렌더)
+#   reserve  : '예약하기' -> reserve_elevator
+#   cancel   : '예약 취소' -> cancel_reservation
+#   refresh  : '현황 새로고침' -> update_congestion_data
+#   steps    : '걸음 수 추가하기' -> on_click_add_steps
+# AppTest는 실행할 때마다 프로세스 전역(Runtime, 설정)을 바꾸므로 한 프로세스 안에서는 한 번에 하나만 돌 수 있습니다.
+# 그래서 워커 프로세스 하나를 Streamlit 레플리카 하나로 보고, 모든 워커가 상태 서버(state_backend.serve) 하나를
+# 함께 씁니다. (STATE_BACKEND=manager://... 배포와 같은 구성 - 예약/혼잡도 등 공유 상태를 실제로 다투게 됨)
+SESSION_ACTIONS = ('render', 'reserve', 'cancel', 'refresh', 'steps')
+# 세션을 동시에 실행할 워커 프로세스 수
+SESSION_WORKERS = 4
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _new_session(AppTest, n):
+    at = AppTest.from_file(APP_FILE, default_timeout=60)
+    at.run()
+    at.text_input(key="login_id").input(f"2024{n:04d}")
+    at.text_input(key="login_name").input(f"학생{n}")
+    at.button(key="login_btn").click().run()
+    return at
+
+
+def _run_action(at, action, n):
+    if action == 'render':
+        at.run()
+    elif action == 'reserve':
+        at.selectbox(key="reserve_floor_sel").select(FLOORS[n % len(FLOORS)])
+        # 세션마다 다른 시각에 예약합니다. (모두 같은 칸이면 정원 초과 거절만 재게 됨)
+        at.text_input(key="reserve_time_in").input(f"{9 + n // 60 % 12:02d}:{n % 60:02d}")
+        at.button(key="make_reserve_btn").click().run()
+    elif action == 'cancel':
+        at.selectbox(key="reserve_floor_sel").select(FLOORS[n % len(FLOORS)])
+        at.button(key="cancel_reserve_btn").click().run()
+    elif action == 'refresh':
+        at.button(key="refresh_btn").click().run()
+    elif action == 'steps':
+        at.number_input(key="steps_to_add_input").set_value(500)
+        at.button(key="add_steps_btn").click().run()
+
+
+def _session_worker(session_ids, rounds, barrier, results):
+    """워커 프로세스 하나 (레플리카 하나): session_ids 세션을 만들고, 모든 워커가 준비되면 동작을 실행합니다."""
+    from streamlit.testing.v1 import AppTest
+
+    tracemalloc.start()
+    base_memory = tracemalloc.get_traced_memory()[0]
+    sessions = [(n, _new_session(AppTest, n)) for n in session_ids]
+    session_memory = tracemalloc.get_traced_memory()[0] - base_memory
+    tracemalloc.stop()
+
+    latencies = {action: [] for action in SESSION_ACTIONS}
+    barrier.wait()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for action in SESSION_ACTIONS:
+            for n, at in sessions:
+                t0 = time.perf_counter()
+                _run_action(at, action, n)
+                latencies[action].append((time.perf_counter() - t0) * 1000)
+    results.put((session_memory, time.perf_counter() - start, latencies))
+
+
+def _start_state_server(ctx, data_dir):
+    """상태 서버 프로세스를 띄우고 접속될 때까지 기다린 뒤 (프로세스, 주소, 비밀번호)를 반환합니다."""
+    from state_backend import ManagerBackend, serve
+
+    address = ("127.0.0.1", _free_port())
+    authkey = secrets.token_hex(16).encode()
+    # 같은 시각에 몰아서 예약하므로 정원/속도 제한은 끕니다.
+    server = ctx.Process(target=serve, kwargs={'host': address[0], 'port': address[1], 'authkey': authkey,
+                                               'data_dir': data_dir, 'slot_capacity': 0, 'rate_per_minute': 0},
+                         daemon=True)
+    server.start()
+    deadline = time.time() + 10
+    while True:
+        try:
+            ManagerBackend(address, authkey)
+            return server, address, authkey
+        except OSError:
+            if time.time() > deadline:
+                server.terminate()
+                raise
+            time.sleep(0.1)
+
+
+def bench_sessions(session_counts=(1, 10, 50, 100, 500), rounds=3, workers=SESSION_WORKERS):
+    """세션 수를 늘려 가며 동작별 p50/p99 지연 시간, 처리량, 세션당 메모리를 측정해 dict로 반환합니다.
+
+    세션들은 워커 프로세스 workers개(레플리카)에 나뉘어 동시에 실행되고, 공유 상태는 상태 서버 하나에 있습니다.
+    """
+    try:
+        import streamlit.testing.v1  # noqa: F401
+    except ImportError:
+        print("[sessions] streamlit이 설치되어 있지 않아 실행할 수 없습니다.", file=sys.stderr)
+        return None
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        server, address, authkey = _start_state_server(ctx, data_dir)
+        # 워커 프로세스(앱)는 환경변수로 상태 서버에 접속합니다. (spawn한 프로세스는 지금 환경을 물려받음)
+        os.environ["STATE_BACKEND"] = f"manager://{address[0]}:{address[1]}"
+        os.environ["STATE_AUTHKEY"] = authkey.decode()
+        try:
+            for count in session_counts:
+                results.append(_bench_session_count(ctx, count, rounds, min(workers, count)))
+        finally:
+            del os.environ["STATE_BACKEND"], os.environ["STATE_AUTHKEY"]
+            server.terminate()
+    return {
+        'benchmark': 'sessions',
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'results': results,
+    }
+
+
+def _bench_session_count(ctx, count, rounds, workers):
+    """세션 count개를 워커 workers개에 나누어 실행하고 결과 한 줄(dict)을 만듭니다."""
+    barrier = ctx.Barrier(workers)
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_session_worker, args=(range(w, count, workers), rounds, barrier, queue))
+             for w in range(workers)]
+    for p in procs:
+        p.start()
+    outputs = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    session_memory = sum(memory for memory, _, _ in outputs)
+    elapsed = max(worker_elapsed for _, worker_elapsed, _ in outputs)
+    latencies = {action: [value for _, _, worker in outputs for value in worker[action]] for action in SESSION_ACTIONS}
+    total_ops = sum(len(v) for v in latencies.values())
+    row = {
+        'sessions': count,
+        'workers': workers,
+        'rounds': rounds,
+        'throughput_ops_per_s': round(total_ops / elapsed, 2),
+        'memory_per_session_kb': round(session_memory / count / 1024, 1),
+        'actions': {},
+    }
+    for action, values in latencies.items():
+        values.sort()
+        row['actions'][action] = {
+            'count': len(values),
+            'p50_ms': round(_percentile(values, 50), 2),
+            'p99_ms': round(_percentile(values, 99), 2),
+        }
+    print(f"[sessions] {count}개 (워커 {workers}개): {row['throughput_ops_per_s']} ops/s, "
+          f"세션당 {row['memory_per_session_kb']} KB, "
+          f"render p50/p99 {row['actions']['render']['p50_ms']}/{row['actions']['render']['p99_ms']} ms",
+          file=sys.stderr)
+    return row
+
+
+# --------------------------------------------------------------------------------
+# 6. 캐시워크 장부 검사 (쉬는 시간 제출 몰림)
+# --------------------------------------------------------------------------------
+def check_cashwalk(users=500, threads=32, submissions=20):
+    """여러 스레드가 같은 제출을 중복으로 보내도 한 번만 적립되고, 일괄 저장 후 프로필과 일치하는지 확인합니다."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        profiles = ProfileStore(os.path.join(data_dir, "profiles.sqlite3"))
+        ledger = CashwalkLedger(profiles)
+        barrier = threading.Barrier(threads)
+
+        def worker(worker_id):
+            barrier.wait()
+            for user in range(worker_id % 2, users, 2):
+                for n in range(submissions):
+                    # 짝수/홀수 스레드끼리 같은 제출 번호를 보냅니다. (더블 클릭 재현)
+                    ledger.add_steps(f"user-{user}", 100, idempotency_key=f"{user}-{n}")
+
+        start = time.perf_counter()
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - start
+        flush_start = time.perf_counter()
+        flushed = ledger.flush()
+        flush_ms = (time.perf_counter() - flush_start) * 1000
+
+        expected = {'steps': submissions * 100, 'cash': min(submissions * 10, DAILY_CASH_CAP)}
+        wrong = sum(1 for user in range(users) if ledger.balance(f"user-{user}") != expected)
+        stored = 0
+        for user in range(users):
+            profile = profiles.get(f"user-{user}")
+            if {'steps': profile['steps'], 'cash': profile['cash']} != expected:
+                stored += 1
+    total = threads * (users // 2) * submissions
+    print(f"[cashwalk] 제출 {total}건 {elapsed:.2f}초 ({total / elapsed:,.0f}건/초) / "
+          f"일괄 저장 {flushed}명 {flush_ms:.1f}ms / 잔액 오류 {wrong}명 / 저장 불일치 {stored}명")
+    return wrong == 0 and stored == 0
+
+
+# --------------------------------------------------------------------------------
+# 7. 혼잡도 시계열 (1초마다 기록해도 메모리가 일정한지)
+# --------------------------------------------------------------------------------
+def bench_history(days=2):
+    """days일 분량의 1초 샘플을 기록하고 메모리 / 구간 집계 시간을 측정합니다."""
+    history = CongestionHistory(FLOORS, banks=BANKS)
+    start_ts = time.time() - days * 86400
+    samples = days * 86400
+    rng = random.Random(0)
+    empty_bytes = history.stats()['bytes']
+
+    start = time.perf_counter()
+    for n in range(samples):
+        level = CONGESTION_LEVELS[rng.randrange(len(CONGESTION_LEVELS))]
+        history.record(start_ts + n, {bank: level for bank in BANKS}, {floor: level for floor in FLOORS})
+    elapsed = time.perf_counter() - start
+    stats = history.stats()
+    print(f"[history] 샘플 {samples:,}건 기록 {elapsed:.2f}초 ({samples / elapsed:,.0f}건/초)")
+    print(f"[history] 링 버퍼 메모리 {stats['bytes'] / 1024 / 1024:.1f}MB "
+          f"(기록 전 {empty_bytes / 1024 / 1024:.1f}MB - 기간과 무관하게 일정)")
+
+    end_ts = start_ts + samples
+    for label, span in (("10분", 600), ("1일", 86400), ("7일", 7 * 86400)):
+        start = time.perf_counter()
+        result = history.aggregate(FLOORS[0], end_ts - span, end_ts)
+        ms = (time.perf_counter() - start) * 1000
+        print(f"[history] 최근 {label} 집계 {ms:.2f}ms -> {result and result['level']} "
+              f"(샘플 {result and result['samples']:,}건)")
+
+
+# --------------------------------------------------------------------------------
+# 8. 예약 정원 / 요청 속도 제한 검사
+# --------------------------------------------------------------------------------
+def check_capacity(threads=64, capacity=3):
+    """threads명이 같은 층/시간 칸에 동시에 예약해도 정확히 capacity명만 받는지 확인합니다."""
+    store = ReservationStore(FLOORS, capacity=capacity)
+    time_obj = datetime.time(23, 30)
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)  # 실행 시각과 상관없이 지난 시간이 아니도록
+    barrier = threading.Barrier(threads)
+    outcomes = []
+
+    def worker(worker_id):
+        barrier.wait()
+        try:
+            store.reserve(FLOORS[0], time_obj, f"user-{worker_id}", tomorrow)
+            outcomes.append('ok')
+        except SlotFullError as e:
+            outcomes.append(e.suggestion)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    accepted = outcomes.count('ok')
+    suggested = sum(1 for outcome in outcomes if isinstance(outcome, datetime.time))
+    print(f"[capacity] {threads}명 동시 예약 / 정원 {capacity}: 성공 {accepted}명, "
+          f"빈 시간 제안 {suggested}명, 칸 점유 {store.occupancy(FLOORS[0], time_obj, tomorrow)}")
+
+    limited = ReservationStore(FLOORS, limiter=TokenBucketLimiter(rate_per_minute=20, burst=5))
+    allowed = 0
+    for i in range(50):
+        try:
+            limited.reserve(FLOORS[i % len(FLOORS)], time_obj, "flooder")
+            allowed += 1
+        except RateLimitedError:
+            pass
+    print(f"[capacity] 한 사용자가 50건 연속 요청: {allowed}건 허용 (burst 5)")
+    return accepted == capacity and suggested == threads - capacity and allowed == 5
+
+
+# --------------------------------------------------------------------------------
+# 9. 운행 계획 시뮬레이션 (하루 치 예약 다시 계산)
+# --------------------------------------------------------------------------------
+def bench_dispatch(per_slot=3, hours=10, runs=10):
+    """08:00부터 hours시간 동안 모든 층의 1분 칸마다 per_slot건씩 예약된 상태로 운행 계획을 runs번 계산합니다."""
+    start = datetime.datetime.combine(datetime.date.today(), datetime.time(8, 0))
+    reservations = {floor: [] for floor in FLOORS}
+    for minute in range(hours * 60):
+        at = start + datetime.timedelta(minutes=minute)
+        for floor in FLOORS:
+            for n in range(per_slot):
+                reservations[floor].append({'name': f"user-{minute}-{n}", 'time': at.time(), 'date': at.date()})
+    congestion = {floor: CONGESTION_LEVELS[i % len(CONGESTION_LEVELS)] for i, floor in enumerate(FLOORS)}
+    total = sum(len(res) for res in reservations.values())
+
+    timings = sorted(simulate(FLOORS, reservations, congestion, start).elapsed_ms for _ in range(runs))
+    plan = simulate(FLOORS, reservations, congestion, start)
+    on_time = sum(1 for stop in plan.service_order if stop.wait <= 60)
+    print(f"[dispatch] 예약 {total:,}건 (층 {len(FLOORS)}개 x {hours}시간 x 1분당 {per_slot}건), 운행 {plan.trips:,}회")
+    print(f"[dispatch] 계산 시간 중앙값 {timings[len(timings) // 2]:.1f} ms / 최대 {timings[-1]:.1f} ms, "
+          f"1분 안에 태운 예약 {on_time:,}건")
+
+
+# --------------------------------------------------------------------------------
+# 10. 예약 일괄 등록 / 내보내기
+# --------------------------------------------------------------------------------
+def bench_bulk(rows=50000):
+    """rows행 CSV를 검증해서 한 번에 등록하고, 내보내고, 로그로 다시 복구하는 시간을 잽니다."""
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    lines = ["floor,name,time,date"]
+    for n in range(rows):
+        minute = n % (14 * 60)
+        lines.append(f"{FLOORS[n % len(FLOORS)]},user-{n},{8 + minute // 60:02d}:{minute % 60:02d},{tomorrow.isoformat()}")
+    data = ("\n".join(lines) + "\n").encode('utf-8')
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        store = ReservationStore(FLOORS, log=ReservationLog(log_dir))
+        started = time.perf_counter()
+        parsed, errors = parse_reservations(data, 'csv', FLOORS)
+        parse_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        result = store.bulk_reserve(parsed, enforce_capacity=False)
+        insert_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        exported = "".join(iter_export(store, FLOORS, 'csv'))
+        export_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        restored = ReservationStore(FLOORS, log=ReservationLog(log_dir))
+        restore_ms = (time.perf_counter() - started) * 1000
+
+    round_trip, _ = parse_reservations(exported, 'csv', FLOORS)
+    restored_total = sum(restored.count(floor) for floor in FLOORS)
+    print(f"[bulk] {rows:,}행: 검증 {parse_ms:.0f} ms (오류 {len(errors)}건), 등록 {insert_ms:.0f} ms "
+          f"({result['added']:,}건), 내보내기 {export_ms:.0f} ms ({len(exported) / 1024:.0f} KB)")
+    print(f"[bulk] 로그로 재시작 복구 {restore_ms:.0f} ms ({restored_total:,}건), 내보내기 다시 읽기 {len(round_trip):,}건")
+    return result['added'] == rows == restored_total == len(round_trip) and not errors
+
+
+# --------------------------------------------------------------------------------
+# 11. 구간 측정 비용
+# --------------------------------------------------------------------------------
+def bench_metrics(calls=200000):
+    """빈 함수를 calls번 부를 때 timed() / section()이 더하는 호출당 시간(ns)을 잽니다."""
+    def work():
+        return None
+
+    def per_call_ns(func):
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        return (time.perf_counter() - started) / calls * 1e9
+
+    def plain():
+        work()
+
+    baseline = per_call_ns(work)
+    nested = per_call_ns(plain)   # section()은 함수 안에서 쓰므로 함수 한 단계를 더 거친 것과 비교
+    for enabled in (False, True):
+        metrics = Metrics(enabled=enabled)
+        timed_work = metrics.timed("work")(work)
+
+        def with_section():
+            with metrics.section("work"):
+                work()
+        label = "켜짐" if enabled else "꺼짐"
+        print(f"[metrics] {label}: timed +{per_call_ns(timed_work) - baseline:.0f} ns, "
+              f"section +{per_call_ns(with_section) - nested:.0f} ns / 호출 (기준 {baseline:.0f} ns)")
+    text = metrics.render_prometheus()
+    print(f"[metrics] Prometheus 텍스트 {len(text.splitlines())}줄, 기록 {metrics.summary()[0]['count']:,}건")
+
+
+# --------------------------------------------------------------------------------
+# 12. 세션당 메모리 / 오래 쉰 세션 정리
+# --------------------------------------------------------------------------------
+def _legacy_session(n):
+    """예전 initialize_state()가 세션마다 만들던 값 (공통 표까지 세션마다 복사)"""
+    return {
+        'initialized': True, 'logged_in': True, 'user_name': f"학생{n}", 'user_id': f"2024{n:04d}",
+        'floors': list(FLOORS),
+        'congestion_levels': ['여유', '보통', '혼잡'],
+        'congestion_colors': {'여유': '🟢', '보통': '🟠', '혼잡': '🔴'},
+        'reserve_suggestion': None, 'steps_submission_id': os.urandom(16).hex(), 'steps_to_add_input': 0,
+        'alert_floor': None, 'alert_time_str': "08:50", 'alert_window_minutes': 5, 'alert_active_until': 0,
+    }
+
+
+def _compact_session(n, registry):
+    user = UserSession()
+    user.login(f"2024{n:04d}", f"학생{n}")
+    registry.touch(user)
+    return {'user': user, 'steps_to_add_input': 0}
+
+
+def bench_session_memory(sessions=1000, idle_minutes=30):
+    """세션 sessions개의 세션 상태가 차지하는 메모리를 tracemalloc으로 재고, 오래 쉰 세션 정리를 확인합니다."""
+    results = {}
+    clock = [0.0]
+    registry = SessionRegistry(idle_minutes=idle_minutes, clock=lambda: clock[0])
+    for label, make in (("예전 (dict + 공통 표 복사)", _legacy_session),
+                        ("UserSession (__slots__)", lambda n: _compact_session(n, registry))):
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        states = [make(n) for n in range(sessions)]
+        used = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+        results[label] = used / sessions
+        print(f"[memory] {label}: 세션 {sessions:,}개 {used / 1024:.0f} KB, 세션당 {used / sessions:.0f} 바이트")
+
+    # 절반만 계속 조작하고 나머지는 쉬게 둔 뒤, 제한 시간이 지나면 쉰 세션만 로그아웃되는지 확인
+    users = [state['user'] for state in states]
+    clock[0] += idle_minutes * 60 / 2
+    for user in users[::2]:
+        registry.touch(user)
+    clock[0] += idle_minutes * 60 / 2 + 1
+    reaped = registry.reap()
+    active = sum(1 for user in users if user.logged_in)
+    print(f"[memory] {idle_minutes}분 동안 조작 없던 세션 정리: {reaped:,}개 로그아웃, 로그인 유지 {active:,}개, "
+          f"등록 세션 {registry.stats()['sessions']:,}개")
+    del states, users
+    return reaped == sessions - (sessions + 1) // 2 and active == (sessions + 1) // 2
+
+
+# --------------------------------------------------------------------------------
+# 13. 건물별 현황 읽기 (층 번호 배열)
+# --------------------------------------------------------------------------------
+def bench_buildings(buildings=20, floors_per_building=30, reads=2000):
+    """buildings개 건물 x floors_per_building층 학교에서 건물 하나의 층별 예약 수 / 카드를 읽는 시간을 잽니다."""
+    config = {
+        f"{b}동": {'floors': [f"{b}동 {f}F" for f in range(1, floors_per_building + 1)],
+                  'banks': {f"{b}동 저층": [f"{b}동 {f}F" for f in range(1, floors_per_building // 2 + 1)],
+                            f"{b}동 고층": None}}
+        for b in range(1, buildings + 1)
+    }
+    campus = Campus(config)
+    store = ReservationStore(campus.floors)
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    for n, floor in enumerate(campus.floors):
+        for k in range(n % 5):
+            store.reserve(floor, datetime.time(9, k), f"user-{n}-{k}", tomorrow)
+    snapshot = CongestionSnapshot(1, time.time(), {bank: CONGESTION_LEVELS[0] for bank in campus.bank_names},
+                                  {floor: CONGESTION_LEVELS[n % 3] for n, floor in enumerate(campus.floors)})
+    rng = random.Random(0)
+    picks = [campus.buildings[rng.randrange(buildings)] for _ in range(reads)]
+
+    started = time.perf_counter()
+    for building in picks:
+        [store.count(floor) for floor in building.floors]
+        [snapshot.floors[floor] for floor in building.floors]
+    per_floor_us = (time.perf_counter() - started) / reads * 1e6
+
+    started = time.perf_counter()
+    for building in picks:
+        store.counts(building.start, building.stop)
+        snapshot.building_levels(building)
+    sliced_us = (time.perf_counter() - started) / reads * 1e6
+
+    cache = FloorCardCache(CONGESTION_COLORS)
+    for building in campus.buildings:
+        cache.cards(building, snapshot, store)   # 처음 한 번은 카드를 만듭니다.
+    started = time.perf_counter()
+    for building in picks:
+        cache.cards(building, snapshot, store)
+    switch_us = (time.perf_counter() - started) / reads * 1e6
+
+    print(f"[buildings] 건물 {buildings}개 x {floors_per_building}층 (엘리베이터 {len(campus.banks)}대, "
+          f"예약 {sum(store.counts()):,}건)")
+    print(f"[buildings] 건물 하나의 예약 수 + 혼잡도: 층별 조회 {per_floor_us:.1f} us -> 배열 자르기 {sliced_us:.1f} us")
+    print(f"[buildings] 건물 바꿔 보기 (카드 목록): {switch_us:.1f} us / 회 (카드 캐시 적중 {cache.hits:,}, 생성 {cache.misses:,})")
+
+
+# --------------------------------------------------------------------------------
+# 14. 변경 알림 버스 (몰아서 알리기)
+# --------------------------------------------------------------------------------
+def bench_bus(sessions=200, bookings=100, ticks=20000):
+    """예약 bookings건이 몰릴 때 세션마다 화면을 다시 그린 횟수와, 바뀐 것이 없을 때 확인 한 번의 비용을 잽니다."""
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    floors = FLOORS[:len(FLOORS) // 2] or FLOORS   # 세션이 보는 건물의 층 번호 [0, len(floors))
+
+    # 1) 가짜 시계로 재현: 10ms마다 예약 1건, 세션은 100ms마다 (서로 다른 때에) 확인
+    now = [0.0]
+    bus = ChangeBus(FLOORS, clock=lambda: now[0])
+    store = ReservationStore(FLOORS, bus=bus)
+    rng = random.Random(0)
+    offsets = [rng.randrange(10) for _ in range(sessions)]
+    seen = [bus.settled()] * sessions
+    refreshes = [0] * sessions
+    for step in range(400):   # 4초
+        now[0] = step * 0.01
+        if step < bookings:
+            store.reserve(floors[step % len(floors)], datetime.time(9, step % 60), f"user-{step}", tomorrow)
+        for n in range(sessions):
+            if step % 10 != offsets[n]:
+                continue
+            version = bus.settled()
+            if version != seen[n]:
+                if bus.changed_floors(('reservations', 'congestion'), seen[n], 0, len(floors)):
+                    refreshes[n] += 1
+                seen[n] = version
+    print(f"[bus] 예약 {bookings}건 (10ms 간격) / 세션 {sessions}개 (100ms마다 확인): "
+          f"세션당 다시 그리기 최소 {min(refreshes)} / 최대 {max(refreshes)}회 (게시 {bus.published}회, 묶음 {bus.bursts}개)")
+
+    # 2) 바뀐 것이 없을 때 확인 한 번: 예전(스냅샷 + 층별 버전 + 카드 캐시) vs 버스 버전 비교
+    building = CAMPUS.buildings[0]
+    cache = FloorCardCache(CONGESTION_COLORS)
+    snapshot = CongestionSnapshot(1, time.time(), {bank: CONGESTION_LEVELS[0] for bank in BANKS},
+                                  {floor: CONGESTION_LEVELS[0] for floor in FLOORS})
+    cache.cards(building, snapshot, store)
+    started = time.perf_counter()
+    for _ in range(ticks):
+        cache.cards(building, snapshot, store)
+    before_us = (time.perf_counter() - started) / ticks * 1e6
+    version = bus.settled()
+    started = time.perf_counter()
+    for _ in range(ticks):
+        bus.settled() == version
+    after_us = (time.perf_counter() - started) / ticks * 1e6
+    print(f"[bus] 바뀐 것이 없을 때 확인: 층별 버전 + 카드 캐시 {before_us:.2f} us -> 버스 버전 {after_us:.2f} us")
+
+    # 3) 실제 스레드: 4개 스레드가 예약 bookings건을 넣는 동안 기다리는 쪽은 몇 번 깨어나는지
+    bus = ChangeBus(FLOORS)
+    store = ReservationStore(FLOORS, bus=bus)
+    wakeups = []
+    done = threading.Event()
+
+    def watcher():
+        version = bus.settled()
+        while not done.is_set():
+            new = bus.wait(version, timeout=0.1)
+            if new != version:
+                wakeups.append(new)
+                version = new
+
+    def writer(worker):
+        for k in range(bookings // 4):
+            store.reserve(FLOORS[k % len(FLOORS)], datetime.time(10, k % 60), f"w{worker}-{k}", tomorrow)
+
+    thread = threading.Thread(target=watcher)
+    thread.start()
+    writers = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+    for t in writers:
+        t.start()
+    for t in writers:
+        t.join()
+    time.sleep(bus.coalesce_seconds * 2)
+    done.set()
+    thread.join()
+    print(f"[bus] 스레드 4개 x {bookings // 4}건: 기다리는 쪽이 깨어난 횟수 {len(wakeups)}회 (게시 {bus.published}회)")
+    return max(refreshes) == 1 and len(wakeups) == 1
+
+
+# --------------------------------------------------------------------------------
+# 15. 카메라 수집 파이프라인 (asyncio)
+# --------------------------------------------------------------------------------
+class _BurstCamera:
+    """한 번에 burst개씩 몰아서 보내는 카메라 (큐가 가득 찰 때 오래된 프레임을 버리는지 확인)"""
+
+    def __init__(self, name, burst=50, interval=0.5):
+        self.name, self.burst, self.interval = name, burst, interval
+
+    async def frames(self):
+        while True:
+            for k in range(self.burst):
+                yield CountEvent(self.name, time.time(), k % 20)
+            await asyncio.sleep(self.interval)
+
+
+class _LaggingCamera:
+    """촬영 후 lag초 늦게 도착하는 카메라 (오래된 프레임을 버리는지 확인)"""
+
+    def __init__(self, name, lag=5.0, interval=0.2):
+        self.name, self.lag, self.interval = name, lag, interval
+
+    async def frames(self):
+        while True:
+            yield CountEvent(self.name, time.time() - self.lag, 20)
+            await asyncio.sleep(self.interval)
+
+
+def bench_cameras(floors=600, rate_hz=5.0, seconds=5.0):
+    """floors개 층 카메라를 초당 rate_hz번씩 seconds초 동안 수집하면서 처리량과 CPU 사용률을 잽니다."""
+    names = [f"{n // 30 + 1}동 {n % 30 + 1}F" for n in range(floors)]
+    sources = [SimulatedCameraSource(name, rate_hz, seed=n) for n, name in enumerate(names[2:], start=2)]
+    sources += [_BurstCamera(names[0]), _LaggingCamera(names[1])]
+    pipeline = CameraIngestPipeline((), names, sources, on_change=lambda: pipeline.read((), names))
+
+    async def run_for():
+        task = asyncio.create_task(pipeline.run())
+        await asyncio.sleep(seconds)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    asyncio.run(run_for())
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    stats = pipeline.stats()
+    expected = (floors - 2) * rate_hz * seconds
+    print(f"[cameras] 카메라 {floors}대 x 초당 {rate_hz:g}번, {seconds:g}초: 수신 {stats['received']:,} / 처리 {stats['processed']:,}건 "
+          f"({stats['processed'] / wall:,.0f}건/초, 일반 카메라 예상 {expected:,.0f}건)")
+    print(f"[cameras] CPU {cpu / wall * 100:.0f}% (코어 1개 기준), 혼잡도 게시 {stats['publishes']}회 "
+          f"({stats['publishes'] / wall:.1f}회/초)")
+    print(f"[cameras] 몰아서 보낸 카메라: 큐가 가득 차서 버림 {stats['dropped_full']:,}건 / "
+          f"늦게 도착한 카메라: 오래되어 버림 {stats['dropped_stale']:,}건 -> {names[1]} 혼잡도 {pipeline.levels()[names[1]]}")
+    return (stats['dropped_full'] > 0 and stats['dropped_stale'] > 0
+            and pipeline.levels()[names[1]] == CONGESTION_LEVELS[0] and cpu < wall)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="탈래말래 부하/성능 측정")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    stress = sub.add_parser("stress", help="예약 저장소 동시성 스트레스 검사")
+    stress.add_argument("--threads", type=int, default=64)
+    stress.add_argument("--ops", type=int, default=2000)
+
+    index = sub.add_parser("index", help="정렬 인덱스 vs 리스트+sorted() 비교")
+    index.add_argument("--per-floor", type=int, default=10000)
+    index.add_argument("--reruns", type=int, default=50)
+
+    render = sub.add_parser("render", help="rerun당 전송량 / 실행 시간 측정")
+    render.add_argument("--runs", type=int, default=20)
+
+    mp = sub.add_parser("multiprocess", help="여러 워커 프로세스 일관성 검사")
+    mp.add_argument("--workers", type=int, default=4)
+    mp.add_argument("--ops", type=int, default=300)
+
+    sessions = sub.add_parser("sessions", help="동시 접속 세션 부하 테스트 (JSON 결과)")
+    sessions.add_argument("--counts", default="1,10,50,100,500", help="세션 수 목록 (쉼표로 구분)")
+    sessions.add_argument("--rounds", type=int, default=3)
+    sessions.add_argument("--workers", type=int, default=SESSION_WORKERS, help="세션을 동시에 실행할 워커 프로세스 수")
+    sessions.add_argument("--output", help="결과 JSON 파일 경로 (생략 시 표준 출력)")
+
+    cashwalk = sub.add_parser("cashwalk", help="캐시워크 장부 중복 제출 / 일괄 저장 검사")
+    cashwalk.add_argument("--users", type=int, default=500)
+    cashwalk.add_argument("--threads", type=int, default=32)
+
+    history = sub.add_parser("history", help="혼잡도 시계열 기록 / 집계 측정")
+    history.add_argument("--days", type=int, default=2)
+
+    capacity = sub.add_parser("capacity", help="예약 정원 / 요청 속도 제한 검사")
+    capacity.add_argument("--threads", type=int, default=64)
+    capacity.add_argument("--capacity", type=int, default=3)
+
+    dispatch = sub.add_parser("dispatch", help="운행 계획 시뮬레이션 시간 측정")
+    dispatch.add_argument("--per-slot", type=int, default=3)
+    dispatch.add_argument("--hours", type=int, default=10)
+
+    bulk = sub.add_parser("bulk", help="예약 일괄 등록 / 내보내기 시간 측정")
+    bulk.add_argument("--rows", type=int, default=50000)
+
+    metrics = sub.add_parser("metrics", help="구간 측정 비용 측정")
+    metrics.add_argument("--calls", type=int, default=200000)
+
+    memory = sub.add_parser("memory", help="세션당 메모리 / 오래 쉰 세션 정리 측정")
+    memory.add_argument("--sessions", type=int, default=1000)
+
+    buildings = sub.add_parser("buildings", help="건물별 현황 읽기 시간 측정")
+    buildings.add_argument("--buildings", type=int, default=20)
+    buildings.add_argument("--floors", type=int, default=30)
+
+    bus = sub.add_parser("bus", help="변경 알림 버스 몰아서 알리기 검사")
+    bus.add_argument("--sessions", type=int, default=200)
+    bus.add_argument("--bookings", type=int, default=100)
+
+    cameras = sub.add_parser("cameras", help="카메라 수집 파이프라인 처리량 측정")
+    cameras.add_argument("--floors", type=int, default=600)
+    cameras.add_argument("--rate", type=float, default=5.0)
+    cameras.add_argument("--seconds", type=float, default=5.0)
+
+    args = parser.parse_args(argv)
+    if args.command == "stress":
+        ok = stress_reservations(args.threads, args.ops)
+        return 0 if ok else 1
+    if args.command == "index":
+        bench_index(args.per_floor, args.reruns)
+    if args.command == "render":
+        bench_render(args.runs)
+    if args.command == "multiprocess":
+        return 0 if check_multiprocess(args.workers, args.ops) else 1
+    if args.command == "cashwalk":
+        return 0 if check_cashwalk(args.users, args.threads) else 1
+    if args.command == "history":
+        bench_history(args.days)
+    if args.command == "capacity":
+        return 0 if check_capacity(args.threads, args.capacity) else 1
+    if args.command == "dispatch":
+        bench_dispatch(args.per_slot, args.hours)
+    if args.command == "bulk":
+        return 0 if bench_bulk(args.rows) else 1
+    if args.command == "metrics":
+        bench_metrics(args.calls)
+    if args.command == "memory":
+        return 0 if bench_session_memory(args.sessions) else 1
+    if args.command == "buildings":
+        bench_buildings(args.buildings, args.floors)
+    if args.command == "bus":
+        return 0 if bench_bus(args.sessions, args.bookings) else 1
+    if args.command == "cameras":
+        return 0 if bench_cameras(args.floors, args.rate, args.seconds) else 1
+    if args.command == "sessions":
+        # 실제 data/ 폴더를 건드리지 않도록 임시 폴더를 씁니다. (정원/속도 제한은 상태 서버에서 끔)
+        with tempfile.TemporaryDirectory() as data_dir:
+            os.environ["DATA_DIR"] = data_dir
+            report = bench_sessions([int(c) for c in args.counts.split(",")], args.rounds, args.workers)
+        if report is None:
+            return 1
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+import asyncio
+import bisect
+import collections
+import csv
+import os
+import random
+import sys
+import threading
+import time
+
+from congestion_feed import CONGESTION_LEVELS
+
+# --------------------------------------------------------------------------------
+# 카메라 인원 수 수집 (asyncio) -> 혼잡도
+# --------------------------------------------------------------------------------
+# 화면에는 '실제로는 카메라가 이 데이터를 업데이트합니다'라고 적혀 있지만, 혼잡도는 랜덤으로 만들고 있었습니다.
+# 층 / 엘리베이터마다 카메라(인원 수 이벤트를 보내는 소스)를 하나씩 두고, 이벤트 루프 하나에서 모두 읽습니다.
+#   - 카메라마다 작은 큐(queue_size)를 둡니다. 처리보다 빨리 들어오면 가장 오래된 프레임을 버리고 새 것을 넣습니다.
+#     (카메라는 기다려 주지 않으므로 생산자를 막지 않고, 밀린 옛 프레임 대신 최신 프레임을 처리)
+#   - 큐에서 꺼냈을 때 max_age_seconds보다 오래된 프레임도 버립니다.
+#   - 인원 수는 최근 window_seconds초 평균(슬라이딩 윈도우)으로 다듬은 뒤 기준값으로 여유/보통/혼잡을 정합니다.
+#     (한 프레임만 튀어도 혼잡도가 깜빡이지 않도록)
+#   - publish_interval_seconds마다 혼잡도를 계산해서, 하나라도 바뀌었을 때만 on_change()를 부릅니다.
+#     (state_backend.py에서는 CongestionFeed.refresh(record=False) - 새 스냅샷 게시 + 변경 버스 알림)
+#   - 파이프라인 자체가 CongestionFeed의 데이터 소스(read(banks, floors))입니다.
+#
+# 실제 카메라 대신 CAMERA_DIR 폴더의 기록 파일을 재생합니다. 층/엘리베이터 이름마다 '<이름>.csv' 하나:
+#   0.0,3        <- 기록 시작부터의 초, 사람 수 (머리글 없음, 끝나면 처음부터 다시 재생)
+#   0.25,4
+# 파일이 없는 층/엘리베이터는 카메라 없이 두고(처음 값인 여유 또는 마지막 혼잡도 유지) 시작할 때 목록을 알립니다.
+# (무작위 인원 수로 채우면 실제 혼잡도처럼 보이므로 SimulatedCameraSource는 부하 측정에만 씁니다)
+
+# 사람 수 기준값: 첫 값 미만이면 여유, 두 번째 값 미만이면 보통, 그 이상이면 혼잡
+FLOOR_THRESHOLDS = (4, 10)   # 층 대기 인원
+BANK_THRESHOLDS = (5, 10)    # 엘리베이터 안 인원 (정원 12명 기준)
+
+WINDOW_SECONDS = 3.0
+MAX_FRAME_AGE_SECONDS = 2.0
+QUEUE_SIZE = 4
+PUBLISH_INTERVAL_SECONDS = 0.2
+
+# 카메라 한 대가 보낸 인원 수 하나 (timestamp는 촬영 시각 - time.time())
+CountEvent = collections.namedtuple('CountEvent', ['source', 'timestamp', 'count'])
+
+
+def level_for(count, thresholds):
+    """사람 수를 혼잡도 문자열로 바꿉니다."""
+    return CONGESTION_LEVELS[bisect.bisect_right(thresholds, count)]
+
+
+class SlidingWindow:
+    """최근 seconds초 동안의 인원 수 평균입니다. (합계를 따로 들고 있어서 추가/조회 모두 O(빠지는 개수))"""
+
+    __slots__ = ('seconds', 'samples', 'total')
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.samples = collections.deque()   # (timestamp, count)
+        self.total = 0
+
+    def add(self, timestamp, count):
+        self.samples.append((timestamp, count))
+        self.total += count
+        self._evict(timestamp)
+
+    def _evict(self, now):
+        samples = self.samples
+        cutoff = now - self.seconds
+        while samples and samples[0][0] < cutoff:
+            self.total -= samples.popleft()[1]
+
+    def mean(self, now):
+        """now 기준 최근 seconds초 평균을 반환합니다. 그 사이 샘플이 없으면 None."""
+        self._evict(now)
+        return self.total / len(self.samples) if self.samples else None
+
+
+# --------------------------------------------------------------------------------
+# 카메라 소스 - frames()는 CountEvent를 내보내는 비동기 생성기입니다.
+# --------------------------------------------------------------------------------
+class ReplayCameraSource:
+    """기록 파일('초,사람 수' 줄)을 기록된 간격대로 재생합니다. (speed배 빠르게, loop면 끝나면 처음부터)"""
+
+    def __init__(self, name, path, speed=1.0, loop=True):
+        self.name = name
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+
+    def _load(self):
+        with open(self.path, encoding='utf-8', newline='') as f:
+            return [(float(row[0]), int(row[1])) for row in csv.reader(f) if len(row) >= 2]
+
+    async def frames(self):
+        rows = self._load()
+        if not rows:
+            return
+        while True:
+            previous = rows[0][0]
+            for offset, count in rows:
+                await asyncio.sleep(max(0.0, offset - previous) / self.speed)
+                previous = offset
+                yield CountEvent(self.name, time.time(), count)
+            if not self.loop:
+                return
+
+
+class SimulatedCameraSource:
+    """(시뮬레이션) 초당 rate_hz번, 0 ~ max_count 사이에서 조금씩 오르내리는 인원 수를 보냅니다."""
+
+    def __init__(self, name, rate_hz=5.0, max_count=15, seed=None):
+        self.name = name
+        self.rate_hz = rate_hz
+        self.max_count = max_count
+        self._rng = random.Random(seed)
+
+    async def frames(self):
+        interval = 1.0 / self.rate_hz
+        count = self._rng.randint(0, self.max_count)
+        # 카메라마다 시작 시점을 흩어서 모든 이벤트가 같은 순간에 몰리지 않게 합니다.
+        await asyncio.sleep(self._rng.random() * interval)
+        while True:
+            count = min(self.max_count, max(0, count + self._rng.randint(-2, 2)))
+            yield CountEvent(self.name, time.time(), count)
+            await asyncio.sleep(interval)
+
+
+def sources_from_directory(path, names, speed=1.0):
+    """path 폴더의 '<이름>.csv'마다 ReplayCameraSource를 만듭니다. 파일이 없는 이름은 건너뛰고 알립니다."""
+    sources = []
+    missing = []
+    for name in names:
+        replay = os.path.join(path, f"{name}.csv")
+        if os.path.exists(replay):
+            sources.append(ReplayCameraSource(name, replay, speed))
+        else:
+            missing.append(name)
+    if missing:
+        print(f"[cameras] {path}에 기록 파일이 없는 카메라 {len(missing)}개 (혼잡도를 바꾸지 않음): "
+              f"{', '.join(missing)}", file=sys.stderr)
+    return sources
+
+
+# --------------------------------------------------------------------------------
+# 수집 파이프라인
+# --------------------------------------------------------------------------------
+class CameraIngestPipeline:
+    """카메라 소스들을 이벤트 루프 하나(백그라운드 스레드)에서 읽어 층/엘리베이터별 혼잡도를 만듭니다."""
+
+    def __init__(self, banks, floors, sources, window_seconds=WINDOW_SECONDS,
+                 max_age_seconds=MAX_FRAME_AGE_SECONDS, queue_size=QUEUE_SIZE,
+                 publish_interval_seconds=PUBLISH_INTERVAL_SECONDS,
+                 floor_thresholds=FLOOR_THRESHOLDS, bank_thresholds=BANK_THRESHOLDS, on_change=None,
+                 clock=time.time):
+        self.banks = tuple(banks)
+        self.floors = tuple(floors)
+        names = set(self.banks + self.floors)
+        self.sources = tuple(source for source in sources if source.name in names)
+        self.max_age_seconds = max_age_seconds
+        self.queue_size = queue_size
+        self.publish_interval_seconds = publish_interval_seconds
+        self._clock = clock
+        self._thresholds = {name: bank_thresholds for name in self.banks}
+        self._thresholds.update({name: floor_thresholds for name in self.floors})
+        self._windows = {name: SlidingWindow(window_seconds) for name in self._thresholds}
+        # 카메라가 아직 아무것도 보내지 않은 층/엘리베이터는 여유로 시작합니다.
+        self._levels = {name: CONGESTION_LEVELS[0] for name in self._thresholds}
+        self._lock = threading.Lock()   # _levels / _unread (read()는 다른 스레드에서 호출)
+        self._unread = False
+        self._loop = None
+        self._thread = None
+        self._on_change = on_change   # 혼잡도가 바뀌었을 때 부를 함수 (이벤트 루프 스레드에서)
+        self.received = 0
+        self.processed = 0
+        self.dropped_full = 0    # 큐가 가득 차서 버린 프레임
+        self.dropped_stale = 0   # 너무 오래되어 버린 프레임
+        self.publishes = 0
+        self.source_errors = 0   # 기록 파일을 읽지 못해 멈춘 카메라
+
+    # --- CongestionFeed 데이터 소스 ---
+    def read(self, banks, floors):
+        """마지막으로 읽은 뒤 혼잡도가 바뀌었으면 ({엘리베이터: 혼잡도}, {층: 혼잡도}), 아니면 None."""
+        with self._lock:
+            if not self._unread:
+                return None
+            self._unread = False
+            levels = self._levels
+        first = CONGESTION_LEVELS[0]
+        return ({bank: levels.get(bank, first) for bank in banks},
+                {floor: levels.get(floor, first) for floor in floors})
+
+    def levels(self):
+        with self._lock:
+            return dict(self._levels)
+
+    # --- 코루틴 ---
+    async def _read_source(self, source, queue):
+        try:
+            async for event in source.frames():
+                self.received += 1
+                if queue.full():
+                    queue.get_nowait()   # 밀린 가장 오래된 프레임을 버리고 최신 프레임을 넣습니다.
+                    self.dropped_full += 1
+                queue.put_nowait(event)
+        except (OSError, ValueError, IndexError):
+            # 기록 파일이 없거나 형식이 틀리면 그 카메라만 멈추고, 그 층은 마지막 혼잡도를 유지합니다.
+            self.source_errors += 1
+
+    async def _consume(self, name, queue):
+        window = self._windows[name]
+        while True:
+            event = await queue.get()
+            if self._clock() - event.timestamp > self.max_age_seconds:
+                self.dropped_stale += 1
+                continue
+            window.add(event.timestamp, event.count)
+            self.processed += 1
+
+    async def _publish(self):
+        while True:
+            await asyncio.sleep(self.publish_interval_seconds)
+            self.publish_now()
+
+    def publish_now(self):
+        """지금 윈도우 평균으로 혼잡도를 다시 정하고, 바뀌었으면 on_change()를 부릅니다. 바뀌었는지를 반환합니다."""
+        now = self._clock()
+        changed = {}
+        for name, window in self._windows.items():
+            mean = window.mean(now)
+            if mean is None:
+                continue   # 최근 프레임이 없으면 마지막 혼잡도를 유지합니다.
+            level = level_for(mean, self._thresholds[name])
+            if level != self._levels[name]:
+                changed[name] = level
+        if not changed:
+            return False
+        with self._lock:
+            self._levels = {**self._levels, **changed}
+            self._unread = True
+        self.publishes += 1
+        if self._on_change is not None:
+            self._on_change()
+        return True
+
+    async def run(self):
+        """모든 소스를 읽고 혼잡도를 게시합니다. (취소될 때까지)"""
+        tasks = [asyncio.create_task(self._publish())]
+        for source in self.sources:
+            queue = asyncio.Queue(self.queue_size)
+            tasks.append(asyncio.create_task(self._read_source(source, queue)))
+            tasks.append(asyncio.create_task(self._consume(source.name, queue)))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # --- 백그라운드 스레드 ---
+    def start(self, on_change=None):
+        """이벤트 루프를 돌리는 백그라운드 스레드를 시작합니다. 혼잡도가 바뀌면 on_change()를 (그 스레드에서) 부릅니다."""
+        if self._thread is not None:
+            return
+        if on_change is not None:
+            self._on_change = on_change
+        self._loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            task = self._loop.create_task(self.run())
+            try:
+                self._loop.run_until_complete(task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="camera-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            self._loop.call_soon_threadsafe(lambda: [task.cancel() for task in asyncio.all_tasks(self._loop)])
+        except RuntimeError:
+            return   # 이미 닫힘
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'sources': len(self.sources),
+            'received': self.received,
+            'processed': self.processed,
+            'dropped_full': self.dropped_full,
+            'dropped_stale': self.dropped_stale,
+            'publishes': self.publishes,
+            'source_errors': self.source_errors,
+        }
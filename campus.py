@@ -0,0 +1,125 @@
+import array
+import collections
+import json
+import os
+
+# --------------------------------------------------------------------------------
+# 건물 / 엘리베이터 / 층 설정
+# --------------------------------------------------------------------------------
+# 층 목록을 여러 곳에 ['B1', ..., '5F']로 적어 두는 대신 이 설정 하나를 사용합니다.
+# CAMPUS_CONFIG 환경변수로 JSON 파일을 지정하면 그 설정을 읽습니다.
+#
+#   {"buildings": {"본관": ["B1", "1F", "2F"], "신관": ["신관 1F", "신관 2F"]}}
+#
+# 건물에 엘리베이터(호기 묶음)가 여러 대면 banks로 각 엘리베이터가 서는 층을 적습니다. (생략하면 모든 층)
+#
+#   {"buildings": {"본관": {"floors": ["B1", "1F", "2F", "3F"],
+#                           "banks": {"본관 동쪽": null, "본관 서쪽": ["1F", "3F"]}}}}
+#
+# 층 이름과 엘리베이터 이름은 학교 전체에서 겹치지 않아야 합니다. (예약/혼잡도가 이름으로 저장되므로)
+#
+# 모든 층에는 학교 전체에서 0부터 시작하는 번호(floor id)가 붙고, 한 건물의 층은 번호가 이어집니다.
+# 그래서 건물 하나의 층별 혼잡도 / 예약 수는 배열에서 [start:stop] 한 번만 잘라 읽으면 됩니다.
+
+DEFAULT_BUILDINGS = {
+    "본관": ['B1', '1F', '2F', '3F', '4F', '5F'],
+}
+# banks를 적지 않은 건물의 엘리베이터 이름 (건물이 하나면 예전처럼 '엘리베이터')
+DEFAULT_BANK_NAME = "엘리베이터"
+
+# id: 학교 전체 번호, floor_ids: 서는 층 번호 (아래층부터)
+Bank = collections.namedtuple('Bank', ['id', 'name', 'building', 'floors', 'floor_ids'])
+# floors[i]의 번호는 start + i (start <= 번호 < stop), banks: 이 건물의 Bank 목록
+Building = collections.namedtuple('Building', ['id', 'name', 'floors', 'start', 'stop', 'banks'])
+
+
+def load_buildings(path=None):
+    """{건물: {'floors': (층, ...), 'banks': {엘리베이터: (층, ...) 또는 None}}} 설정을 반환합니다.
+
+    path가 없으면 기본 설정을 사용합니다.
+    """
+    path = path or os.environ.get("CAMPUS_CONFIG")
+    if not path:
+        buildings = DEFAULT_BUILDINGS
+    else:
+        with open(path, encoding='utf-8') as f:
+            buildings = json.load(f)['buildings']
+
+    result = {}
+    seen = set()
+    for building, spec in buildings.items():
+        if not isinstance(spec, dict):
+            spec = {'floors': spec}
+        floors = tuple(spec['floors'])
+        for floor in floors:
+            if floor in seen:
+                raise ValueError(f"층 이름 '{floor}'이(가) 중복되었습니다. 건물 이름을 붙여 구분해 주세요.")
+            seen.add(floor)
+        banks = spec.get('banks')
+        if not banks:
+            name = DEFAULT_BANK_NAME if len(buildings) == 1 else f"{building} {DEFAULT_BANK_NAME}"
+            banks = {name: None}
+        result[building] = {'floors': floors, 'banks': {name: tuple(served) if served else None
+                                                        for name, served in banks.items()}}
+    return result
+
+
+class Campus:
+    """건물 -> 엘리베이터 -> 층 구조와 이름 <-> 번호 변환표입니다. (만든 뒤에는 바뀌지 않음)"""
+
+    def __init__(self, config):
+        floors = []
+        buildings = []
+        banks = []
+        for building_id, (name, spec) in enumerate(config.items()):
+            start = len(floors)
+            floors.extend(spec['floors'])
+            floor_index = {floor: start + i for i, floor in enumerate(spec['floors'])}
+            building_banks = []
+            for bank_name, served in spec['banks'].items():
+                served = served or spec['floors']
+                unknown = [floor for floor in served if floor not in floor_index]
+                if unknown:
+                    raise ValueError(f"엘리베이터 '{bank_name}'이(가) {name}에 없는 층에 섭니다: {unknown}")
+                served = tuple(sorted(served, key=floor_index.__getitem__))
+                bank = Bank(len(banks), bank_name, building_id, served,
+                            tuple(floor_index[floor] for floor in served))
+                banks.append(bank)
+                building_banks.append(bank)
+            buildings.append(Building(building_id, name, tuple(spec['floors']), start, len(floors),
+                                      tuple(building_banks)))
+
+        bank_names = [bank.name for bank in banks]
+        names = bank_names + floors
+        duplicates = sorted({name for name in bank_names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"엘리베이터 이름이 층 또는 다른 엘리베이터와 겹칩니다: {duplicates}")
+
+        self.floors = tuple(floors)
+        self.buildings = tuple(buildings)
+        self.banks = tuple(banks)
+        self.bank_names = tuple(bank_names)
+        self.floor_ids = {floor: i for i, floor in enumerate(self.floors)}
+        self.building_ids = {building.name: building.id for building in self.buildings}
+        # 층 번호 -> 건물 번호 (배열 한 칸 읽기)
+        self.building_of_floor = array.array('H', (building.id for building in self.buildings
+                                                   for _ in building.floors))
+
+    def building(self, name_or_id):
+        """건물 이름이나 번호로 Building을 반환합니다. (O(1))"""
+        if isinstance(name_or_id, int):
+            return self.buildings[name_or_id]
+        return self.buildings[self.building_ids[name_or_id]]
+
+    def building_of(self, floor):
+        """floor가 있는 Building을 반환합니다."""
+        return self.buildings[self.building_of_floor[self.floor_ids[floor]]]
+
+
+CAMPUS = Campus(load_buildings())
+# {건물: (층, ...)} - 건물별 층 목록
+BUILDINGS = {building.name: building.floors for building in CAMPUS.buildings}
+# 모든 건물의 층을 한 줄로 (예약 저장소 / 혼잡도 피드의 키, 순서가 곧 층 번호)
+FLOORS = CAMPUS.floors
+# 모든 엘리베이터 이름 (혼잡도 피드 / 시계열의 키)
+BANKS = CAMPUS.bank_names
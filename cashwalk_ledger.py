@@ -0,0 +1,179 @@
+import collections
+import datetime
+import sys
+import threading
+
+# --------------------------------------------------------------------------------
+# 캐시워크 장부 (기능 5)
+# --------------------------------------------------------------------------------
+# 예전에는 st.session_state.cashwalk를 읽고-고치고-쓰는 방식이라, 세션이 새로 시작되면
+# '일일 최대 100캐시' 제한도 함께 초기화되었습니다.
+# 이제는 모든 세션이 같은 장부를 씁니다.
+#   - 사용자별 적립은 락 안에서 원자적으로 처리 (사용자를 여러 락에 나누어 배정)
+#   - 멱등 키: 같은 제출(더블 클릭 등)이 두 번 들어와도 한 번만 적립
+#   - 날짜가 바뀌면(자정) 걸음 수/캐시와 멱등 키를 자동으로 초기화
+#   - 디스크 저장은 백그라운드 스레드가 모아서 한 번의 트랜잭션으로 기록 (쉬는 시간 몰림 대비)
+#     저장에 실패하면(디스크 가득 참, SQLite 잠김 등) 알리고 변경을 그대로 두었다가 다음 주기에 다시 시도합니다.
+
+DAILY_CASH_CAP = 100   # 일일 최대 캐시
+STEPS_PER_CASH = 10    # 10보당 1캐시
+# 사용자당 기억해 둘 최근 멱등 키 수
+IDEMPOTENCY_KEYS_PER_USER = 32
+
+
+class _Account:
+    __slots__ = ('steps', 'cash', 'seen')
+
+    def __init__(self, steps=0, cash=0):
+        self.steps = steps
+        self.cash = cash
+        self.seen = collections.OrderedDict()   # 멱등 키 -> 그때의 결과
+
+
+class CashwalkLedger:
+    """모든 세션이 공유하는 걸음 수/캐시 장부입니다. (원자적 적립 + 멱등 키 + 자정 초기화 + 일괄 저장)"""
+
+    def __init__(self, profiles=None, stripes=16, flush_interval=1.0, clock=datetime.date.today):
+        self._profiles = profiles
+        self._clock = clock
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._accounts = {}          # user_id -> _Account (오늘 것만)
+        self._day = clock()
+        self._day_lock = threading.Lock()
+        # 아직 디스크에 쓰지 않은 변경 (user_id -> (날짜, 걸음 수, 캐시)) - 같은 사용자는 마지막 값만 남김
+        self._dirty = {}
+        self._dirty_lock = threading.Lock()
+        self._flush_interval = flush_interval
+        self._flush_stop = threading.Event()
+        self._flush_thread = None
+        self.flushed_batches = 0
+        self.flush_errors = 0
+
+    def _lock_for(self, user_id):
+        return self._locks[hash(user_id) % len(self._locks)]
+
+    def _rollover(self):
+        """날짜가 바뀌었으면 모든 계정과 멱등 키를 비웁니다. 오늘 날짜를 반환합니다."""
+        today = self._clock()
+        if today != self._day:
+            with self._day_lock:
+                if today != self._day:
+                    for lock in self._locks:
+                        lock.acquire()
+                    try:
+                        self._accounts.clear()
+                        self._day = today
+                    finally:
+                        for lock in self._locks:
+                            lock.release()
+        return today
+
+    def _account(self, user_id, today):
+        """user_id의 오늘 계정을 반환합니다. (해당 락을 잡은 상태에서 호출)"""
+        account = self._accounts.get(user_id)
+        if account is None:
+            account = _Account()
+            if self._profiles is not None:
+                profile = self._profiles.get(user_id)
+                if profile and profile.get('cash_date') == today.isoformat():
+                    account = _Account(profile['steps'], profile['cash'])
+            self._accounts[user_id] = account
+        return account
+
+    def _mark_dirty(self, user_id, today, account):
+        with self._dirty_lock:
+            self._dirty[user_id] = (today.isoformat(), account.steps, account.cash)
+
+    def add_steps(self, user_id, steps, idempotency_key=None):
+        """걸음 수를 적립하고 결과를 dict로 반환합니다. 같은 멱등 키로 다시 호출하면 처음 결과를 그대로 반환합니다.
+
+        반환값: {'steps', 'cash', 'added_cash', 'duplicate'}
+        """
+        today = self._rollover()
+        with self._lock_for(user_id):
+            account = self._account(user_id, today)
+            if idempotency_key is not None and idempotency_key in account.seen:
+                return dict(account.seen[idempotency_key], duplicate=True)
+            cash_to_add = steps // STEPS_PER_CASH
+            new_cash = min(account.cash + cash_to_add, DAILY_CASH_CAP)
+            result = {
+                'steps': account.steps + steps,
+                'cash': new_cash,
+                'added_cash': new_cash - account.cash,
+                'duplicate': False,
+            }
+            account.steps = result['steps']
+            account.cash = new_cash
+            if idempotency_key is not None:
+                account.seen[idempotency_key] = result
+                while len(account.seen) > IDEMPOTENCY_KEYS_PER_USER:
+                    account.seen.popitem(last=False)
+            self._mark_dirty(user_id, today, account)
+        return dict(result)
+
+    def balance(self, user_id):
+        """user_id의 오늘 {'steps', 'cash'}를 반환합니다."""
+        today = self._rollover()
+        with self._lock_for(user_id):
+            account = self._account(user_id, today)
+            return {'steps': account.steps, 'cash': account.cash}
+
+    def reset(self, user_id):
+        """user_id의 오늘 걸음 수/캐시를 0으로 되돌립니다."""
+        today = self._rollover()
+        with self._lock_for(user_id):
+            account = self._account(user_id, today)
+            account.steps = account.cash = 0
+            account.seen.clear()
+            self._mark_dirty(user_id, today, account)
+
+    # --- 일괄 저장 ---
+    def flush(self):
+        """쌓인 변경을 프로필 저장소에 한 번에 기록합니다. 기록한 사용자 수를 반환합니다.
+
+        기록에 실패하면 변경을 되돌려 두고(그 사이 새로 적립된 사용자는 새 값 유지) 예외를 그대로 냅니다.
+        """
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty or self._profiles is None:
+            return 0
+        try:
+            self._profiles.update_many({
+                user_id: {'cash_date': day, 'steps': steps, 'cash': cash}
+                for user_id, (day, steps, cash) in dirty.items()
+            })
+        except BaseException:
+            with self._dirty_lock:
+                dirty.update(self._dirty)
+                self._dirty = dirty
+            raise
+        self.flushed_batches += 1
+        return len(dirty)
+
+    def _flush_logged(self):
+        """백그라운드 스레드용 flush() - 실패해도 스레드가 죽지 않도록 알리고 다음 주기에 다시 시도합니다."""
+        try:
+            self.flush()
+        except Exception as e:
+            self.flush_errors += 1
+            with self._dirty_lock:
+                pending = len(self._dirty)
+            print(f"[cashwalk] 저장 실패, 다음에 다시 시도합니다 (대기 {pending}명): {e!r}", file=sys.stderr)
+
+    def start(self):
+        """flush_interval초마다 flush()를 호출하는 백그라운드 스레드를 시작합니다."""
+        if self._flush_thread is not None:
+            return
+
+        def run():
+            while not self._flush_stop.wait(self._flush_interval):
+                self._flush_logged()
+            self._flush_logged()
+
+        self._flush_thread = threading.Thread(target=run, name="cashwalk-flush", daemon=True)
+        self._flush_thread.start()
+
+    def stop(self):
+        self._flush_stop.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join()
@@ -0,0 +1,134 @@
+import array
+import threading
+import time
+
+# --------------------------------------------------------------------------------
+# 변경 알림 버스 (주제별 / 층별 버전 + 몰아서 알리기)
+# --------------------------------------------------------------------------------
+# 한 세션이 예약을 해도 다른 세션은 그 사실을 알 방법이 없어서, 자동 갱신 때마다
+# 혼잡도 스냅샷과 층별 예약 버전을 다시 읽어 보고 나서야 바뀐 것이 없다는 것을 알았습니다.
+# 이제 예약 저장소 / 혼잡도 피드 / 알림 스케줄러가 바뀔 때마다 이 버스에 게시하고,
+# 세션은 '버전 N 이후로 바뀐 것이 있나?'를 정수 하나로 확인합니다.
+#   - 버전은 프로세스 전체에서 하나씩 늘어나는 일련번호입니다. 게시할 때마다 그 주제와 층들의 버전이 이 번호가 됩니다.
+#     (그래서 'since 이후 바뀐 층'은 층별 버전 배열에서 since보다 큰 칸을 찾으면 됩니다)
+#   - 세션이 보는 버전은 settled()입니다. 게시가 이어지는 동안(coalesce_seconds 안에 다음 게시)은 올라가지 않고,
+#     잠잠해지면 한 번에 올라갑니다. 예약 100건이 몰려도 화면은 한 번만 새로 그립니다.
+#     (계속 몰려도 max_delay_seconds가 지나면 그때까지를 한 번 보여줍니다)
+#   - 자기 자신이 바꾼 것은 기다리지 않도록, 세션은 예약/취소 직후 그려 둔 결과를 버립니다. (탈래말래.py)
+
+TOPICS = ('reservations', 'congestion', 'alerts')
+# 이 시간(초) 동안 새 게시가 없으면 그때까지의 변경을 한 묶음으로 확정합니다.
+COALESCE_SECONDS = 0.5
+# 게시가 계속 이어져도 이 시간(초)이 지나면 확정합니다. (화면이 멈춘 것처럼 보이지 않도록)
+MAX_DELAY_SECONDS = 2.0
+
+
+class ChangeBus:
+    """주제별 / 층별 변경 버전을 게시하고 조회하는 발행/구독 버스입니다. (모든 세션 공유)"""
+
+    def __init__(self, floors, topics=TOPICS, coalesce_seconds=COALESCE_SECONDS,
+                 max_delay_seconds=MAX_DELAY_SECONDS, clock=time.monotonic):
+        self.floors = tuple(floors)
+        self.topics = tuple(topics)
+        self.coalesce_seconds = coalesce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._clock = clock
+        self._floor_ids = {floor: i for i, floor in enumerate(self.floors)}
+        self._versions = {topic: 0 for topic in self.topics}
+        # 주제 -> 층 번호 순서의 버전 배열 (campus의 층 번호와 같으므로 건물 하나는 [start:stop])
+        self._floor_versions = {topic: array.array('q', [0]) * len(self.floors) for topic in self.topics}
+        self._seq = 0
+        self._settled = 0
+        self._burst_started = None   # 아직 확정되지 않은 묶음의 첫 게시 시각
+        self._last_publish = 0.0
+        self._changed = threading.Condition()
+        self.published = 0
+        self.bursts = 0
+
+    # --- 게시 ---
+    def publish(self, topic, floors=()):
+        """topic(과 floors 층)이 바뀌었음을 알리고 새 버전을 반환합니다. 모르는 층 이름은 무시합니다."""
+        with self._changed:
+            now = self._clock()
+            self._settle(now)
+            self._seq += 1
+            self._versions[topic] = self._seq
+            floor_versions = self._floor_versions[topic]
+            for floor in floors:
+                i = self._floor_ids.get(floor)
+                if i is not None:
+                    floor_versions[i] = self._seq
+            if self._burst_started is None:
+                self._burst_started = now
+            self._last_publish = now
+            self.published += 1
+            self._changed.notify_all()
+            return self._seq
+
+    def _settle(self, now):
+        """지금 묶음이 끝났으면 확정합니다. (self._changed를 잡은 상태에서 호출)"""
+        if self._burst_started is None:
+            return
+        if (now - self._last_publish >= self.coalesce_seconds
+                or now - self._burst_started >= self.max_delay_seconds):
+            self._settled = self._seq
+            self._burst_started = None
+            self.bursts += 1
+
+    # --- 조회 ---
+    def settled(self):
+        """화면이 기준으로 삼을 버전을 반환합니다. 이전에 읽은 값과 같으면 확정된 변경이 없는 것입니다."""
+        if self._burst_started is None:
+            return self._settled   # 확정을 기다리는 묶음이 없으면 정수 하나 읽기 (락 불필요)
+        with self._changed:
+            self._settle(self._clock())
+            return self._settled
+
+    def version(self, topic=None):
+        """topic(생략 시 전체)의 가장 최근 버전을 반환합니다. (몰아서 알리기 없이 바로)"""
+        with self._changed:
+            return self._seq if topic is None else self._versions[topic]
+
+    def changed_topics(self, since):
+        """since 이후 바뀐 주제들을 반환합니다."""
+        with self._changed:
+            return tuple(topic for topic in self.topics if self._versions[topic] > since)
+
+    def changed_floors(self, topics, since, start=0, stop=None):
+        """topics 중 하나라도 since 이후 바뀐 층 번호 [start, stop) 안의 층 번호 목록을 반환합니다."""
+        with self._changed:
+            if all(self._versions[topic] <= since for topic in topics):
+                return []
+            stop = len(self.floors) if stop is None else stop
+            slices = [self._floor_versions[topic][start:stop] for topic in topics]
+        return [start + i for i, versions in enumerate(zip(*slices)) if max(versions) > since]
+
+    def wait(self, since, timeout=None):
+        """settled()가 since와 달라질 때까지(최대 timeout초) 기다린 뒤 settled()를 반환합니다.
+
+        묶음이 끝날 때까지 기다리므로, 몰려 들어온 변경에도 한 번만 깨어납니다.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        with self._changed:
+            while True:
+                now = self._clock()
+                self._settle(now)
+                if self._settled != since:
+                    return self._settled
+                if self._burst_started is not None:
+                    # 묶음이 끝날 시각까지만 자고 다시 확인합니다. (그 사이 게시가 오면 더 일찍 깨어남)
+                    wake = min(self._last_publish + self.coalesce_seconds,
+                               self._burst_started + self.max_delay_seconds) - now
+                else:
+                    wake = None
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return self._settled
+                    wake = remaining if wake is None else min(wake, remaining)
+                self._changed.wait(wake)
+
+    def stats(self):
+        with self._changed:
+            return {'version': self._seq, 'settled': self._settled,
+                    'published': self.published, 'bursts': self.bursts}
@@ -0,0 +1,183 @@
+import array
+import json
+import os
+import random
+import threading
+import time
+import types
+
+from campus import DEFAULT_BANK_NAME
+
+# --------------------------------------------------------------------------------
+# 공유 혼잡도 피드 (모든 세션이 같은 데이터를 읽음)
+# --------------------------------------------------------------------------------
+# 예전에는 세션마다 st.session_state에 혼잡도를 따로 만들어서
+# 접속자 수만큼 서로 다른 데이터가 생기고, 실제 카메라라면 접속자 수만큼 조회하게 됩니다.
+# 이제는 백그라운드 스레드 하나가 데이터 소스(랜덤 시뮬레이터 / 카메라 대체 파일)를 읽고,
+# 버전이 붙은 읽기 전용 스냅샷을 게시합니다. 세션은 그 스냅샷을 읽기만 합니다.
+# 엘리베이터(campus.BANKS)마다 내부 혼잡도를 따로 받고, 층별 혼잡도는 층 번호 순서의 정수 배열로도 둡니다.
+# (건물 하나의 층별 혼잡도 = levels[building.start:building.stop] 한 번 읽기)
+# bus(change_bus.ChangeBus)를 넘기면 새 버전을 게시할 때 혼잡도가 바뀐 층을 'congestion' 주제로 알립니다.
+
+CONGESTION_LEVELS = ('여유', '보통', '혼잡')
+# 모든 세션이 같이 쓰는 읽기 전용 표 (세션마다 복사하지 않음)
+CONGESTION_COLORS = types.MappingProxyType({'여유': '🟢', '보통': '🟠', '혼잡': '🔴'})
+# 혼잡도 문자열 -> 작은 정수 (여유=0, 보통=1, 혼잡=2)
+LEVEL_CODES = types.MappingProxyType({level: code for code, level in enumerate(CONGESTION_LEVELS)})
+
+
+class CongestionSnapshot:
+    """특정 시점의 혼잡도 (읽기 전용). version은 데이터가 바뀔 때마다 1씩 증가합니다.
+
+    banks: {엘리베이터: 혼잡도}, floors: {층: 혼잡도} (층 번호 순서)
+    levels: 층 번호 순서의 혼잡도 코드 배열 (LEVEL_CODES)
+    """
+
+    __slots__ = ('version', 'updated_at', 'banks', 'floors', 'levels')
+
+    def __init__(self, version, updated_at, banks, floors):
+        self.version = version
+        self.updated_at = updated_at
+        self.banks = types.MappingProxyType(dict(banks))
+        self.floors = types.MappingProxyType(dict(floors))
+        self.levels = array.array('b', (LEVEL_CODES[level] for level in self.floors.values()))
+
+    def building_levels(self, building):
+        """building(campus.Building) 층들의 혼잡도 코드 배열입니다. (배열 한 번 자르기)"""
+        return self.levels[building.start:building.stop]
+
+    def __reduce__(self):
+        # MappingProxyType은 pickle이 안 되므로 dict로 풀어서 보냅니다. (다른 프로세스로 전달할 때)
+        return (CongestionSnapshot, (self.version, self.updated_at, dict(self.banks), dict(self.floors)))
+
+
+# --- 데이터 소스 ---
+# read(banks, floors)는 ({엘리베이터: 혼잡도}, {층: 혼잡도})를 반환합니다. 새 데이터가 없으면 None.
+
+class RandomCongestionSource:
+    """(시뮬레이션) 혼잡도를 랜덤으로 만들어 내는 기본 소스입니다."""
+
+    def read(self, banks, floors):
+        return (
+            {bank: random.choice(CONGESTION_LEVELS) for bank in banks},
+            {floor: random.choice(CONGESTION_LEVELS) for floor in floors},
+        )
+
+
+class FileCongestionSource:
+    """카메라 대신 JSON 파일을 읽는 소스입니다. 파일이 바뀌었을 때만 다시 읽습니다.
+
+    파일 형식: {"banks": {"엘리베이터": "보통", ...}, "floors": {"B1": "여유", "1F": "혼잡", ...}}
+    (예전 형식의 "elevator": "보통"은 banks에 없는 모든 엘리베이터의 값으로 씁니다)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+
+    def read(self, banks, floors):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime == self._mtime:
+            return None
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except ValueError:
+            return None  # 카메라 쪽에서 파일을 쓰는 도중이면 다음 번에 다시 읽습니다.
+        self._mtime = mtime
+        bank_data = data.get('banks', {})
+        floor_data = data.get('floors', {})
+        elevator = data.get('elevator', CONGESTION_LEVELS[0])
+        return (
+            {bank: _known(bank_data.get(bank, elevator)) for bank in banks},
+            {floor: _known(floor_data.get(floor)) for floor in floors},
+        )
+
+
+def _known(level):
+    """모르는 혼잡도 문자열(카메라 쪽 오타 등)은 '여유'로 봅니다."""
+    return level if level in LEVEL_CODES else CONGESTION_LEVELS[0]
+
+
+class CongestionFeed:
+    """데이터 소스를 주기적으로 읽어 혼잡도 스냅샷을 게시하는 단일 생산자입니다."""
+
+    def __init__(self, floors, source=None, interval_seconds=10, history=None, forecast=None,
+                 banks=(DEFAULT_BANK_NAME,), bus=None):
+        self.floors = tuple(floors)
+        self.banks = tuple(banks)
+        self.source = source or RandomCongestionSource()
+        self.interval_seconds = interval_seconds
+        # 읽을 때마다 (바뀌지 않았어도) 샘플을 남길 시계열 저장소 (congestion_history.CongestionHistory)
+        self.history = history
+        # 새 샘플로 해당 칸만 갱신할 예측표 (congestion_forecast.CongestionForecast)
+        self.forecast = forecast
+        self.bus = bus
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread = None
+        # 첫 스냅샷은 바로 만들어 두어, 스레드가 돌기 전에도 화면을 그릴 수 있게 합니다.
+        first = self.source.read(self.banks, self.floors) or (
+            {bank: CONGESTION_LEVELS[0] for bank in self.banks},
+            {floor: CONGESTION_LEVELS[0] for floor in self.floors})
+        self._snapshot = CongestionSnapshot(1, time.time(), *first)
+        self._record(self._snapshot)
+
+    def _record(self, snapshot):
+        now = time.time()
+        for recorder in (self.history, self.forecast):
+            if recorder is not None:
+                recorder.record(now, snapshot.banks, snapshot.floors)
+
+    def snapshot(self):
+        """가장 최근 스냅샷을 반환합니다. (참조 하나를 읽을 뿐이라 락이 필요 없습니다)"""
+        return self._snapshot
+
+    def refresh(self, record=True):
+        """소스를 지금 바로 읽고, 데이터가 바뀌었으면 새 버전을 게시합니다. 최신 스냅샷을 반환합니다.
+
+        record=False면 시계열/예측표에 샘플을 남기지 않습니다. (카메라 파이프라인이 1초에 여러 번 부를 때,
+        사용자가 새로고침 버튼을 누를 때 - 샘플은 interval_seconds마다 도는 스레드만 일정한 간격으로 남깁니다)
+        """
+        changed = None
+        with self._lock:
+            data = self.source.read(self.banks, self.floors)
+            current = self._snapshot
+            if data is not None:
+                banks, floors = data
+                if banks != current.banks or floors != current.floors:
+                    self._snapshot = CongestionSnapshot(current.version + 1, time.time(), banks, floors)
+                    self._changed.notify_all()
+                    changed = [floor for floor in self.floors if floors[floor] != current.floors[floor]]
+            snapshot = self._snapshot
+        if changed is not None and self.bus is not None:
+            # 엘리베이터 내부만 바뀌었으면 층 목록은 비어 있고 주제 버전만 올라갑니다.
+            self.bus.publish('congestion', changed)
+        if record:
+            self._record(snapshot)
+        return snapshot
+
+    def wait_for_change(self, since_version, timeout=None):
+        """스냅샷 버전이 since_version과 달라질 때까지(최대 timeout초) 기다린 뒤 최신 스냅샷을 반환합니다."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._snapshot.version != since_version, timeout)
+            return self._snapshot
+
+    def start(self):
+        """interval_seconds마다 refresh()를 호출하는 백그라운드 스레드를 시작합니다."""
+        if self._thread is not None:
+            return
+
+        def run():
+            while not self._stop.wait(self.interval_seconds):
+                self.refresh()
+
+        self._thread = threading.Thread(target=run, name="congestion-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
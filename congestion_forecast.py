@@ -0,0 +1,143 @@
+import array
+import threading
+import time
+
+from campus import DEFAULT_BANK_NAME
+from congestion_feed import CONGESTION_LEVELS, LEVEL_CODES
+from congestion_history import level_name, series_values
+
+try:
+    import numpy as np
+except ImportError:  # numpy가 없으면 같은 계산을 순수 파이썬으로 합니다. (결과는 같고 초기 계산만 느림)
+    np = None
+
+# --------------------------------------------------------------------------------
+# 혼잡도 예측표 (요일 x 5분 칸)
+# --------------------------------------------------------------------------------
+# 혼잡도 기록(congestion_history)을 요일 x 5분 칸으로 모아 '보통 이 시간에는 어느 정도 붐비는지'를 미리 계산해 둡니다.
+#   - 시작할 때 기록 전체(1분 단위 7일 + 그 이전은 15분 단위)를 한 번에 집계 (numpy 벡터 연산)
+#   - 이후 새 샘플은 해당 칸 하나만 갱신 (O(1))
+#   - 화면에서는 예상 혼잡도를 표에서 꺼내기만 합니다. (O(1), 렌더링 중 계산 없음)
+
+SLOT_MINUTES = 5
+SLOT_SECONDS = SLOT_MINUTES * 60
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+_CELLS = 7 * SLOTS_PER_DAY          # 요일(월=0) x 하루의 5분 칸
+_LEVELS = len(CONGESTION_LEVELS)
+_NO_DATA = -1
+
+
+def _cell(weekday, hour, minute):
+    return weekday * SLOTS_PER_DAY + (hour * 60 + minute) // SLOT_MINUTES
+
+
+def _aggregate_numpy(tiers, utc_offset):
+    """요약 칸들을 (요일, 5분 칸, 레벨)별 샘플 수로 한 번에 모읍니다. (numpy)"""
+    totals = np.zeros(_CELLS * _LEVELS, dtype=np.int64)
+    for resolution, stamps, level_counts, cutoff in tiers:
+        stamps = np.frombuffer(stamps, dtype=np.int64)
+        starts = stamps * resolution
+        valid = stamps >= 0
+        if cutoff is not None:
+            valid &= starts < cutoff
+        local = starts[valid] + utc_offset
+        weekday = (local // 86400 + 3) % 7      # 1970-01-01은 목요일(3)
+        first_slot = (local % 86400) // SLOT_SECONDS
+        parts = max(1, resolution // SLOT_SECONDS)   # 15분 칸은 5분 칸 3개에 나누어 넣음
+        for code, column in enumerate(level_counts):
+            counts = np.frombuffer(column, dtype=np.uint16)[valid].astype(np.int64)
+            counts = -(-counts // parts)           # 올림 나눗셈 (샘플이 있던 칸이 0이 되지 않도록)
+            for part in range(parts):
+                cells = weekday * SLOTS_PER_DAY + (first_slot + part) % SLOTS_PER_DAY
+                totals += np.bincount(cells * _LEVELS + code, weights=counts,
+                                      minlength=totals.size).astype(np.int64)
+    return array.array('I', totals.astype(np.uint32).tobytes())
+
+
+def _aggregate_python(tiers, utc_offset):
+    """_aggregate_numpy와 같은 계산을 순수 파이썬으로 합니다."""
+    totals = array.array('I', [0]) * (_CELLS * _LEVELS)
+    for resolution, stamps, level_counts, cutoff in tiers:
+        parts = max(1, resolution // SLOT_SECONDS)
+        for i, bucket in enumerate(stamps):
+            start = bucket * resolution
+            if bucket < 0 or (cutoff is not None and start >= cutoff):
+                continue
+            local = start + utc_offset
+            weekday = (local // 86400 + 3) % 7
+            first_slot = (local % 86400) // SLOT_SECONDS
+            for code, column in enumerate(level_counts):
+                count = -(-column[i] // parts)
+                if not count:
+                    continue
+                for part in range(parts):
+                    cell = weekday * SLOTS_PER_DAY + (first_slot + part) % SLOTS_PER_DAY
+                    totals[cell * _LEVELS + code] += count
+    return totals
+
+
+def _expected_from(counts, cell):
+    """cell의 레벨별 샘플 수로 예상 레벨 코드를 구합니다. 샘플이 없으면 _NO_DATA."""
+    base = cell * _LEVELS
+    total = 0
+    weighted = 0
+    for code in range(_LEVELS):
+        n = counts[base + code]
+        total += n
+        weighted += code * n
+    if not total:
+        return _NO_DATA
+    return LEVEL_CODES[level_name(weighted / total)]
+
+
+class CongestionForecast:
+    """계열(엘리베이터/층)마다 요일 x 5분 칸의 예상 혼잡도를 미리 계산해 두는 표입니다."""
+
+    def __init__(self, floors, banks=(DEFAULT_BANK_NAME,)):
+        self.banks = tuple(banks)
+        self.series = self.banks + tuple(floors)
+        self._lock = threading.Lock()
+        self._counts = {name: array.array('I', [0]) * (_CELLS * _LEVELS) for name in self.series}
+        self._expected = {name: array.array('b', [_NO_DATA]) * _CELLS for name in self.series}
+
+    def load_history(self, history):
+        """혼잡도 기록 전체로 예측표를 다시 계산합니다. (시작할 때 한 번)"""
+        utc_offset = time.localtime().tm_gmtoff
+        aggregate = _aggregate_numpy if np is not None else _aggregate_python
+        for name in self.series:
+            tiers = history.export(name)
+            # 1분 단위 단계가 덮는 기간은 15분 단위 단계에서 빼서 같은 샘플을 두 번 세지 않습니다.
+            fine_resolution, fine_stamps = tiers[0][0], tiers[0][1]
+            fine_valid = [bucket for bucket in fine_stamps if bucket >= 0]
+            cutoff = min(fine_valid) * fine_resolution if fine_valid else None
+            counts = aggregate(
+                [(tiers[0][0], tiers[0][1], tiers[0][2], None)]
+                + [(resolution, stamps, level_counts, cutoff) for resolution, stamps, level_counts in tiers[1:]],
+                utc_offset,
+            )
+            expected = array.array('b', (_expected_from(counts, cell) for cell in range(_CELLS)))
+            with self._lock:
+                self._counts[name] = counts
+                self._expected[name] = expected
+
+    def record(self, timestamp, banks, floors):
+        """새 샘플 하나로 해당 칸의 예상 혼잡도만 다시 계산합니다."""
+        local = time.localtime(timestamp)
+        cell = _cell(local.tm_wday, local.tm_hour, local.tm_min)
+        values = series_values(self.series, len(self.banks), banks, floors)
+        with self._lock:
+            for name, level in values:
+                code = LEVEL_CODES.get(level)
+                if code is None:
+                    continue
+                counts = self._counts[name]
+                counts[cell * _LEVELS + code] += 1
+                self._expected[name][cell] = _expected_from(counts, cell)
+
+    def expected(self, name, when):
+        """when(datetime) 시각의 name 계열 예상 혼잡도 문자열을 반환합니다. 기록이 없으면 None.
+
+        표에서 값 하나를 꺼낼 뿐이라 락이 필요 없습니다.
+        """
+        code = self._expected[name][_cell(when.weekday(), when.hour, when.minute)]
+        return None if code == _NO_DATA else CONGESTION_LEVELS[code]
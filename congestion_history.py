@@ -0,0 +1,256 @@
+import array
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+from campus import DEFAULT_BANK_NAME
+from congestion_feed import CONGESTION_LEVELS, LEVEL_CODES
+
+# --------------------------------------------------------------------------------
+# 혼잡도 기록 (시계열)
+# --------------------------------------------------------------------------------
+# 혼잡도 피드는 최신 스냅샷만 들고 있어서 "3층은 보통 08:50에 얼마나 붐비나?"에 답할 수 없었습니다.
+# 이제는 엘리베이터(호기 묶음)별 / 층별 혼잡도를 매번 기록합니다. (계열 이름 = 엘리베이터 이름 또는 층 이름)
+#   - 혼잡도는 한국어 문자열 대신 작은 정수로 저장 (여유=0, 보통=1, 혼잡=2)
+#   - 고정 크기 array 링 버퍼 3단계: 원본(1초) 1시간 -> 1분 단위 7일 -> 15분 단위 1년
+#     샘플 하나가 들어올 때 세 단계를 모두 O(1)로 갱신하므로 따로 다운샘플링 작업이 필요 없습니다.
+#   - 링 버퍼라서 몇 달 동안 1초마다 기록해도 메모리는 계열당 약 0.7MB로 일정합니다.
+#   - 구간 조회 / 집계는 구간을 덮는 가장 촘촘한 단계에서 읽습니다.
+
+RAW_SECONDS = 60 * 60   # 원본 샘플 보관 기간 (1초 단위 칸)
+# 요약 단계: (칸 하나의 길이(초), 칸 수)
+ROLLUP_TIERS = (
+    (60, 7 * 24 * 60),        # 1분 단위 7일
+    (15 * 60, 366 * 24 * 4),  # 15분 단위 1년
+)
+_COUNT_MAX = 0xFFFF   # 요약 칸의 레벨별 샘플 수 상한 (array 'H')
+
+
+def level_name(mean):
+    """평균 레벨 값(0.0 ~ 2.0)을 가장 가까운 혼잡도 문자열로 바꿉니다."""
+    return CONGESTION_LEVELS[min(len(CONGESTION_LEVELS) - 1, max(0, int(mean + 0.5)))]
+
+
+def series_values(series, bank_count, banks, floors):
+    """계열 순서대로 [(계열 이름, 혼잡도), ...]를 만듭니다. (앞의 bank_count개는 엘리베이터, 나머지는 층)"""
+    return ([(name, banks.get(name)) for name in series[:bank_count]]
+            + [(name, floors.get(name)) for name in series[bank_count:]])
+
+
+class _RawRing:
+    """1초 단위 원본 샘플 링 버퍼입니다. stamps[i]가 그 칸의 시각(초)이고, -1이면 빈 칸입니다."""
+
+    __slots__ = ('resolution', 'capacity', 'stamps', 'levels')
+
+    def __init__(self, capacity, state=None):
+        self.resolution = 1
+        self.capacity = capacity
+        if state is None:
+            self.stamps = array.array('q', [-1]) * capacity
+            self.levels = array.array('b', [0]) * capacity
+        else:
+            self.stamps, self.levels = state
+
+    def add(self, second, code):
+        i = second % self.capacity
+        self.stamps[i] = second
+        self.levels[i] = code
+
+    def counts(self, first, last):
+        """[first, last] 칸마다 (칸 번호, 레벨별 샘플 수)를 돌려줍니다. 빈 칸은 건너뜁니다."""
+        stamps, levels, capacity = self.stamps, self.levels, self.capacity
+        for second in range(max(first, last - capacity + 1), last + 1):
+            i = second % capacity
+            if stamps[i] == second:
+                one_hot = [0] * len(CONGESTION_LEVELS)
+                one_hot[levels[i]] = 1
+                yield second, one_hot
+
+    def state(self):
+        return (self.stamps, self.levels)
+
+    def nbytes(self):
+        return self.stamps.itemsize * self.capacity + self.levels.itemsize * self.capacity
+
+
+class _RollupRing:
+    """resolution초 단위 요약 링 버퍼입니다. 칸마다 레벨별 샘플 수를 세어 두므로 평균/최댓값/분포를 모두 구할 수 있습니다."""
+
+    __slots__ = ('resolution', 'capacity', 'stamps', 'level_counts')
+
+    def __init__(self, resolution, capacity, state=None):
+        self.resolution = resolution
+        self.capacity = capacity
+        if state is None:
+            self.stamps = array.array('q', [-1]) * capacity
+            self.level_counts = tuple(array.array('H', [0]) * capacity for _ in CONGESTION_LEVELS)
+        else:
+            self.stamps, self.level_counts = state[0], tuple(state[1])
+
+    def add(self, second, code):
+        bucket = second // self.resolution
+        i = bucket % self.capacity
+        if self.stamps[i] != bucket:
+            # 한 바퀴 돌아온 칸이면 예전 값을 지우고 새 칸으로 씁니다.
+            self.stamps[i] = bucket
+            for column in self.level_counts:
+                column[i] = 0
+        column = self.level_counts[code]
+        if column[i] < _COUNT_MAX:
+            column[i] += 1
+
+    def counts(self, first, last):
+        stamps, capacity, columns = self.stamps, self.capacity, self.level_counts
+        for bucket in range(max(first, last - capacity + 1), last + 1):
+            i = bucket % capacity
+            if stamps[i] == bucket:
+                yield bucket, [column[i] for column in columns]
+
+    def state(self):
+        return (self.stamps, self.level_counts)
+
+    def nbytes(self):
+        return (self.stamps.itemsize + sum(column.itemsize for column in self.level_counts)) * self.capacity
+
+
+class CongestionHistory:
+    """엘리베이터/층별 혼잡도 시계열 저장소입니다. (정수 레벨 + 3단계 링 버퍼 + 주기적 파일 저장)"""
+
+    def __init__(self, floors, path=None, save_every=300, banks=(DEFAULT_BANK_NAME,)):
+        self.banks = tuple(banks)
+        self.series = self.banks + tuple(floors)
+        self.path = path
+        self.save_every = save_every
+        self._lock = threading.Lock()
+        # 피드 스레드(record)와 화면의 새로고침이 동시에 저장하지 않도록 저장은 한 번에 하나씩
+        self._save_lock = threading.Lock()
+        self._latest = None          # 가장 최근 샘플 시각(초)
+        self._last_save = time.time()
+        self.samples = 0
+        self._tiers = {}
+        loaded = self._load() if path else {}
+        for name in self.series:
+            state = loaded.get(name)
+            raw = _RawRing(RAW_SECONDS, state and state[0])
+            rollups = [_RollupRing(resolution, capacity, state and state[n + 1])
+                       for n, (resolution, capacity) in enumerate(ROLLUP_TIERS)]
+            self._tiers[name] = [raw] + rollups
+
+    # --- 기록 ---
+    def record(self, timestamp, banks, floors):
+        """한 시점의 ({엘리베이터: 혼잡도}, {층: 혼잡도})를 기록합니다."""
+        second = int(timestamp)
+        values = series_values(self.series, len(self.banks), banks, floors)
+        with self._lock:
+            for name, level in values:
+                code = LEVEL_CODES.get(level)
+                if code is None:
+                    continue
+                for tier in self._tiers[name]:
+                    tier.add(second, code)
+            self.samples += 1
+            self._latest = second if self._latest is None else max(self._latest, second)
+        if self.path and timestamp - self._last_save >= self.save_every:
+            self.save()
+
+    # --- 조회 ---
+    def _pick_tier(self, name, start, resolution):
+        """start까지 덮는 가장 촘촘한 단계를 고릅니다. resolution을 주면 그 단계를 씁니다."""
+        tiers = self._tiers[name]
+        if resolution is not None:
+            for tier in tiers:
+                if tier.resolution == resolution:
+                    return tier
+            raise ValueError(f"지원하지 않는 해상도: {resolution}초")
+        latest = self._latest if self._latest is not None else int(start)
+        for tier in tiers:
+            if start >= latest - tier.resolution * tier.capacity:
+                return tier
+        return tiers[-1]
+
+    def range(self, name, start, end, resolution=None):
+        """[start, end] 구간의 [(칸 시작 시각, 평균 레벨, 최고 레벨 문자열), ...]을 반환합니다."""
+        with self._lock:
+            tier = self._pick_tier(name, start, resolution)
+            step = tier.resolution
+            result = []
+            for bucket, counts in tier.counts(int(start) // step, int(end) // step):
+                total = sum(counts)
+                if total:
+                    mean = sum(code * n for code, n in enumerate(counts)) / total
+                    peak = max(code for code, n in enumerate(counts) if n)
+                    result.append((bucket * step, mean, CONGESTION_LEVELS[peak]))
+            return result
+
+    def aggregate(self, name, start, end, resolution=None):
+        """[start, end] 구간의 샘플 수, 평균 레벨, 대표 레벨, 레벨별 샘플 수를 반환합니다. 샘플이 없으면 None."""
+        with self._lock:
+            tier = self._pick_tier(name, start, resolution)
+            step = tier.resolution
+            totals = [0] * len(CONGESTION_LEVELS)
+            for _, counts in tier.counts(int(start) // step, int(end) // step):
+                for code, n in enumerate(counts):
+                    totals[code] += n
+        samples = sum(totals)
+        if not samples:
+            return None
+        mean = sum(code * n for code, n in enumerate(totals)) / samples
+        return {
+            'samples': samples,
+            'mean': mean,
+            'level': level_name(mean),
+            'levels': dict(zip(CONGESTION_LEVELS, totals)),
+        }
+
+    def export(self, name):
+        """name 계열의 요약 단계 복사본 [(칸 길이(초), stamps, 레벨별 샘플 수), ...]을 반환합니다. (예측표 계산용)"""
+        with self._lock:
+            return [(tier.resolution, tier.stamps[:], tuple(column[:] for column in tier.level_counts))
+                    for tier in self._tiers[name][1:]]
+
+    def stats(self):
+        """기록한 샘플 수와 링 버퍼가 차지하는 메모리(바이트)를 반환합니다."""
+        with self._lock:
+            nbytes = sum(tier.nbytes() for tiers in self._tiers.values() for tier in tiers)
+            return {'samples': self.samples, 'series': len(self._tiers), 'bytes': nbytes}
+
+    # --- 파일 저장 (재시작 후에도 기록 유지) ---
+    def save(self):
+        """링 버퍼를 path에 저장합니다. (저장마다 다른 임시 파일에 쓴 뒤 교체)
+
+        저장은 _save_lock으로 한 번에 하나씩만 하므로, 먼저 찍은 스냅샷이 나중 것을 덮어쓰지 않습니다.
+        """
+        with self._save_lock:
+            with self._lock:
+                self._last_save = time.time()
+                payload = {
+                    'raw_seconds': RAW_SECONDS,
+                    'rollup_tiers': ROLLUP_TIERS,
+                    'latest': self._latest,
+                    'series': {name: [tier.state() for tier in tiers] for name, tiers in self._tiers.items()},
+                }
+                data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def _load(self):
+        """저장된 링 버퍼를 읽습니다. 파일이 없거나 단계 구성이 바뀌었으면 빈 기록으로 시작합니다."""
+        try:
+            with open(self.path, 'rb') as f:
+                payload = pickle.load(f)
+        except (FileNotFoundError, pickle.UnpicklingError, EOFError):
+            return {}
+        if payload.get('raw_seconds') != RAW_SECONDS or tuple(payload.get('rollup_tiers', ())) != ROLLUP_TIERS:
+            return {}
+        self._latest = payload.get('latest')
+        return payload['series']
@@ -0,0 +1,189 @@
+import collections
+import datetime
+import heapq
+import threading
+import time
+
+# --------------------------------------------------------------------------------
+# 엘리베이터 운행 시뮬레이션 (예약 + 혼잡도 -> 운행 계획)
+# --------------------------------------------------------------------------------
+# 화면에는 예약과 혼잡도가 따로 보일 뿐, '그래서 몇 분 기다려야 하는지'는 알 수 없었습니다.
+# 공유 예약과 층별 혼잡도를 받아 엘리베이터 운행을 이산 사건 시뮬레이션으로 돌려서
+# 층별 예상 대기 시간과 🚑 예약 처리 순서를 계산합니다.
+#   - 호출은 시간순 목록 하나, 운행 중인 엘리베이터는 '비는 시각' 힙 하나로 관리 (사건 큐)
+#   - 🚑 예약이 일반 대기보다 항상 먼저 배차되고, 예약 시각에 도착하도록 미리 출발합니다.
+#   - 일반 대기 인원은 지금의 층별 혼잡도로 앞으로 background_minutes분 동안의 호출을 만듭니다.
+#   - 목적지는 로비(1F) - 로비에서 타는 사람은 맨 위층까지 간다고 보고 보수적으로 계산합니다.
+#   - 하루 치 예약(수천 건)도 수십 ms 안에 다시 계산됩니다. (benchmark.py dispatch)
+
+ElevatorConfig = collections.namedtuple(
+    'ElevatorConfig', ['cars', 'car_capacity', 'seconds_per_floor', 'door_seconds', 'background_minutes'])
+DEFAULT_CONFIG = ElevatorConfig(cars=2, car_capacity=12, seconds_per_floor=3.0, door_seconds=6.0,
+                                background_minutes=30)
+
+# 혼잡도별 층당 분당 대기 인원 (일반 호출)
+DEMAND_PER_MINUTE = {'여유': 1, '보통': 3, '혼잡': 8}
+# 일반 대기 인원은 이 간격(분)마다 모인 인원을 한 번에 호출합니다. (엘리베이터 한 번에 여러 명)
+CALL_INTERVAL_MINUTES = 3
+
+# 층별 예상 대기: average_wait / max_wait는 초, passengers는 시뮬레이션한 일반 승객 수
+FloorWait = collections.namedtuple('FloorWait', ['floor', 'average_wait', 'max_wait', 'passengers'])
+# 🚑 예약 처리 순서 한 줄: eta / reserved / wait는 계획 시작(created_at)부터의 초, car는 호기 번호(1부터)
+# (예약 수천 건마다 datetime을 만들지 않도록 초로 두고, 화면에 보여줄 때만 at()으로 바꿉니다)
+ServiceStop = collections.namedtuple('ServiceStop', ['eta', 'floor', 'name', 'reserved', 'wait', 'car'])
+DispatchPlan = collections.namedtuple('DispatchPlan', ['created_at', 'waits', 'service_order', 'trips', 'elapsed_ms'])
+
+_RESERVATION, _BACKGROUND = 0, 1   # 배차 우선순위 (작을수록 먼저)
+
+
+def lobby_index(floors):
+    """로비 층(이름이 '1F'로 끝나는 첫 층, 없으면 맨 아래 층)의 위치를 반환합니다."""
+    for i, floor in enumerate(floors):
+        if floor.endswith('1F'):
+            return i
+    return 0
+
+
+def simulate(floors, reservations, congestion, start=None, config=DEFAULT_CONFIG):
+    """운행 계획(DispatchPlan)을 계산합니다.
+
+    floors: 아래층부터 위층 순서의 층 이름
+    reservations: {층: 시간순 예약 dict 목록} ('name', 'time', 'date')
+    congestion: {층: 혼잡도 문자열} (지금 시점)
+    """
+    started = time.perf_counter()
+    start = start or datetime.datetime.now()
+    lobby = lobby_index(floors)
+    top = len(floors) - 1
+    spf = config.seconds_per_floor
+    door = config.door_seconds
+    # datetime 계산 대신 (날짜 서수, 초)로 바꿔서 뺄셈만 합니다. (예약 수천 건을 빠르게 변환)
+    start_day = start.toordinal()
+    start_second = start.hour * 3600 + start.minute * 60 + start.second + start.microsecond / 1e6
+    oldest = -config.background_minutes * 60
+
+    # --- 호출 목록 만들기 (초 단위, start 기준) ---
+    # (호출 가능 시각, 우선순위, 층 위치, 인원, 요청 시각(초), 이름)
+    calls = []
+    for position, floor in enumerate(floors):
+        # 예약: 로비에서 출발해 예약 시각에 도착하도록 그만큼 먼저 호출합니다.
+        lead = abs(position - lobby) * spf
+        for res in reservations.get(floor, ()):
+            t = res['time']
+            due = ((res['date'].toordinal() - start_day) * 86400
+                   + t.hour * 3600 + t.minute * 60 + t.second - start_second)
+            if due < oldest:
+                continue  # 한참 지난 예약 (만료 전) 은 계획에서 뺍니다.
+            due = max(0.0, due)
+            calls.append((max(0.0, due - lead), _RESERVATION, position, 1, due, res['name']))
+        # 일반 대기: 지금 혼잡도로 CALL_INTERVAL_MINUTES분마다 모인 인원을 호출
+        people = DEMAND_PER_MINUTE.get(congestion.get(floor), 0) * CALL_INTERVAL_MINUTES
+        if people:
+            for minute in range(0, config.background_minutes, CALL_INTERVAL_MINUTES):
+                at = minute * 60.0
+                calls.append((at, _BACKGROUND, position, people, at, None))
+    calls.sort()
+
+    # --- 이산 사건 시뮬레이션 ---
+    idle = {car: lobby for car in range(config.cars)}   # 쉬는 엘리베이터 -> 현재 층 위치
+    busy = []                          # (비는 시각, 호기, 도착 층 위치)
+    urgent = []                        # 대기 중인 🚑 예약 (요청 시각, 순번, 층 위치, 이름) - 항상 먼저
+    waiting = collections.deque()      # 대기 중인 일반 호출 [요청 시각, 층 위치, 인원] - 들어온 순서대로
+    seq = 0
+    i = 0
+    n = len(calls)
+    inf = float('inf')
+    trips = 0
+    waited = [0.0] * len(floors)      # 일반 승객 대기 시간 합 (인원 가중)
+    max_wait = [0.0] * len(floors)
+    passengers = [0] * len(floors)
+    service_order = []
+    capacity = config.car_capacity
+    heappush, heappop = heapq.heappush, heapq.heappop
+
+    while i < n or busy:
+        next_call = calls[i][0] if i < n else inf
+        if busy and busy[0][0] < next_call:
+            now, car, position = heappop(busy)
+            idle[car] = position
+        else:
+            now = next_call
+            while i < n and calls[i][0] == now:
+                _, priority, position, people, requested, name = calls[i]
+                if priority == _RESERVATION:
+                    heappush(urgent, (requested, seq, position, name))
+                    seq += 1
+                else:
+                    waiting.append([requested, position, people])
+                i += 1
+
+        # 쉬는 엘리베이터가 있는 동안 🚑 예약부터, 그다음 오래 기다린 일반 호출 순으로 배차합니다.
+        while idle and (urgent or waiting):
+            if urgent:
+                requested, _, position, name = heappop(urgent)
+            else:
+                requested, position, people = waiting[0]
+                name = None
+            # 가장 가까운 쉬는 엘리베이터
+            car = -1
+            distance = inf
+            for candidate, floor_position in idle.items():
+                gap = floor_position - position if floor_position > position else position - floor_position
+                if gap < distance:
+                    car, distance = candidate, gap
+            del idle[car]
+            pickup = now + distance * spf
+            destination = lobby if position != lobby else top
+            trips += 1
+            if name is not None:
+                pickup = max(pickup, requested)   # 예약 시각보다 먼저 태우지는 않음
+                service_order.append(ServiceStop(pickup, floors[position], name, requested, pickup - requested, car + 1))
+            else:
+                wait = pickup - requested
+                boarded = min(people, capacity)
+                waited[position] += wait * boarded
+                if wait > max_wait[position]:
+                    max_wait[position] = wait
+                passengers[position] += boarded
+                if people > boarded:
+                    waiting[0][2] = people - boarded  # 다 못 태운 인원은 그대로 줄 맨 앞에 남습니다.
+                else:
+                    waiting.popleft()
+            heappush(busy, (pickup + door + abs(position - destination) * spf + door, car, destination))
+
+    waits = {
+        floor: FloorWait(floor, waited[p] / passengers[p] if passengers[p] else 0.0, max_wait[p], passengers[p])
+        for p, floor in enumerate(floors)
+    }
+    return DispatchPlan(start, waits, service_order, trips, (time.perf_counter() - started) * 1000)
+
+
+def at(plan, seconds):
+    """계획 시작부터 seconds초 뒤의 datetime을 반환합니다."""
+    return plan.created_at + datetime.timedelta(seconds=seconds)
+
+
+class DispatchPlanner:
+    """엘리베이터별 운행 계획을 (예약 버전, 혼잡도 버전, 분)이 바뀔 때만 다시 계산해서 모든 세션이 공유합니다."""
+
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.config = config
+        self._plans = {}   # 엘리베이터 번호 -> (키, DispatchPlan)
+        self._lock = threading.Lock()
+
+    def plan(self, bank, reservations, congestion):
+        """bank(campus.Bank)가 서는 층들의 운행 계획을 반환합니다. congestion은 혼잡도 스냅샷입니다."""
+        now = datetime.datetime.now().replace(second=0, microsecond=0)
+        versions = reservations.versions()   # 모든 층의 버전을 배열 한 번으로 읽기
+        key = (tuple(versions[i] for i in bank.floor_ids), congestion.version, now)
+        cached = self._plans.get(bank.id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with self._lock:
+            cached = self._plans.get(bank.id)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            plan = simulate(bank.floors, {floor: reservations.snapshot(floor) for floor in bank.floors},
+                            dict(congestion.floors), now, self.config)
+            self._plans[bank.id] = (key, plan)
+            return plan
@@ -0,0 +1,84 @@
+import collections
+import datetime
+import threading
+
+from congestion_feed import CONGESTION_LEVELS
+
+# --------------------------------------------------------------------------------
+# 층별 카드 (층별 대기 현황)
+# --------------------------------------------------------------------------------
+# 층 카드의 markdown 문자열은 (혼잡도, 그 층의 예약 버전)이 같으면 항상 같습니다.
+# 그래서 층마다 마지막으로 만든 카드를 모든 세션이 함께 쓰도록 캐시해 두고,
+# 바뀐 층만 다시 만듭니다. (바뀌지 않은 층은 다시 그리는 비용이 거의 없음)
+# 건물 단위로도 (층별 혼잡도 배열, 층별 예약 버전 배열)을 키로 카드 목록 전체를 캐시합니다.
+# 두 배열은 각각 한 번씩 잘라 읽으므로, 건물을 바꾸거나 다시 그릴 때 바뀐 것이 없으면 O(1)입니다.
+# 예약 시간 옆의 날짜 표시('내일' 등)는 오늘 날짜에 따라 달라지므로, 오늘 날짜도 캐시 키에 넣습니다.
+
+FloorCard = collections.namedtuple('FloorCard', ['floor', 'status_md', 'count', 'popover_md'])
+
+
+def format_reservation_day(date_obj, today):
+    """예약 날짜를 시간 뒤에 붙일 표시로 바꿉니다. 오늘이면 '', 내일이면 ' (내일)', 그 밖에는 ' (10/20)'."""
+    if date_obj == today:
+        return ""
+    if date_obj == today + datetime.timedelta(days=1):
+        return " (내일)"
+    return f" ({date_obj.month}/{date_obj.day})"
+
+
+def build_floor_card(floor, status, color_icon, reservations, today):
+    """한 층의 카드 내용을 만듭니다. reservations는 (날짜, 시간)순으로 정렬된 예약 목록입니다."""
+    # 이름(res['name']) 대신 시간만 표시 (한 번의 markdown으로 묶어서 전송량 감소)
+    # 오늘이 아닌 예약은 시간 뒤에 '내일'이나 날짜를 붙여 오늘 예약과 구분합니다.
+    popover_md = "\n".join(f"- {res['time'].strftime('%H:%M')}{format_reservation_day(res['date'], today)}"
+                           for res in reservations)
+    return FloorCard(floor, f"### {color_icon} {status}", len(reservations), popover_md)
+
+
+class FloorCardCache:
+    """층별 카드를 (혼잡도, 예약 버전) 기준으로 캐시합니다. 모든 세션이 공유합니다."""
+
+    def __init__(self, congestion_colors):
+        self.congestion_colors = congestion_colors
+        self._cards = {}       # 층 번호 -> ((혼잡도 코드, 예약 버전, 오늘), FloorCard)
+        self._buildings = {}   # 건물 번호 -> ((혼잡도 배열, 버전 배열, 오늘), 카드 목록)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def cards(self, building, congestion, reservations, today=None):
+        """building(campus.Building)의 카드 목록을 반환합니다. congestion은 렌더 시작 시 한 번 읽은 혼잡도 스냅샷입니다.
+
+        today를 생략하면 datetime.date.today()입니다. (예약 날짜 표시 기준)
+        """
+        today = today or datetime.date.today()
+        levels = congestion.building_levels(building)
+        versions = reservations.versions(building.start, building.stop)
+        key = (levels, versions, today)
+        cached = self._buildings.get(building.id)
+        if cached is not None and cached[0] == key:
+            with self._lock:
+                self.hits += len(building.floors)
+            return cached[1]
+
+        result = []
+        for floor_id, floor, code, version in zip(range(building.start, building.stop), building.floors,
+                                                  levels, versions):
+            cached = self._cards.get(floor_id)
+            if cached is not None and cached[0] == (code, version, today):
+                with self._lock:
+                    self.hits += 1
+                result.append(cached[1])
+                continue
+            # 버전과 예약 목록을 같은 락 안에서 읽어야 캐시 키와 내용이 어긋나지 않습니다.
+            version, reservation_list = reservations.versioned_snapshot(floor)
+            status = CONGESTION_LEVELS[code]
+            card = build_floor_card(floor, status, self.congestion_colors[status], reservation_list, today)
+            with self._lock:
+                self.misses += 1
+                self._cards[floor_id] = ((code, version, today), card)
+            result.append(card)
+        result = tuple(result)
+        with self._lock:
+            self._buildings[building.id] = (key, result)
+        return result
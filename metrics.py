@@ -0,0 +1,188 @@
+import bisect
+import contextlib
+import functools
+import http.server
+import os
+import threading
+import time
+
+# --------------------------------------------------------------------------------
+# 구간별 실행 시간 측정 (히스토그램 + Prometheus 텍스트)
+# --------------------------------------------------------------------------------
+# rerun 한 번의 시간이 CSS, 공유 상태 조회, 사이드바, 층별 카드 중 어디에 쓰이는지 알 수 없었습니다.
+# 콜백과 화면 영역을 timed() / section()으로 감싸면 이름별 실행 시간 히스토그램이 쌓입니다.
+#   - 히스토그램은 프로세스에 하나뿐인 METRICS에 모이므로 모든 세션의 측정값이 합쳐집니다.
+#   - 칸 경계가 고정된 카운터 배열이라 측정 한 번은 bisect + 덧셈 몇 번입니다. (메모리 일정)
+#   - METRICS=1일 때만 켜집니다. 꺼져 있으면 timed()는 함수를 그대로 돌려주고,
+#     section()은 미리 만들어 둔 빈 컨텍스트를 돌려주므로 추가 비용이 사실상 없습니다.
+#   - METRICS_PORT를 지정하면 http://<METRICS_HOST>:<METRICS_PORT>/metrics 에서 Prometheus 형식으로 읽을 수 있습니다.
+#     (관리자는 사이드바의 '성능 지표'에서도 볼 수 있습니다)
+
+ENABLED = os.environ.get("METRICS", "0").lower() in ("1", "true", "yes", "on")
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+
+# 히스토그램 칸 경계 (초) - 0.5ms ~ 5초
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+METRIC_NAME = "tallae_section_duration_seconds"
+
+_NULL_SECTION = contextlib.nullcontext()
+
+
+class _Histogram:
+    """칸별 측정 수(마지막 칸은 BUCKETS를 넘는 값), 합계, 개수입니다."""
+
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class _Section:
+    """with 블록 하나의 실행 시간을 재는 컨텍스트입니다. (켜져 있을 때만 만들어짐)"""
+
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """이름별 실행 시간 히스토그램 모음입니다."""
+
+    def __init__(self, enabled=ENABLED, buckets=BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms = {}   # 이름 -> _Histogram
+        self._server = None
+
+    # --- 측정 ---
+    def observe(self, name, seconds):
+        """name 구간의 실행 시간(초)을 하나 기록합니다."""
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram(len(self.buckets) + 1)
+            histogram.counts[i] += 1
+            histogram.total += seconds
+            histogram.count += 1
+
+    def timed(self, name=None):
+        """함수 실행 시간을 name(생략 시 함수 이름)으로 기록하는 데코레이터입니다. 꺼져 있으면 함수를 그대로 돌려줍니다."""
+        def decorate(func):
+            if not self.enabled:
+                return func
+            label = name or func.__name__
+            observe = self.observe
+            perf_counter = time.perf_counter
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    observe(label, perf_counter() - started)
+            return wrapper
+        return decorate
+
+    def section(self, name):
+        """with metrics.section("이름"): 블록의 실행 시간을 기록합니다."""
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    # --- 조회 ---
+    def summary(self):
+        """[{'section', 'count', 'mean_ms', 'p50_ms', 'p95_ms'}, ...] (이름순, 분위수는 칸 경계로 추정)"""
+        with self._lock:
+            items = [(name, list(h.counts), h.total, h.count) for name, h in sorted(self._histograms.items())]
+        rows = []
+        for name, counts, total, count in items:
+            rows.append({
+                'section': name,
+                'count': count,
+                'mean_ms': round(total / count * 1000, 3),
+                'p50_ms': self._quantile_ms(counts, count, 0.5),
+                'p95_ms': self._quantile_ms(counts, count, 0.95),
+            })
+        return rows
+
+    def _quantile_ms(self, counts, count, q):
+        """q 분위수가 들어 있는 칸의 위쪽 경계(ms)를 반환합니다. 마지막 칸이면 inf."""
+        target = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= target:
+                return self.buckets[i] * 1000 if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def render_prometheus(self):
+        """Prometheus 텍스트 형식(0.0.4)으로 모든 히스토그램을 반환합니다."""
+        with self._lock:
+            items = [(name, list(h.counts), h.total, h.count) for name, h in sorted(self._histograms.items())]
+        lines = [
+            f"# HELP {METRIC_NAME} 탈래말래 구간별 실행 시간",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        bounds = [repr(bound) for bound in self.buckets] + ["+Inf"]
+        for name, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                lines.append(f'{METRIC_NAME}_bucket{{section="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_sum{{section="{name}"}} {total!r}')
+            lines.append(f'{METRIC_NAME}_count{{section="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    # --- /metrics HTTP 엔드포인트 ---
+    def serve(self, port=METRICS_PORT, host=METRICS_HOST):
+        """host:port에서 /metrics를 제공하는 스레드를 (프로세스당 한 번) 시작하고 실제 주소를 반환합니다."""
+        with self._lock:
+            if self._server is None:
+                self._server = http.server.ThreadingHTTPServer((host, port), _handler_for(self))
+                threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+            return self._server.server_address
+
+
+def _handler_for(metrics):
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass   # 스크레이프마다 stderr에 찍지 않음
+
+    return MetricsHandler
+
+
+# 프로세스에 하나뿐인 측정 모음 (앱 스크립트가 rerun마다 다시 실행되어도 모듈은 한 번만 불러옴)
+METRICS = Metrics()
+timed = METRICS.timed
+section = METRICS.section
@@ -0,0 +1,138 @@
+import collections
+import datetime
+import os
+import sqlite3
+import threading
+
+# --------------------------------------------------------------------------------
+# 사용자 프로필 저장소 (학번 기준)
+# --------------------------------------------------------------------------------
+# 알림 설정과 걸음 수/캐시는 st.session_state에만 있어서 새로고침이나 로그아웃하면 사라졌습니다.
+# 이제는 학번(user_id)을 키로 SQLite 파일에 저장하고, 자주 쓰는 프로필은 메모리 LRU 캐시에 둡니다.
+#   - 로그인 = 캐시 조회 한 번 (없을 때만 SQLite 조회)
+#   - 저장은 write-through (캐시와 SQLite를 함께 갱신)
+#   - 캐시 크기가 정해져 있어 학생이 수천 명이어도 메모리가 일정합니다.
+
+# cash_date: steps/cash가 어느 날짜의 값인지 (캐시워크 장부의 자정 초기화에 사용)
+PROFILE_FIELDS = ('name', 'alert_floor', 'alert_time', 'steps', 'cash', 'cash_date')
+
+_DEFAULT_PROFILE = {'name': "", 'alert_floor': None, 'alert_time': None, 'steps': 0, 'cash': 0, 'cash_date': None}
+
+_UPSERT_SQL = (
+    "INSERT INTO profiles (user_id, name, alert_floor, alert_time, steps, cash, cash_date, updated_at)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+    " ON CONFLICT(user_id) DO UPDATE SET name = excluded.name, alert_floor = excluded.alert_floor,"
+    " alert_time = excluded.alert_time, steps = excluded.steps, cash = excluded.cash,"
+    " cash_date = excluded.cash_date, updated_at = excluded.updated_at"
+)
+
+
+class ProfileStore:
+    """학번을 키로 하는 프로필 저장소입니다. (메모리 LRU 캐시 + SQLite)"""
+
+    def __init__(self, path, cache_size=2048):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()   # user_id -> 프로필 dict (최근 사용한 것이 뒤쪽)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            " user_id TEXT PRIMARY KEY, name TEXT, alert_floor TEXT, alert_time TEXT,"
+            " steps INTEGER NOT NULL DEFAULT 0, cash INTEGER NOT NULL DEFAULT 0, cash_date TEXT, updated_at TEXT)"
+        )
+        # cash_date 열이 없던 예전 파일이면 열을 추가합니다.
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(profiles)")}
+        if 'cash_date' not in columns:
+            self._db.execute("ALTER TABLE profiles ADD COLUMN cash_date TEXT")
+
+    def _remember(self, user_id, profile):
+        """캐시에 넣고, 크기를 넘으면 가장 오래 안 쓴 프로필을 버립니다. (self._lock을 잡은 상태에서 호출)"""
+        self._cache[user_id] = profile
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _load(self, user_id):
+        """캐시 -> SQLite 순으로 프로필을 찾습니다. (self._lock을 잡은 상태에서 호출)"""
+        profile = self._cache.get(user_id)
+        if profile is not None:
+            self.hits += 1
+            self._cache.move_to_end(user_id)
+            return profile
+        self.misses += 1
+        row = self._db.execute(
+            "SELECT name, alert_floor, alert_time, steps, cash, cash_date FROM profiles WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        profile = dict(zip(PROFILE_FIELDS, row))
+        self._remember(user_id, profile)
+        return profile
+
+    def get(self, user_id):
+        """user_id의 프로필 (dict 복사본)을 반환합니다. 저장된 적이 없으면 None."""
+        with self._lock:
+            profile = self._load(user_id)
+        return None if profile is None else dict(profile)
+
+    def _check_fields(self, fields):
+        unknown = set(fields) - set(PROFILE_FIELDS)
+        if unknown:
+            raise ValueError(f"알 수 없는 프로필 항목: {sorted(unknown)}")
+
+    def _merge(self, user_id, fields, now):
+        """기존 프로필에 fields를 덮어쓴 dict와 upsert 인자를 반환합니다. (self._lock을 잡은 상태에서 호출)"""
+        current = dict(self._load(user_id) or _DEFAULT_PROFILE)
+        current.update(fields)
+        return current, (user_id, *(current[field] for field in PROFILE_FIELDS), now)
+
+    def update(self, user_id, **fields):
+        """user_id의 프로필에서 fields만 바꿔 저장합니다. (없으면 새로 만듦) 저장된 프로필을 반환합니다."""
+        self._check_fields(fields)
+        with self._lock:
+            current, params = self._merge(user_id, fields, datetime.datetime.now().isoformat(timespec='seconds'))
+            self._db.execute(_UPSERT_SQL, params)
+            self._remember(user_id, current)
+        return dict(current)
+
+    def update_many(self, updates):
+        """{user_id: fields} 여러 건을 트랜잭션 하나로 저장합니다. (캐시워크 장부의 일괄 저장용)"""
+        for fields in updates.values():
+            self._check_fields(fields)
+        now = datetime.datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            merged = {user_id: self._merge(user_id, fields, now) for user_id, fields in updates.items()}
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(_UPSERT_SQL, [params for _, params in merged.values()])
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            for user_id, (current, _) in merged.items():
+                self._remember(user_id, current)
+        return len(merged)
+
+    def alerts(self):
+        """정기 알림이 설정된 모든 사용자의 (user_id, 층, 'HH:MM') 목록을 반환합니다. (시작 시 스케줄러 복구용)"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT user_id, alert_floor, alert_time FROM profiles WHERE alert_floor IS NOT NULL"
+            ).fetchall()
+
+    def stats(self):
+        """캐시 크기와 적중/실패 횟수를 반환합니다."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'cached': len(self._cache),
+                'capacity': self.cache_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,48 @@
+import threading
+import time
+
+# --------------------------------------------------------------------------------
+# 사용자별 요청 제한 (토큰 버킷)
+# --------------------------------------------------------------------------------
+# 한 사용자가 예약/취소 버튼을 연타하거나 스크립트로 요청을 쏟아부어도 공유 저장소가 막히지 않도록,
+# 사용자마다 버킷 하나를 두고 요청할 때마다 토큰을 1개씩 씁니다.
+#   - 토큰은 rate_per_minute 속도로 다시 차고, 최대 burst개까지 모아 둘 수 있습니다.
+#   - 버킷이 너무 많아지면 이미 가득 찬(한동안 요청이 없던) 버킷부터 지웁니다. (메모리 일정)
+
+
+class TokenBucketLimiter:
+    """키(사용자 이름)별 토큰 버킷입니다. allow()가 False면 요청을 거절해야 합니다."""
+
+    def __init__(self, rate_per_minute, burst, clock=time.monotonic, max_keys=10000):
+        self.rate = rate_per_minute / 60.0   # 초당 토큰
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets = {}   # 키 -> [남은 토큰, 마지막 갱신 시각]
+        self.rejected = 0
+
+    def allow(self, key, cost=1):
+        """key의 토큰을 cost개 쓸 수 있으면 쓰고 True, 부족하면 False를 반환합니다."""
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(now)
+                bucket = self._buckets[key] = [self.burst, now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < cost:
+                self.rejected += 1
+                return False
+            bucket[0] -= cost
+            return True
+
+    def _prune(self, now):
+        """지금쯤 가득 찼을 버킷을 지웁니다. (지워도 다음 요청 때 가득 찬 상태로 다시 만들어지므로 결과가 같음)"""
+        full_after = self.burst / self.rate if self.rate else float('inf')
+        idle = [key for key, (_, last) in self._buckets.items() if now - last >= full_after]
+        for key in idle:
+            del self._buckets[key]
@@ -0,0 +1,160 @@
+import csv
+import datetime
+import io
+import json
+import re
+
+# --------------------------------------------------------------------------------
+# 예약 일괄 등록 / 내보내기 (관리자용)
+# --------------------------------------------------------------------------------
+# 보건실 일정처럼 예약이 여러 건이면 사이드바에서 한 건씩 누르는 대신 CSV/JSON 파일로 한 번에 등록합니다.
+#   - 시간 정규식은 모듈을 불러올 때 한 번만 컴파일합니다. (validate_time_format도 같은 것을 씀)
+#   - 'HH:MM' 값은 하루에 1440가지뿐이므로, 서로 다른 값만 한 번씩 파싱하고 나머지는 dict 조회로 끝냅니다.
+#   - 검증이 끝난 행은 ReservationStore.bulk_reserve()로 락을 한 번만 잡고 넣습니다.
+#   - 내보내기는 층별 스냅샷을 층 하나씩 생성(generator)하므로 전체를 한 번에 문자열로 만들 필요가 없습니다.
+#
+# CSV 형식 (머리글 필수, 날짜는 생략 시 오늘 - 오늘 이미 지난 시각이면 내일):
+#   floor,name,time,date        또는      층,이름,시간,날짜
+#   3F,홍길동,08:50,2025-03-04
+# JSON 형식: [{"floor": "3F", "name": "홍길동", "time": "08:50", "date": "2025-03-04"}, ...]
+#           (또는 {"reservations": [...]})
+
+TIME_PATTERN = re.compile(r'^([01]\d|2[0-3]):([0-5]\d)$')
+
+EXPORT_FIELDS = ('floor', 'name', 'time', 'date')
+# 한국어 머리글도 받습니다.
+_FIELD_ALIASES = {'층': 'floor', '이름': 'name', '시간': 'time', '날짜': 'date'}
+
+
+def parse_time(text):
+    """'HH:MM' 문자열을 time으로 바꿉니다. 형식이 틀리면 None."""
+    match = TIME_PATTERN.match(text)
+    if not match:
+        return None
+    return datetime.time(int(match.group(1)), int(match.group(2)))
+
+
+def _parse_date(text):
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        return None
+
+
+def _memoized(parse):
+    """같은 값은 한 번만 변환하도록 dict 캐시를 씌웁니다. (일괄 검증/내보내기 한 번 동안만 사용)"""
+    cache = {}
+
+    def lookup(text):
+        try:
+            return cache[text]
+        except KeyError:
+            value = cache[text] = parse(text)
+            return value
+    return lookup
+
+
+def _format_time(time_obj):
+    return time_obj.strftime('%H:%M')
+
+
+def _records_from_csv(text):
+    reader = csv.DictReader(io.StringIO(text))
+    reader.fieldnames = [_FIELD_ALIASES.get(name.strip(), name.strip()) for name in reader.fieldnames or ()]
+    return reader
+
+
+def _records_from_json(text):
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get('reservations', [])
+    if not isinstance(data, list):
+        raise ValueError('JSON은 예약 목록이어야 합니다. ([...] 또는 {"reservations": [...]})')
+    # 객체가 아닌 항목은 그대로 넘겨서 parse_reservations가 그 행의 오류로 보고합니다.
+    return ({_FIELD_ALIASES.get(key, key): value for key, value in record.items()}
+            if isinstance(record, dict) else record
+            for record in data)
+
+
+def parse_reservations(data, fmt, floors, today=None):
+    """CSV/JSON 내용을 검증해서 (rows, errors)를 반환합니다.
+
+    rows: [(층, 이름, time, date), ...] - 그대로 bulk_reserve()에 넘기면 됩니다.
+          날짜가 비어 있는 행은 today(생략 시 None - 저장소가 오늘/내일을 정함)로 채웁니다.
+    errors: [(행 번호, 사유), ...] - 행 번호는 데이터의 첫 행이 1입니다.
+    파일 전체를 읽을 수 없으면(CSV/JSON 문법 오류, JSON이 목록이 아님) ValueError를 냅니다.
+    """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    if fmt == 'csv':
+        # csv.Error(따옴표가 안 닫힘, 칸 하나가 너무 김 등)는 행을 읽는 도중에 나므로 검증 전체를 감쌉니다.
+        try:
+            return _validate(_records_from_csv(data), floors, today)
+        except csv.Error as e:
+            raise ValueError(f"CSV 형식이 올바르지 않습니다: {e}") from e
+    if fmt == 'json':
+        return _validate(_records_from_json(data), floors, today)
+    raise ValueError(f"지원하지 않는 형식: {fmt}")
+
+
+def _validate(records, floors, today):
+    """레코드(dict)들을 검증해서 (rows, errors)를 반환합니다. (parse_reservations 참고)"""
+    known_floors = frozenset(floors)
+    to_time = _memoized(parse_time)
+    to_date = _memoized(_parse_date)
+    rows = []
+    errors = []
+    for line_no, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            errors.append((line_no, f"예약 항목은 객체여야 합니다: {record!r}"))
+            continue
+        wrong = [key for key in EXPORT_FIELDS if record.get(key) is not None and not isinstance(record[key], str)]
+        if wrong:
+            errors.append((line_no, f"{', '.join(wrong)} 값은 문자열이어야 합니다."))
+            continue
+        floor = (record.get('floor') or "").strip()
+        name = (record.get('name') or "").strip()
+        time_obj = to_time((record.get('time') or "").strip())
+        date_text = (record.get('date') or "").strip()
+        date_obj = to_date(date_text) if date_text else today
+        if floor not in known_floors:
+            errors.append((line_no, f"알 수 없는 층: {floor!r}"))
+        elif not name:
+            errors.append((line_no, "이름이 비어 있습니다."))
+        elif time_obj is None:
+            errors.append((line_no, f"시간 형식이 올바르지 않습니다: {record.get('time')!r} (예: 08:30)"))
+        elif date_text and date_obj is None:
+            errors.append((line_no, f"날짜 형식이 올바르지 않습니다: {date_text!r} (예: 2025-03-04)"))
+        else:
+            rows.append((floor, name, time_obj, date_obj))
+    return rows, errors
+
+
+def iter_export(store, floors, fmt='csv'):
+    """저장소의 현재 예약을 층 순서, 시간순으로 생성합니다. (층 하나당 조각 하나)"""
+    # 내보낼 때도 같은 시각/날짜는 한 번만 문자열로 바꿉니다.
+    to_text = _memoized(_format_time)
+    to_iso = _memoized(datetime.date.isoformat)
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        for floor in floors:
+            writer.writerows((floor, res['name'], to_text(res['time']), to_iso(res['date']))
+                             for res in store.snapshot(floor))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    elif fmt == 'json':
+        yield '{"reservations": ['
+        separator = ""
+        for floor in floors:
+            rows = [json.dumps({'floor': floor, 'name': res['name'], 'time': to_text(res['time']),
+                                'date': to_iso(res['date'])}, ensure_ascii=False)
+                    for res in store.snapshot(floor)]
+            if rows:
+                yield separator + ",\n".join(rows)
+                separator = ",\n"
+        yield ']}\n'
+    else:
+        raise ValueError(f"지원하지 않는 형식: {fmt}")
@@ -0,0 +1,184 @@
+import datetime
+import json
+import os
+import threading
+
+# --------------------------------------------------------------------------------
+# 예약 영속화 (append-only 로그 + 스냅샷)
+# --------------------------------------------------------------------------------
+# Streamlit 프로세스가 재시작되어도 예약이 사라지지 않도록 디스크에 기록합니다.
+#   - reservations.log  : 예약/취소 기록을 한 줄씩 덧붙이는 로그 (JSON lines)
+#   - snapshot.json     : 특정 시점(lsn)까지의 전체 예약 상태
+# 시작할 때는 스냅샷을 읽고, 스냅샷 이후의 로그 꼬리만 다시 적용합니다.
+#
+# 기록은 전용 writer 스레드가 모아서 한 번에 fsync 합니다 (group commit).
+# 쉬는 시간에 예약이 몰려도 예약 하나마다 디스크를 기다리지 않고,
+# fsync 한 번에 그동안 쌓인 예약을 모두 내보냅니다.
+
+LOG_FILE = "reservations.log"
+OLD_LOG_FILE = "reservations.log.old"
+SNAPSHOT_FILE = "snapshot.json"
+
+
+class ReservationLog:
+    """예약 저장소용 write-ahead 로그입니다. (group commit + 스냅샷)"""
+
+    def __init__(self, directory, checkpoint_every=5000):
+        self.directory = directory
+        self.checkpoint_every = checkpoint_every
+        self._log_path = os.path.join(directory, LOG_FILE)
+        self._old_path = os.path.join(directory, OLD_LOG_FILE)
+        self._snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()   # 로그 파일 쓰기/교체는 한 번에 하나만
+        self._pending = []                 # 아직 디스크에 쓰지 않은 로그 줄
+        self._last_lsn = 0                 # 마지막으로 발급한 일련번호
+        self._durable_lsn = 0              # 여기까지는 fsync 완료
+        self._since_checkpoint = 0
+        self._closed = False
+        self._file = None
+        self._writer = None
+
+    # --- 시작 시 복구 ---
+    def load(self):
+        """스냅샷과 로그 꼬리를 읽어 (층별 예약 목록, 로그 기록 목록)을 반환하고 기록을 시작합니다."""
+        os.makedirs(self.directory, exist_ok=True)
+
+        snapshot_lsn = 0
+        floors = {}
+        if os.path.exists(self._snapshot_path):
+            with open(self._snapshot_path, encoding='utf-8') as f:
+                data = json.load(f)
+            snapshot_lsn = data['lsn']
+            floors = {
+                floor: [(name, datetime.time.fromisoformat(t), datetime.date.fromisoformat(d))
+                        for name, t, d in rows]
+                for floor, rows in data['reservations'].items()
+            }
+
+        # 체크포인트 도중 종료된 경우 .old 로그가 남아 있을 수 있으므로 둘 다 읽고 lsn 순으로 정렬합니다.
+        records = []
+        for path in (self._old_path, self._log_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # 마지막 줄이 쓰다 만 상태로 끊긴 경우
+                    if record['lsn'] > snapshot_lsn:
+                        if record['op'] == 'reserve':
+                            record['time'] = datetime.time.fromisoformat(record['time'])
+                            record['date'] = datetime.date.fromisoformat(record['date'])
+                        elif record['op'] == 'bulk_reserve':
+                            record['rows'] = [(name, datetime.time.fromisoformat(t), datetime.date.fromisoformat(d))
+                                              for name, t, d in record['rows']]
+                        records.append(record)
+        records.sort(key=lambda r: r['lsn'])
+
+        self._last_lsn = self._durable_lsn = records[-1]['lsn'] if records else snapshot_lsn
+        self._since_checkpoint = sum(len(record.get('rows', ())) or 1 for record in records)
+        self._file = open(self._log_path, 'a', encoding='utf-8')
+        self._writer = threading.Thread(target=self._run, name="reservation-log-writer", daemon=True)
+        self._writer.start()
+        return floors, records
+
+    # --- 기록 ---
+    def append(self, record):
+        """기록을 대기열에 넣고 lsn을 반환합니다. 디스크 반영을 기다리려면 wait(lsn)을 호출합니다."""
+        with self._cond:
+            self._last_lsn += 1
+            record['lsn'] = self._last_lsn
+            self._pending.append(json.dumps(record, ensure_ascii=False) + "\n")
+            # 일괄 등록 기록은 행 수만큼 센다 (로그가 커지면 체크포인트가 일찍 돌도록)
+            self._since_checkpoint += len(record.get('rows', ())) or 1
+            self._cond.notify_all()
+            return self._last_lsn
+
+    def wait(self, lsn):
+        """lsn까지 fsync가 끝날 때까지 기다립니다."""
+        with self._cond:
+            while self._durable_lsn < lsn and not self._closed:
+                self._cond.wait()
+
+    def needs_checkpoint(self):
+        return self._since_checkpoint >= self.checkpoint_every
+
+    def _write_batch(self, batch):
+        self._file.write("".join(batch))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+            # 배치는 _io_lock을 잡은 뒤에 꺼냅니다. (꺼낸 뒤 쓰기 전에 rotate()가 끼어들면
+            # rotate가 더 나중 배치를 쓰고 durable을 올려서, 아직 안 쓴 이 배치의 wait()가 먼저 풀립니다)
+            # fsync 하는 동안 들어온 예약은 다음 배치에 함께 실립니다.
+            with self._io_lock:
+                with self._cond:
+                    batch, self._pending = self._pending, []
+                    batch_lsn = self._last_lsn
+                if not batch:
+                    continue   # 그 사이 rotate()가 가져가서 이미 썼음
+                self._write_batch(batch)
+            with self._cond:
+                self._durable_lsn = max(self._durable_lsn, batch_lsn)
+                self._cond.notify_all()
+
+    # --- 스냅샷 (체크포인트) ---
+    def rotate(self):
+        """지금까지의 로그를 .old로 돌리고 새 로그를 시작합니다. 스냅샷이 다룰 lsn을 반환합니다.
+
+        호출하는 쪽(ReservationStore.checkpoint)이 모든 층의 락을 잡고 있어야 합니다.
+        """
+        with self._cond:
+            batch, self._pending = self._pending, []
+            lsn = self._last_lsn
+            self._since_checkpoint = 0
+        with self._io_lock:
+            if batch:
+                self._write_batch(batch)
+            self._file.close()
+            os.replace(self._log_path, self._old_path)
+            self._file = open(self._log_path, 'a', encoding='utf-8')
+        with self._cond:
+            self._durable_lsn = max(self._durable_lsn, lsn)
+            self._cond.notify_all()
+        return lsn
+
+    def write_snapshot(self, floors, lsn):
+        """층별 예약 목록을 스냅샷 파일로 저장하고, 더 이상 필요 없는 .old 로그를 지웁니다."""
+        data = {
+            'lsn': lsn,
+            'reservations': {
+                floor: [(res['name'], res['time'].isoformat(), res['date'].isoformat())
+                        for res in reservations]
+                for floor, reservations in floors.items()
+            },
+        }
+        tmp_path = self._snapshot_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            # json.dump()는 파이썬 인코더로 조각조각 쓰므로, C 인코더(dumps)로 한 번에 만들어 씁니다.
+            f.write(json.dumps(data, ensure_ascii=False))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path)
+        if os.path.exists(self._old_path):
+            os.remove(self._old_path)
+
+    def close(self):
+        """남은 기록을 모두 내보내고 writer 스레드를 종료합니다."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._writer is not None:
+            self._writer.join()
+        if self._file is not None:
+            self._file.close()
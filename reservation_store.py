@@ -0,0 +1,524 @@
+import array
+import bisect
+import datetime
+import heapq
+import itertools
+import threading
+
+# --------------------------------------------------------------------------------
+# 공유 예약 저장소 (모든 세션이 함께 사용)
+# --------------------------------------------------------------------------------
+# Streamlit은 세션마다 별도의 스레드에서 스크립트를 실행합니다.
+# 그래서 공유 dict에 그냥 append / 재할당을 하면 동시에 누른 예약이 사라질 수 있습니다.
+# 층마다 락을 따로 두어(lock striping) 서로 다른 층의 예약은 동시에 처리되고,
+# 같은 층의 예약/취소는 하나씩 원자적으로 처리되도록 합니다.
+#
+# 각 층의 예약은 항상 (날짜, 시간)순으로 정렬된 상태로 보관합니다.
+# (화면을 그릴 때마다 모든 세션이 sorted()를 다시 돌리지 않도록)
+#   - 예약 추가: bisect로 위치를 찾아 삽입 (O(log n) 탐색)
+#   - 예약 취소: 사용자별 보조 인덱스로 그 사용자의 예약 k건만 찾아서 제거
+#   - 다음 예약 / 예약 수: O(1)
+#   - 지난 예약 만료: 정렬된 목록의 앞부분만 잘라내면 되므로 O(log n + 만료 건수)
+#
+# log(ReservationLog)를 넘기면 모든 예약/취소가 디스크에 기록되고,
+# 생성 시 스냅샷 + 로그 꼬리로 이전 상태를 복구합니다. (reservation_log.py 참고)
+#
+# 예약 수 제한 (capacity): 층마다 시간 칸(slot_minutes분)당 받을 수 있는 예약 수를 정합니다.
+#   - 층마다 {시간 칸: 예약 수} 카운터를 함께 관리하므로 확인은 O(1)
+#   - 가득 찼으면 같은 날 가장 가까운 빈 칸을 찾아 SlotFullError에 담아 알려줍니다.
+# limiter(TokenBucketLimiter)를 넘기면 사용자별로 예약/취소 요청 속도를 제한합니다.
+#
+# 층 번호(floors에서의 위치 = campus의 층 번호)마다 예약 수 / 버전을 정수 배열로도 들고 있어서,
+# 건물 하나의 층별 예약 수와 버전은 counts(start, stop) / versions(start, stop) 한 번으로 읽습니다.
+# bus(change_bus.ChangeBus)를 넘기면 바뀐 층을 'reservations' 주제로 게시합니다. (다른 세션이 바로 알 수 있도록)
+
+_MICROS_PER_DAY = 24 * 60 * 60 * 1_000_000
+# 가득 찬 칸에서 앞뒤로 몇 칸까지 빈 칸을 찾아볼지
+SUGGESTION_SEARCH_SLOTS = 120
+
+
+class ReservationRejected(Exception):
+    """예약 요청이 거절되었습니다."""
+
+
+class SlotFullError(ReservationRejected):
+    """요청한 층/시간 칸의 예약이 가득 찼습니다. suggestion은 가장 가까운 빈 시간(time, 없으면 None)입니다."""
+
+    def __init__(self, floor, time_obj, suggestion):
+        super().__init__(floor, time_obj, suggestion)
+        self.floor = floor
+        self.time = time_obj
+        self.suggestion = suggestion
+
+
+class PastSlotError(ReservationRejected):
+    """이미 지난 시각으로는 예약할 수 없습니다. (날짜를 직접 지정했을 때만 - 생략하면 내일로 넘어감)"""
+
+    def __init__(self, floor, time_obj, date_obj):
+        super().__init__(floor, time_obj, date_obj)
+        self.floor = floor
+        self.time = time_obj
+        self.date = date_obj
+
+
+class RateLimitedError(ReservationRejected):
+    """같은 사용자의 요청이 너무 많습니다."""
+
+    def __init__(self, user_name):
+        super().__init__(user_name)
+        self.user_name = user_name
+
+
+def reservation_date(time_obj, now=None):
+    """날짜 없이 받은 'HH:MM' 예약의 날짜입니다. 오늘 이미 지난 시각(분 단위)이면 내일.
+
+    (14시에 '08:30'을 예약하거나 23:58에 '00:03'을 예약하면 다음 날 아침 / 자정 직후로 봅니다)
+    """
+    now = now or datetime.datetime.now()
+    if time_obj < now.time().replace(second=0, microsecond=0):
+        return now.date() + datetime.timedelta(days=1)
+    return now.date()
+
+
+def _is_past(date_obj, time_obj, now):
+    return datetime.datetime.combine(date_obj, time_obj) < now.replace(second=0, microsecond=0)
+
+
+def _sort_key(date_obj, time_obj, seq=0):
+    """(날짜, 시간, 일련번호)를 정수 하나로 합친 정렬 키. 튜플보다 비교가 훨씬 빠릅니다."""
+    micros = ((time_obj.hour * 60 + time_obj.minute) * 60 + time_obj.second) * 1_000_000 + time_obj.microsecond
+    return ((date_obj.toordinal() * _MICROS_PER_DAY + micros) << 40) | seq
+
+
+class _FloorIndex:
+    """한 층의 시간순 예약 목록과 사용자별 보조 인덱스입니다. (락은 ReservationStore가 관리)"""
+
+    __slots__ = ('keys', 'items', 'by_user', 'cached', 'version', 'slot_micros', 'occupancy')
+
+    def __init__(self, slot_micros):
+        self.keys = []      # 정수 정렬 키 (items와 같은 순서, _sort_key 참고)
+        self.items = []     # 예약 dict - 시간순
+        self.by_user = {}   # 이름 -> 그 사용자의 정렬 키 목록
+        self.cached = ()    # 마지막으로 만든 읽기 전용 스냅샷 (None이면 다시 만들어야 함)
+        self.version = 0    # 내용이 바뀔 때마다 1씩 증가
+        self.slot_micros = slot_micros
+        self.occupancy = {} # 시간 칸 번호 -> 예약 수 (0이 되면 지움)
+
+    def slot_of(self, key):
+        """정렬 키가 속한 시간 칸 번호 (날짜까지 포함한 전체 칸 번호)"""
+        return (key >> 40) // self.slot_micros
+
+    def occupy(self, key, delta):
+        slot = self.slot_of(key)
+        count = self.occupancy.get(slot, 0) + delta
+        if count:
+            self.occupancy[slot] = count
+        else:
+            del self.occupancy[slot]
+
+    def append_sorted(self, key, reservation):
+        """이미 시간순으로 들어오는 예약을 맨 뒤에 붙입니다. (복구용 - bisect 생략)"""
+        self.keys.append(key)
+        self.items.append(reservation)
+        self.by_user.setdefault(reservation['name'], []).append(key)
+        self.occupy(key, 1)
+        self.cached = None
+        self.version += 1
+
+    def insert(self, key, reservation):
+        idx = bisect.bisect_right(self.keys, key)
+        self.keys.insert(idx, key)
+        self.items.insert(idx, reservation)
+        self.by_user.setdefault(reservation['name'], []).append(key)
+        self.occupy(key, 1)
+        self.cached = None
+        self.version += 1
+
+    def bulk_insert(self, pairs):
+        """(정렬 키, 예약) 목록을 한 번에 넣습니다. 새 목록만 정렬한 뒤 기존 목록과 병합합니다. (O(n + k log k))"""
+        pairs.sort(key=lambda pair: pair[0])
+        if not self.keys or pairs[0][0] > self.keys[-1]:
+            # 모두 기존 예약보다 늦으면 뒤에 붙이기만 하면 됩니다.
+            self.keys.extend(key for key, _ in pairs)
+            self.items.extend(reservation for _, reservation in pairs)
+        else:
+            merged = list(heapq.merge(zip(self.keys, self.items), pairs, key=lambda pair: pair[0]))
+            self.keys = [key for key, _ in merged]
+            self.items = [reservation for _, reservation in merged]
+        for key, reservation in pairs:
+            self.by_user.setdefault(reservation['name'], []).append(key)
+            self.occupy(key, 1)
+        self.cached = None
+        self.version += 1
+
+    def remove_user(self, user_name):
+        user_keys = self.by_user.pop(user_name, None)
+        if not user_keys:
+            return 0
+        for key in user_keys:
+            idx = bisect.bisect_left(self.keys, key)
+            del self.keys[idx]
+            del self.items[idx]
+            self.occupy(key, -1)
+        self.cached = None
+        self.version += 1
+        return len(user_keys)
+
+    def expire_before(self, key):
+        """key보다 앞선(지난) 예약을 모두 제거하고, 제거한 개수를 반환합니다."""
+        idx = bisect.bisect_left(self.keys, key)
+        if idx == 0:
+            return 0
+        for old_key, res in zip(self.keys[:idx], self.items[:idx]):
+            user_keys = self.by_user[res['name']]
+            user_keys.remove(old_key)
+            if not user_keys:
+                del self.by_user[res['name']]
+            self.occupy(old_key, -1)
+        del self.keys[:idx]
+        del self.items[:idx]
+        self.cached = None
+        self.version += 1
+        return idx
+
+    def snapshot(self):
+        if self.cached is None:
+            self.cached = tuple(self.items)
+        return self.cached
+
+
+class ReservationStore:
+    """층별 락으로 보호되고, 층마다 시간순으로 정렬된 예약 저장소입니다."""
+
+    def __init__(self, floors, log=None, capacity=None, slot_minutes=1, limiter=None, bus=None):
+        self.floors = tuple(floors)
+        self._floor_ids = {floor: i for i, floor in enumerate(self.floors)}
+        # 층 번호 순서의 예약 수 / 변경 버전 (층 락 안에서 인덱스를 바꿀 때마다 함께 갱신)
+        self._counts = array.array('q', [0]) * len(self.floors)
+        self._versions = array.array('q', [0]) * len(self.floors)
+        self._locks = {floor: threading.Lock() for floor in self.floors}
+        self.slot_minutes = slot_minutes
+        slot_micros = slot_minutes * 60 * 1_000_000
+        self._index = {floor: _FloorIndex(slot_micros) for floor in self.floors}
+        # 층별 시간 칸당 최대 예약 수 (int면 모든 층 같음, dict면 층별, None이면 제한 없음)
+        if isinstance(capacity, dict):
+            self._capacity = {floor: capacity.get(floor) for floor in self.floors}
+        else:
+            self._capacity = {floor: capacity for floor in self.floors}
+        self._limiter = limiter
+        # 같은 시간의 예약은 들어온 순서대로 정렬되도록 일련번호를 붙입니다.
+        self._seq = itertools.count()
+        # 만료 통계 (지금까지 만료된 예약 수)
+        self.expired_total = 0
+        self.expired_by_floor = {floor: 0 for floor in self.floors}
+        self._expiry_thread = None
+        self._expiry_stop = threading.Event()
+        # 변경 알림 (wait_for_change로 기다리는 쪽을 깨움)
+        self._changed = threading.Condition()
+        self._bus = bus
+        self._log = log
+        self._checkpoint_lock = threading.Lock()
+        if log is not None:
+            self._restore(*log.load())
+
+    def _restore(self, snapshot, records):
+        """스냅샷과 로그 기록을 메모리 인덱스에 다시 적용합니다. (다른 스레드가 쓰기 전, 생성자에서만 호출)"""
+        for floor, rows in snapshot.items():
+            if floor not in self._index:
+                continue
+            index = self._index[floor]
+            # 스냅샷은 이미 시간순이므로 bisect 없이 바로 채웁니다.
+            for name, time_obj, date_obj in rows:
+                index.append_sorted(_sort_key(date_obj, time_obj, next(self._seq)),
+                                    {'name': name, 'time': time_obj, 'date': date_obj})
+        for record in records:
+            index = self._index.get(record['floor'])
+            if index is None:
+                continue
+            if record['op'] == 'reserve':
+                index.insert(_sort_key(record['date'], record['time'], next(self._seq)),
+                             {'name': record['name'], 'time': record['time'], 'date': record['date']})
+            elif record['op'] == 'cancel':
+                index.remove_user(record['name'])
+            elif record['op'] == 'bulk_reserve':
+                index.bulk_insert([
+                    (_sort_key(date_obj, time_obj, next(self._seq)),
+                     {'name': name, 'time': time_obj, 'date': date_obj})
+                    for name, time_obj, date_obj in record['rows']
+                ])
+        for floor in self.floors:
+            self._sync(floor)
+        if records:
+            # 다음 시작이 빠르도록 복구한 상태를 바로 스냅샷으로 남깁니다.
+            self.checkpoint()
+
+    def _sync(self, floor):
+        """floor의 예약 수 / 버전 배열 칸을 인덱스와 맞춥니다. (층 락을 잡은 상태에서 호출)"""
+        index = self._index[floor]
+        i = self._floor_ids[floor]
+        self._counts[i] = len(index.items)
+        self._versions[i] = index.version
+
+    def _notify_change(self, floors):
+        with self._changed:
+            self._changed.notify_all()
+        if self._bus is not None:
+            self._bus.publish('reservations', floors)
+
+    def _append_log(self, record):
+        return self._log.append(record) if self._log is not None else 0
+
+    def _wait_log(self, lsn):
+        if lsn:
+            self._log.wait(lsn)
+            if self._log.needs_checkpoint():
+                self.checkpoint()
+
+    def _check_rate(self, user_name):
+        if self._limiter is not None and not self._limiter.allow(user_name):
+            raise RateLimitedError(user_name)
+
+    def _nearest_free(self, floor, slot, capacity, date_obj):
+        """slot과 같은 날에서 가장 가까운 빈 칸의 시각(time)을 찾습니다. 지난 시각은 제외. (층 락을 잡은 상태에서 호출)"""
+        index = self._index[floor]
+        slots_per_day = _MICROS_PER_DAY // index.slot_micros
+        first = date_obj.toordinal() * slots_per_day
+        last = first + slots_per_day - 1
+        now = datetime.datetime.now()
+        if date_obj == now.date():
+            first = max(first, index.slot_of(_sort_key(now.date(), now.time())) + 1)
+        for distance in range(1, SUGGESTION_SEARCH_SLOTS + 1):
+            for candidate in (slot + distance, slot - distance):  # 같은 거리면 늦은 쪽 먼저
+                if first <= candidate <= last and index.occupancy.get(candidate, 0) < capacity:
+                    micros = (candidate - date_obj.toordinal() * slots_per_day) * index.slot_micros
+                    return (datetime.datetime.min + datetime.timedelta(microseconds=micros)).time()
+        return None
+
+    def capacity(self, floor):
+        """floor의 시간 칸당 최대 예약 수를 반환합니다. (None이면 제한 없음)"""
+        return self._capacity[floor]
+
+    def occupancy(self, floor, time_obj, date_obj=None):
+        """floor에서 time_obj가 속한 시간 칸의 현재 예약 수를 반환합니다. (O(1))"""
+        index = self._index[floor]
+        slot = index.slot_of(_sort_key(date_obj or reservation_date(time_obj), time_obj))
+        return index.occupancy.get(slot, 0)
+
+    def reserve(self, floor, time_obj, user_name, date_obj=None):
+        """floor에 user_name의 예약을 추가하고, 추가된 예약을 반환합니다.
+
+        날짜를 생략하면 오늘, 오늘 이미 지난 시각이면 내일입니다. (reservation_date)
+        지정한 날짜/시각이 이미 지났으면 PastSlotError, 시간 칸이 가득 찼으면 SlotFullError,
+        요청이 너무 잦으면 RateLimitedError를 냅니다.
+        """
+        self._check_rate(user_name)
+        now = datetime.datetime.now()
+        if date_obj is None:
+            date_obj = reservation_date(time_obj, now)
+        elif _is_past(date_obj, time_obj, now):
+            raise PastSlotError(floor, time_obj, date_obj)
+        new_reservation = {'name': user_name, 'time': time_obj, 'date': date_obj}
+        capacity = self._capacity[floor]
+        with self._locks[floor]:
+            index = self._index[floor]
+            key = _sort_key(date_obj, time_obj, next(self._seq))
+            if capacity is not None:
+                slot = index.slot_of(key)
+                # 확인과 추가를 같은 락 안에서 하므로 동시에 눌러도 정원을 넘지 않습니다.
+                if index.occupancy.get(slot, 0) >= capacity:
+                    raise SlotFullError(floor, time_obj, self._nearest_free(floor, slot, capacity, date_obj))
+            index.insert(key, new_reservation)
+            self._sync(floor)
+            lsn = self._append_log({'op': 'reserve', 'floor': floor, 'name': user_name,
+                                    'time': time_obj.isoformat(), 'date': date_obj.isoformat()})
+        self._notify_change((floor,))
+        # fsync는 락 밖에서 기다립니다. (그동안 다른 예약도 같은 배치에 실릴 수 있도록)
+        self._wait_log(lsn)
+        return new_reservation
+
+    def bulk_reserve(self, rows, enforce_capacity=True):
+        """(층, 이름, time, date) 목록을 한 번에 추가합니다. (관리자 일괄 등록용 - 요청 속도 제한 없음)
+
+        모든 층의 락을 한 번만 잡고 넣으며, 로그에는 층마다 기록 한 줄만 남깁니다.
+        date가 None이면 reserve()처럼 오늘(지난 시각이면 내일)이고, 이미 지난 날짜/시각은 거절합니다.
+        {'added': 추가한 수, 'rejected': [(rows 안의 위치, 사유), ...]}를 반환합니다.
+        """
+        by_floor = {}
+        rejected = []
+        now = datetime.datetime.now()
+        for position, (floor, name, time_obj, date_obj) in enumerate(rows):
+            if floor not in self._index:
+                rejected.append((position, f"알 수 없는 층: {floor}"))
+                continue
+            if date_obj is None:
+                date_obj = reservation_date(time_obj, now)
+            elif _is_past(date_obj, time_obj, now):
+                rejected.append((position, f"{date_obj.isoformat()} {time_obj.strftime('%H:%M')}은(는) 이미 지난 시간입니다."))
+                continue
+            by_floor.setdefault(floor, []).append((position, name, time_obj, date_obj))
+
+        added = 0
+        changed = []
+        lsn = 0
+        # checkpoint()와 같은 순서로 모든 층의 락을 잡습니다. (교착 방지)
+        for floor in self.floors:
+            self._locks[floor].acquire()
+        try:
+            for floor, floor_rows in by_floor.items():
+                index = self._index[floor]
+                capacity = self._capacity[floor] if enforce_capacity else None
+                taken = {}   # 이번에 추가하는 예약의 시간 칸별 수
+                pairs = []
+                for position, name, time_obj, date_obj in floor_rows:
+                    key = _sort_key(date_obj, time_obj, next(self._seq))
+                    if capacity is not None:
+                        slot = index.slot_of(key)
+                        if index.occupancy.get(slot, 0) + taken.get(slot, 0) >= capacity:
+                            rejected.append((position, f"{floor} {time_obj.strftime('%H:%M')} 정원 초과"))
+                            continue
+                        taken[slot] = taken.get(slot, 0) + 1
+                    pairs.append((key, {'name': name, 'time': time_obj, 'date': date_obj}))
+                if not pairs:
+                    continue
+                index.bulk_insert(pairs)
+                self._sync(floor)
+                changed.append(floor)
+                added += len(pairs)
+                lsn = self._append_log({
+                    'op': 'bulk_reserve', 'floor': floor,
+                    'rows': [(res['name'], res['time'].isoformat(), res['date'].isoformat()) for _, res in pairs],
+                })
+        finally:
+            for floor in reversed(self.floors):
+                self._locks[floor].release()
+        if added:
+            self._notify_change(changed)
+        self._wait_log(lsn)
+        rejected.sort()
+        return {'added': added, 'rejected': rejected}
+
+    def cancel(self, floor, user_name):
+        """floor에서 user_name의 예약을 모두 제거하고, 제거한 개수를 반환합니다."""
+        self._check_rate(user_name)
+        lsn = 0
+        with self._locks[floor]:
+            removed = self._index[floor].remove_user(user_name)
+            if removed:
+                self._sync(floor)
+                lsn = self._append_log({'op': 'cancel', 'floor': floor, 'name': user_name})
+        if removed:
+            self._notify_change((floor,))
+        self._wait_log(lsn)
+        return removed
+
+    def count(self, floor):
+        """floor의 예약 개수를 반환합니다."""
+        return len(self._index[floor].items)
+
+    def version(self, floor=None):
+        """floor(생략 시 전체)의 변경 버전을 반환합니다. 값이 같으면 내용도 바뀌지 않은 것입니다."""
+        if floor is not None:
+            return self._index[floor].version
+        return sum(index.version for index in self._index.values())
+
+    def counts(self, start=0, stop=None):
+        """층 번호 [start, stop) 구간의 층별 예약 수 배열을 반환합니다. (건물 하나 = 배열 한 번 자르기)"""
+        return self._counts[start:stop]
+
+    def versions(self, start=0, stop=None):
+        """층 번호 [start, stop) 구간의 층별 변경 버전 배열을 반환합니다."""
+        return self._versions[start:stop]
+
+    def wait_for_change(self, since_version, timeout=None):
+        """전체 버전이 since_version과 달라질 때까지(최대 timeout초) 기다린 뒤 현재 버전을 반환합니다."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version() != since_version, timeout)
+        return self.version()
+
+    def next_reservation(self, floor):
+        """floor에서 가장 이른 예약을 반환합니다. 예약이 없으면 None."""
+        with self._locks[floor]:
+            items = self._index[floor].items
+            return items[0] if items else None
+
+    def snapshot(self, floor):
+        """floor의 예약 목록을 시간순으로 정렬된 읽기 전용(tuple) 복사본으로 반환합니다."""
+        with self._locks[floor]:
+            return self._index[floor].snapshot()
+
+    def versioned_snapshot(self, floor):
+        """floor의 (버전, 예약 목록)을 한 번에 읽습니다. 둘이 항상 같은 시점을 가리킵니다."""
+        with self._locks[floor]:
+            index = self._index[floor]
+            return index.version, index.snapshot()
+
+    def snapshot_all(self):
+        """모든 층의 예약 목록을 {층: tuple} 형태로 반환합니다."""
+        return {floor: self.snapshot(floor) for floor in self.floors}
+
+    # --- 지난 예약 만료 ---
+    def expire(self, now=None):
+        """now 이전 시각의 예약을 모든 층에서 제거하고, 제거한 개수를 반환합니다."""
+        now = now or datetime.datetime.now()
+        cutoff = _sort_key(now.date(), now.time())
+        removed_total = 0
+        changed = []
+        for floor in self.floors:
+            with self._locks[floor]:
+                removed = self._index[floor].expire_before(cutoff)
+                if removed:
+                    self._sync(floor)
+                    changed.append(floor)
+                self.expired_by_floor[floor] += removed
+            removed_total += removed
+        self.expired_total += removed_total
+        if removed_total:
+            self._notify_change(changed)
+            # 로그에는 만료 기록을 따로 남기지 않고, 스냅샷을 새로 찍어 로그를 압축합니다.
+            self.checkpoint()
+        return removed_total
+
+    def start_expiry(self, interval_seconds=30, grace=datetime.timedelta(0)):
+        """interval_seconds마다 (지금 - grace) 이전 예약을 만료시키는 백그라운드 스레드를 시작합니다."""
+        if self._expiry_thread is not None:
+            return
+
+        def run():
+            while not self._expiry_stop.wait(interval_seconds):
+                self.expire(datetime.datetime.now() - grace)
+
+        self.expire(datetime.datetime.now() - grace)
+        self._expiry_thread = threading.Thread(target=run, name="reservation-expiry", daemon=True)
+        self._expiry_thread.start()
+
+    def stop_expiry(self):
+        self._expiry_stop.set()
+
+    def stats(self):
+        """현재 예약 수와 만료 통계를 반환합니다."""
+        return {
+            'active': {floor: self.count(floor) for floor in self.floors},
+            'expired_total': self.expired_total,
+            'expired_by_floor': dict(self.expired_by_floor),
+        }
+
+    def checkpoint(self):
+        """현재 상태를 스냅샷으로 저장하고 로그를 비웁니다. (로그가 없으면 아무것도 하지 않음)"""
+        if self._log is None:
+            return
+        # 이미 다른 스레드가 체크포인트 중이면 건너뜁니다. (.old 로그를 덮어쓰지 않도록)
+        if not self._checkpoint_lock.acquire(blocking=False):
+            return
+        try:
+            # 모든 층의 락을 항상 같은 순서로 잡아 일관된 시점의 상태를 얻습니다.
+            for floor in self.floors:
+                self._locks[floor].acquire()
+            try:
+                lsn = self._log.rotate()
+                floors = {floor: self._index[floor].snapshot() for floor in self.floors}
+            finally:
+                for floor in reversed(self.floors):
+                    self._locks[floor].release()
+            self._log.write_snapshot(floors, lsn)
+        finally:
+            self._checkpoint_lock.release()
@@ -0,0 +1,244 @@
+"""공유 상태 백엔드
+
+사용법 (여러 Streamlit 프로세스가 같은 상태를 쓰는 경우):
+    python state_backend.py serve --port 50000           # 상태 서버 1개 실행
+    STATE_BACKEND=manager://127.0.0.1:50000 streamlit run 탈래말래.py   # 각 레플리카
+
+다른 컴퓨터의 레플리카가 접속하려면 (--host가 127.0.0.1이 아니면) 서버와 레플리카에 같은 STATE_AUTHKEY를 지정해야 합니다.
+    STATE_AUTHKEY=<긴 임의 문자열> python state_backend.py serve --host 0.0.0.0 --port 50000
+"""
+import argparse
+import datetime
+import ipaddress
+import os
+import secrets
+import socket
+from multiprocessing.managers import BaseManager
+
+from alert_scheduler import AlertScheduler
+from cashwalk_ledger import CashwalkLedger
+from camera_ingest import CameraIngestPipeline, sources_from_directory
+from campus import BANKS, FLOORS
+from change_bus import ChangeBus
+from congestion_feed import CongestionFeed, FileCongestionSource, RandomCongestionSource
+from congestion_forecast import CongestionForecast
+from congestion_history import CongestionHistory
+from profile_store import ProfileStore
+from rate_limiter import TokenBucketLimiter
+from reservation_log import ReservationLog
+from reservation_store import ReservationStore
+
+# --------------------------------------------------------------------------------
+# 공유 상태 백엔드 (단일 프로세스 / 여러 프로세스)
+# --------------------------------------------------------------------------------
+# @st.cache_resource는 한 파이썬 프로세스 안에서만 공유됩니다.
+# 아침 피크 때 Streamlit 레플리카를 여러 개 띄우면 레플리카마다 예약이 달라지므로,
+# 예약 저장소와 혼잡도 피드를 별도의 상태 서버 프로세스 하나에 두고
+# 각 레플리카는 multiprocessing.Manager 프록시로 접속합니다.
+# (정기 알림 스케줄러, 사용자 프로필, 캐시워크 장부도 같은 방식으로 공유합니다.)
+#   - InProcessBackend : 지금까지처럼 프로세스 안에서 직접 생성 (기본값)
+#   - ManagerBackend   : 상태 서버(serve)에 접속. 서버는 연결마다 따로 스레드를 두고 호출을 실행하므로,
+#                        동시에 들어온 호출의 원자성은 각 객체가 스스로 보장합니다. (예약 저장소의 층별 락,
+#                        장부/스케줄러의 락 등 - 프로세스 안에서 여러 세션이 쓸 때와 같음)
+#                        wait_for_change()로 변경 알림을 받을 수 있습니다.
+#
+# 상태 서버는 접속한 쪽이 보낸 pickle을 그대로 풀기 때문에, 비밀번호(authkey)를 아는 쪽은 서버에서 코드를 실행할 수 있습니다.
+#   - STATE_AUTHKEY 환경변수로 비밀번호를 지정합니다. (기본값 없음)
+#   - 지정하지 않으면 127.0.0.1 같은 루프백 주소에서만 서버를 띄우고, 임의의 비밀번호를 만들어
+#     DATA_DIR/state_authkey 파일(소유자만 읽기)에 적어 둡니다. 같은 컴퓨터의 레플리카는 이 파일을 읽어 접속합니다.
+#   - 루프백이 아닌 주소(--host 0.0.0.0 등)는 STATE_AUTHKEY를 지정하지 않으면 서버를 띄우지 않습니다.
+# 예약 / 혼잡도 / 알림이 바뀌면 변경 알림 버스(change_bus.py)에 게시하고, 세션은 버스의 버전만 확인합니다.
+
+# 예약 로그/스냅샷을 저장할 폴더 (앱 재시작 후에도 예약 유지, DATA_DIR 환경변수로 변경 가능)
+DATA_DIR = os.environ.get("DATA_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+# 예약 시간이 지나고 이만큼 더 지나면 예약을 자동으로 지웁니다. (엘리베이터 탑승 여유 시간)
+RESERVATION_GRACE_MINUTES = 5
+# 층마다 1분 칸당 받을 수 있는 긴급 예약 수 (0이면 제한 없음)
+SLOT_CAPACITY = int(os.environ.get("SLOT_CAPACITY", "3"))
+# 사용자당 예약/취소 요청 속도 제한: 분당 RESERVE_RATE_PER_MINUTE개, 한 번에 최대 RESERVE_BURST개 (0이면 제한 없음)
+RESERVE_RATE_PER_MINUTE = int(os.environ.get("RESERVE_RATE_PER_MINUTE", "20"))
+RESERVE_BURST = int(os.environ.get("RESERVE_BURST", "5"))
+# 카메라 대체 파일 경로 (환경변수로 지정하면 랜덤 시뮬레이션 대신 이 파일을 읽습니다)
+CAMERA_FEED_FILE = os.environ.get("CAMERA_FEED_FILE")
+# 카메라 인원 수 기록 폴더 (지정하면 asyncio 수집 파이프라인이 층/엘리베이터별 '<이름>.csv'를 재생 - camera_ingest.py)
+CAMERA_DIR = os.environ.get("CAMERA_DIR")
+# 상태 서버 접속 비밀번호 (서버와 레플리카가 같아야 함 - 기본값 없음, 위 설명 참고)
+STATE_AUTHKEY = os.environ.get("STATE_AUTHKEY", "").encode() or None
+STATE_AUTHKEY_FILE = "state_authkey"
+
+
+def load_authkey(data_dir=DATA_DIR):
+    """STATE_AUTHKEY, 없으면 data_dir의 자동 생성 비밀번호 파일을 반환합니다. 둘 다 없으면 None."""
+    if STATE_AUTHKEY:
+        return STATE_AUTHKEY
+    try:
+        with open(os.path.join(data_dir, STATE_AUTHKEY_FILE), 'rb') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _create_authkey(data_dir):
+    """임의의 비밀번호를 만들어 data_dir에 소유자만 읽을 수 있는 파일로 저장하고 반환합니다."""
+    os.makedirs(data_dir, exist_ok=True)
+    authkey = secrets.token_hex(32).encode()
+    path = os.path.join(data_dir, STATE_AUTHKEY_FILE)
+    tmp_path = path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(authkey)
+    os.replace(tmp_path, path)
+    return authkey
+
+
+def is_loopback(host):
+    """host가 이 컴퓨터 안에서만 접속할 수 있는 주소(127.0.0.1, ::1, localhost)인지 확인합니다."""
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+class InProcessBackend:
+    """예약 저장소와 혼잡도 피드를 현재 프로세스 안에 만듭니다."""
+
+    def __init__(self, floors=FLOORS, data_dir=DATA_DIR, camera_file=CAMERA_FEED_FILE,
+                 slot_capacity=SLOT_CAPACITY, rate_per_minute=RESERVE_RATE_PER_MINUTE, banks=BANKS,
+                 camera_dir=CAMERA_DIR):
+        # 예약 / 혼잡도 / 알림 변경을 게시하는 버스 (세션은 버전 하나로 바뀐 것이 있는지 확인)
+        self.bus = ChangeBus(floors)
+        # 층별 락을 가진 예약 저장소 (동시 예약/취소 시 데이터 유실 방지)
+        # 시작 시 data_dir의 스냅샷 + 로그로 이전 예약을 복구합니다.
+        # 1분 칸당 예약 수와 사용자별 요청 속도를 제한합니다. (수요가 몰릴 때도 긴급 예약이 의미 있도록)
+        self.reservations = ReservationStore(
+            floors,
+            log=ReservationLog(os.path.join(data_dir, "reservations")),
+            capacity=slot_capacity or None,
+            limiter=TokenBucketLimiter(rate_per_minute, RESERVE_BURST) if rate_per_minute else None,
+            bus=self.bus,
+        )
+        # 지난 예약은 백그라운드 스레드가 30초마다 정리합니다. (메모리가 계속 늘지 않도록)
+        self.reservations.start_expiry(
+            interval_seconds=30, grace=datetime.timedelta(minutes=RESERVATION_GRACE_MINUTES)
+        )
+        # 혼잡도는 백그라운드 스레드 하나가 읽어서 모든 세션에 같은 스냅샷을 게시합니다.
+        # (접속자가 1명이든 1000명이든 카메라 조회 횟수는 같음)
+        # 카메라 폴더가 있으면 수집 파이프라인이 혼잡도가 바뀔 때마다 바로 게시합니다. (1초에 여러 번까지)
+        self.cameras = None
+        if camera_dir:
+            cameras = sources_from_directory(camera_dir, tuple(banks) + tuple(floors))
+            self.cameras = CameraIngestPipeline(banks, floors, cameras)
+            source = self.cameras
+        elif camera_file:
+            source = FileCongestionSource(camera_file)
+        else:
+            source = RandomCongestionSource()
+        # 읽은 혼잡도는 시계열로도 남깁니다. (원본 1시간 / 1분 단위 7일 / 15분 단위 1년, 5분마다 파일 저장)
+        self.history = CongestionHistory(floors, path=os.path.join(data_dir, "congestion_history.bin"), banks=banks)
+        # 요일 x 5분 칸 예상 혼잡도 표 (시작할 때 기록 전체로 계산, 이후 새 샘플마다 해당 칸만 갱신)
+        self.forecast = CongestionForecast(floors, banks=banks)
+        self.forecast.load_history(self.history)
+        self.congestion = CongestionFeed(floors, source=source, interval_seconds=10,
+                                         history=self.history, forecast=self.forecast, banks=banks,
+                                         bus=self.bus)
+        self.congestion.start()
+        if self.cameras is not None:
+            self.cameras.start(on_change=lambda: self.congestion.refresh(record=False))
+        # 학번별 프로필 (알림 설정, 걸음 수/캐시) - 로그아웃/재시작 후에도 유지
+        self.profiles = ProfileStore(os.path.join(data_dir, "profiles.sqlite3"))
+        # 모든 사용자의 정기 알림을 스레드 하나가 울립니다. (세션 수와 무관)
+        # 시작할 때 프로필에 저장된 알림을 모두 다시 등록합니다.
+        self.alerts = AlertScheduler(bus=self.bus)
+        for user_id, floor, time_str in self.profiles.alerts():
+            self.alerts.register(user_id, floor, datetime.time.fromisoformat(time_str))
+        self.alerts.start()
+        # 캐시워크 걸음 수/캐시 장부 (모든 세션 공유, 변경은 1초마다 모아서 저장)
+        self.cashwalk = CashwalkLedger(self.profiles, flush_interval=1.0)
+        self.cashwalk.start()
+
+
+class _StateManager(BaseManager):
+    pass
+
+
+class ManagerBackend:
+    """상태 서버(serve)에 접속해서 예약 저장소 / 혼잡도 피드 프록시를 얻습니다."""
+
+    def __init__(self, address, authkey=None):
+        authkey = authkey or load_authkey()
+        if authkey is None:
+            raise RuntimeError("상태 서버 비밀번호가 없습니다. 서버와 같은 STATE_AUTHKEY를 지정하세요.")
+        _StateManager.register('reservations')
+        _StateManager.register('congestion')
+        _StateManager.register('alerts')
+        _StateManager.register('profiles')
+        _StateManager.register('cashwalk')
+        _StateManager.register('history')
+        _StateManager.register('forecast')
+        _StateManager.register('bus')
+        manager = _StateManager(address=address, authkey=authkey)
+        manager.connect()
+        self._manager = manager
+        self.reservations = manager.reservations()
+        self.congestion = manager.congestion()
+        self.alerts = manager.alerts()
+        self.profiles = manager.profiles()
+        self.cashwalk = manager.cashwalk()
+        self.history = manager.history()
+        self.forecast = manager.forecast()
+        self.bus = manager.bus()
+
+
+def create_backend(url=None):
+    """url에 맞는 백엔드를 만듭니다. 없으면 STATE_BACKEND 환경변수, 그것도 없으면 프로세스 내부 백엔드."""
+    url = url or os.environ.get("STATE_BACKEND", "inprocess")
+    if url == "inprocess":
+        return InProcessBackend()
+    if url.startswith("manager://"):
+        host, _, port = url[len("manager://"):].rpartition(":")
+        return ManagerBackend((host or "127.0.0.1", int(port)))
+    raise ValueError(f"알 수 없는 STATE_BACKEND: {url}")
+
+
+def serve(host="127.0.0.1", port=50000, authkey=None, data_dir=DATA_DIR,
+          slot_capacity=SLOT_CAPACITY, rate_per_minute=RESERVE_RATE_PER_MINUTE):
+    """상태 서버를 실행합니다. (이 프로세스가 예약 저장소와 혼잡도 피드의 유일한 주인)
+
+    authkey가 없으면 STATE_AUTHKEY를 쓰고, 그것도 없으면 루프백 주소에서만 임의의 비밀번호를 만들어 씁니다.
+    """
+    authkey = authkey or STATE_AUTHKEY
+    if authkey is None:
+        if not is_loopback(host):
+            raise SystemExit(f"[state] {host}는 다른 컴퓨터에서 접속할 수 있는 주소입니다. "
+                             "STATE_AUTHKEY 환경변수로 비밀번호를 지정해야 서버를 띄울 수 있습니다.")
+        authkey = _create_authkey(data_dir)
+        print(f"[state] 비밀번호를 만들었습니다: {os.path.join(data_dir, STATE_AUTHKEY_FILE)}")
+    backend = InProcessBackend(data_dir=data_dir, slot_capacity=slot_capacity, rate_per_minute=rate_per_minute)
+    _StateManager.register('reservations', callable=lambda: backend.reservations)
+    _StateManager.register('congestion', callable=lambda: backend.congestion)
+    _StateManager.register('alerts', callable=lambda: backend.alerts)
+    _StateManager.register('profiles', callable=lambda: backend.profiles)
+    _StateManager.register('cashwalk', callable=lambda: backend.cashwalk)
+    _StateManager.register('history', callable=lambda: backend.history)
+    _StateManager.register('forecast', callable=lambda: backend.forecast)
+    _StateManager.register('bus', callable=lambda: backend.bus)
+    manager = _StateManager(address=(host, port), authkey=authkey)
+    server = manager.get_server()
+    print(f"[state] 상태 서버 실행 중: manager://{host}:{port}")
+    server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="탈래말래 공유 상태 서버")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_cmd = sub.add_parser("serve", help="상태 서버 실행")
+    serve_cmd.add_argument("--host", default="127.0.0.1")
+    serve_cmd.add_argument("--port", type=int, default=50000)
+    serve_cmd.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        serve(args.host, args.port, data_dir=args.data_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import re
+
+# --------------------------------------------------------------------------------
+# 전역 디자인 (하얀 배경, 짙은 파란색 포인트)
+# --------------------------------------------------------------------------------
+# CSS는 프로세스당 한 번만 만들어 두고(GLOBAL_CSS), 매 실행마다 그대로 재사용합니다.
+#   - 주석과 공백을 제거한(minify) 문자열을 미리 계산해 둠
+#   - Google Fonts @import 대신 static/fonts/의 로컬 폰트를 사용 (외부 네트워크 요청 없음)
+#     .streamlit/config.toml에서 enableStaticServing을 켜야 app/static/ 경로가 제공됩니다.
+#     번들 폰트는 Noto Sans CJK Regular에서 영문/문장부호/자주 쓰는 한글 2,350자(KS X 1001)만 남긴 것입니다.
+#     (OFL - static/fonts/OFL.txt, 약 240KB) 굵은 글씨는 브라우저가 이 글꼴을 굵게 만들어 씁니다.
+#     드문 글자는 시스템 글꼴로 대신 표시됩니다. Noto Sans KR이 설치되어 있으면 그것을 먼저 씁니다.
+
+# 1. 색상 팔레트 정의 (수정)
+PRIMARY_COLOR = "#0D47A1"  # 짙은 파란색 (포인트)
+BACKGROUND_COLOR = "#F4F6F8" # 하얀색 계열 배경
+SECONDARY_COLOR = "#FFFFFF" # 뉴모피즘 컴포넌트 배경
+ACCENT_COLOR = "#42A5F5"   # 밝은 파란색 (보조)
+
+
+# 2. 전역 CSS 스타일 (하얀 배경 뉴모피즘) - 원본 (읽기 쉬운 형태)
+GLOBAL_CSS_SOURCE = f"""
+    <style>
+    /* Noto Sans KR 폰트 (로컬 번들 - 외부 네트워크 요청 없음, 굵기는 하나만 두고 굵은 글씨는 합성) */
+    @font-face {{
+        font-family: 'Noto Sans KR';
+        font-weight: 400;
+        font-display: swap;
+        src: local('Noto Sans KR'), local('NotoSansKR-Regular'), local('Noto Sans CJK KR'),
+             url('app/static/fonts/NotoSansCJK-Regular-KR-subset.woff2') format('woff2');
+    }}
+
+    /* CSS 변수 정의 */
+    :root {{
+        --primary-color: {PRIMARY_COLOR};
+        --background-color: {BACKGROUND_COLOR};
+        --secondary-color: {SECONDARY_COLOR};
+        --accent-color: {ACCENT_COLOR};
+        --light-shadow: rgba(255, 255, 255, 0.8); /* 밝은 그림자 */
+        --dark-shadow: rgba(174, 174, 192, 0.4);  /* 어두운 그림자 */
+        --font-family: 'Noto Sans KR', sans-serif; /* 폰트 적용 */
+    }}
+
+    /* 전체 배경색 및 폰트 */
+    .stApp {{
+        background-color: var(--background-color);
+        color: #333333;
+        font-family: var(--font-family);
+    }}
+
+    /* 사이드바 배경색 */
+    .stSidebar {{
+        background-color: var(--background-color);
+        border-right: 1px solid #E0E0E0;
+    }}
+    .stSidebar .st-emotion-cache-1jicfl2 {{
+         background-color: var(--background-color);
+    }}
+
+    /* 버튼 기본 스타일 (뉴모피즘) */
+    .stButton > button {{
+        background-color: var(--secondary-color);
+        color: #333333;
+        border: none;
+        border-radius: 12px;
+        box-shadow: 6px 6px 12px var(--dark-shadow), -6px -6px 12px var(--light-shadow);
+        transition: all 0.2s ease-in-out;
+        padding: 10px 20px;
+        font-weight: 600;
+        font-family: var(--font-family);
+    }}
+    .stButton > button:hover {{
+        box-shadow: 2px 2px 4px var(--dark-shadow), -2px -2px 4px var(--light-shadow);
+        transform: scale(0.98);
+    }}
+    .stButton > button:active {{
+        box-shadow: inset 2px 2px 4px var(--dark-shadow), inset -2px -2px 4px var(--light-shadow);
+    }}
+
+    /* 짙은 파란색 버튼 (포인트) - type="primary" */
+    .stButton > button[kind="primary"] {{
+        background-color: var(--primary-color);
+        color: white;
+        box-shadow: 6px 6px 12px var(--dark-shadow), -6px -6px 12px var(--light-shadow);
+    }}
+    .stButton > button[kind="primary"]:hover {{
+        background-color: #0B3A80; /* 호버 시 조금 더 어둡게 */
+        box-shadow: 2px 2px 4px var(--dark-shadow), -2px -2px 4px var(--light-shadow);
+    }}
+    .stButton > button[kind="primary"]:active {{
+        box-shadow: inset 2px 2px 4px var(--dark-shadow), inset -2px -2px 4px var(--light-shadow);
+    }}
+
+    /* 텍스트 입력 필드 */
+    .stTextInput > div > div > input,
+    .stNumberInput > div > div > input {{
+        background-color: var(--secondary-color);
+        border: none;
+        border-radius: 12px;
+        box-shadow: inset 2px 2px 5px var(--dark-shadow), inset -5px -5px 10px var(--light-shadow);
+        padding: 10px;
+        color: #333333;
+        font-family: var(--font-family);
+    }}
+
+/* <<< 2. 수정된 부분: Selectbox 스타일 (안정적인 '볼록한' 스타일로 변경) >>> */
+    /*
+        [수정 이유]
+        st.selectbox의 'inset(오목한)' 그림자는 Streamlit의 복잡한
+        내부 구조와 충돌하여 텍스트를 가리는 고질적인 문제가 있습니다.
+        가장 안정적인 해결책은 '볼록한(convex)' 스타일로 변경하는 것입니다.
+    */
+    .stSelectbox > div > div {{
+        background-color: var(--secondary-color); /* 버튼과 동일한 배경 */
+        color: #333333; /* 텍스트 색상 */
+        border: none;
+        border-radius: 12px;
+        
+        /* (핵심) 'inset' 대신 '볼록한' 그림자로 변경 (st.button과 유사) */
+        box-shadow: 6px 6px 12px var(--dark-shadow), -6px -6px 12px var(--light-shadow);
+        
+        padding: 10px; /* 텍스트를 위한 내부 패딩 */
+        font-family: var(--font-family);
+    }}
+
+    /* Selectbox 내부 텍스트 요소 (z-index 등 복잡한 설정 제거) */
+    .stSelectbox > div > div > div {{
+         color: #333333 !important;
+         background-color: transparent !important;
+    }}
+    
+    /* 드롭다운 화살표 색상 */
+    .stSelectbox svg {{
+        fill: var(--primary-color) !important;
+    }}
+    /* <<< 2. 수정 끝 >>> */
+
+    /* metric (수치 표시) */
+    .stMetric {{
+        background-color: var(--secondary-color);
+        border-radius: 12px;
+        box-shadow: 6px 6px 12px var(--dark-shadow), -6px -6px 12px var(--light-shadow);
+        padding: 15px;
+        margin-bottom: 15px;
+        text-align: center;
+    }}
+    .stMetric > div[data-testid="stMetricValue"] {{
+        color: var(--primary-color); /* 포인트 색상 */
+        font-weight: 700;
+    }}
+    
+    /* popover (예약 현황) */
+    .stPopover > button {{
+        background-color: var(--secondary-color);
+        border-radius: 12px;
+        box-shadow: 3px 3px 6px var(--dark-shadow), -3px -3px 6px var(--light-shadow);
+        color: var(--primary-color);
+        font-weight: 600;
+    }}
+    .stPopover > button:hover {{
+        box-shadow: 1px 1px 2px var(--dark-shadow), -1px -1px 2px var(--light-shadow);
+    }}
+
+    /* 컨테이너 (border=True) - UI 글자 잘림 현상 해결 (padding 수정) */
+    .stContainer {{
+        background-color: var(--secondary-color);
+        border-radius: 15px;
+        box-shadow: 8px 8px 16px var(--dark-shadow), -8px -8px 16px var(--light-shadow);
+        padding: 15px; /* 20px -> 15px로 줄여 공간 확보 */
+        margin-bottom: 20px;
+    }}
+    
+    /* 알림 메시지 (info, success, error 등) */
+    .stAlert {{
+        background-color: var(--secondary-color);
+        border-radius: 12px;
+        box-shadow: inset 2px 2px 5px var(--dark-shadow), inset -5px -5px 10px var(--light-shadow);
+        color: #333333;
+        font-family: var(--font-family);
+        border: none;
+    }}
+    .stAlert.info {{ border-left: 8px solid var(--accent-color); }} /* 파란색 */
+    .stAlert.success {{ border-left: 8px solid #4CAF50; }} /* 초록색 */
+    .stAlert.error {{ border-left: 8px solid #F44336; }} /* 빨간색 */
+    .stAlert.warning {{ border-left: 8px solid #FFC107; }} /* 노란색 */
+
+
+    /* 헤더 스타일 */
+    h1, h2, h3, h4, h5, h6 {{
+        color: #333333;
+        font-family: var(--font-family);
+        font-weight: 700;
+        text-shadow: 1px 1px 2px rgba(255,255,255,0.7);
+    }}
+    
+    /* 구분선 */
+    hr {{
+        background-color: var(--dark-shadow);
+    }}
+    </style>
+"""
+
+
+def minify_css(css):
+    """CSS 주석과 불필요한 공백을 제거합니다."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)   # 주석 제거
+    css = re.sub(r"\s+", " ", css)                          # 공백 하나로 합치기
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)          # 기호 앞뒤 공백 제거
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+# 실제로 화면에 넣는 CSS (모듈을 처음 import할 때 한 번만 계산)
+GLOBAL_CSS = minify_css(GLOBAL_CSS_SOURCE)
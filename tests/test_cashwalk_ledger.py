@@ -0,0 +1,52 @@
+import sqlite3
+import time
+
+import pytest
+
+from cashwalk_ledger import CashwalkLedger
+
+
+class FlakyProfiles:
+    """처음 failures번은 update_many가 실패하는 프로필 저장소입니다. (SQLite 잠김 흉내)"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.rows = {}
+
+    def get(self, user_id):
+        return self.rows.get(user_id)
+
+    def update_many(self, updates):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        self.rows.update(updates)
+
+
+def test_failed_flush_keeps_changes_for_next_attempt():
+    profiles = FlakyProfiles(failures=1)
+    ledger = CashwalkLedger(profiles)
+    ledger.add_steps("a", 100)
+    with pytest.raises(sqlite3.OperationalError):
+        ledger.flush()
+    # 실패한 뒤에 들어온 적립은 새 값이 남아야 합니다.
+    ledger.add_steps("a", 50)
+    ledger.add_steps("b", 30)
+    assert ledger.flush() == 2
+    assert profiles.rows["a"]["steps"] == 150
+    assert profiles.rows["b"]["cash"] == 3
+
+
+def test_flush_thread_survives_errors_and_retries():
+    profiles = FlakyProfiles(failures=3)
+    ledger = CashwalkLedger(profiles, flush_interval=0.01)
+    ledger.start()
+    try:
+        ledger.add_steps("a", 200)
+        deadline = time.time() + 5
+        while "a" not in profiles.rows and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        ledger.stop()
+    assert ledger.flush_errors == 3
+    assert profiles.rows["a"]["cash"] == 20
@@ -0,0 +1,43 @@
+import datetime
+import time
+
+from campus import BANKS, CAMPUS, FLOORS
+from congestion_feed import CONGESTION_COLORS, CONGESTION_LEVELS, CongestionSnapshot
+from floor_grid import FloorCardCache
+from reservation_store import ReservationStore
+
+# 실제 오늘보다 하루 뒤를 '오늘'로 두어 테스트가 도는 시각과 관계없이 모든 예약이 미래가 되도록 합니다.
+TODAY = datetime.date.today() + datetime.timedelta(days=1)
+TOMORROW = TODAY + datetime.timedelta(days=1)
+LATER = TODAY + datetime.timedelta(days=5)
+
+
+def _popover(cards, floor):
+    return next(card.popover_md for card in cards if card.floor == floor)
+
+
+def test_popover_marks_reservations_not_dated_today():
+    store = ReservationStore(FLOORS)
+    floor = FLOORS[0]
+    store.reserve(floor, datetime.time(9, 0), "a", TODAY)
+    store.reserve(floor, datetime.time(8, 0), "b", TOMORROW)
+    store.reserve(floor, datetime.time(7, 0), "c", LATER)
+    snapshot = CongestionSnapshot(1, time.time(), {bank: CONGESTION_LEVELS[0] for bank in BANKS},
+                                  {f: CONGESTION_LEVELS[0] for f in FLOORS})
+    cache = FloorCardCache(CONGESTION_COLORS)
+    building = CAMPUS.buildings[0]
+
+    cards = cache.cards(building, snapshot, store, TODAY)
+    assert _popover(cards, floor).splitlines() == [
+        "- 09:00",
+        "- 08:00 (내일)",
+        f"- 07:00 ({LATER.month}/{LATER.day})",
+    ]
+
+    # 예약이 그대로여도 날짜가 바뀌면 캐시된 카드를 쓰지 않고 표시를 다시 만듭니다.
+    cards = cache.cards(building, snapshot, store, TOMORROW)
+    assert _popover(cards, floor).splitlines() == [
+        f"- 09:00 ({TODAY.month}/{TODAY.day})",
+        "- 08:00",
+        f"- 07:00 ({LATER.month}/{LATER.day})",
+    ]
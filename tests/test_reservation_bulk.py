@@ -0,0 +1,33 @@
+import datetime
+
+import pytest
+
+from campus import FLOORS
+from reservation_bulk import parse_reservations
+
+
+def test_csv_field_over_limit_is_value_error():
+    # csv 모듈의 칸 길이 제한(131072자)을 넘으면 csv.Error가 나는데, 화면은 ValueError만 잡습니다.
+    data = f"floor,name,time\n{FLOORS[0]},{'x' * 200000},08:00\n"
+    with pytest.raises(ValueError, match="CSV"):
+        parse_reservations(data, 'csv', FLOORS)
+
+
+def test_csv_rows_without_date_are_accepted():
+    rows, errors = parse_reservations(f"층,이름,시간\n{FLOORS[0]},홍길동,08:50\n", 'csv', FLOORS)
+    assert errors == []
+    assert rows == [(FLOORS[0], "홍길동", datetime.time(8, 50), None)]
+
+
+@pytest.mark.parametrize("data", ['"x"', '5', 'null', '{"reservations": 3}', '[1, 2'])
+def test_unreadable_json_is_value_error(data):
+    with pytest.raises(ValueError):
+        parse_reservations(data, 'json', FLOORS)
+
+
+def test_json_bad_items_are_row_errors():
+    data = ('[1, {"floor": "%s", "name": "a", "time": 830}, '
+            '{"floor": "%s", "name": "b", "time": "08:30", "date": "2030-01-02"}]') % (FLOORS[0], FLOORS[0])
+    rows, errors = parse_reservations(data, 'json', FLOORS)
+    assert [line_no for line_no, _ in errors] == [1, 2]
+    assert rows == [(FLOORS[0], "b", datetime.time(8, 30), datetime.date(2030, 1, 2))]
@@ -0,0 +1,97 @@
+import collections
+import datetime
+import threading
+
+from campus import FLOORS
+from reservation_log import ReservationLog
+from reservation_store import ReservationStore, SlotFullError
+
+THREADS = 32
+OPS_PER_THREAD = 200
+# 내일 날짜로 예약해서 테스트가 도는 시각과 관계없이 같은 결과가 나오도록 합니다.
+TOMORROW = datetime.date.today() + datetime.timedelta(days=1)
+
+
+def _run_threads(target, threads=THREADS):
+    barrier = threading.Barrier(threads)
+    errors = []
+
+    def run(worker_id):
+        barrier.wait()
+        try:
+            target(worker_id)
+        except Exception as e:   # 스레드 안의 예외는 pytest가 보지 못하므로 모아서 확인합니다.
+            errors.append(e)
+
+    workers = [threading.Thread(target=run, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    assert errors == []
+
+
+def _reserve_and_cancel(store):
+    """스레드마다 '남길 사용자'와 '취소할 사용자'로 예약/취소를 섞어 실행합니다. (08:50 러시)"""
+    time_obj = datetime.time(8, 50)
+
+    def worker(worker_id):
+        for i in range(OPS_PER_THREAD):
+            floor = FLOORS[(worker_id + i) % len(FLOORS)]
+            store.reserve(floor, time_obj, f"keep-{worker_id}", TOMORROW)
+            store.reserve(floor, time_obj, f"drop-{worker_id}", TOMORROW)
+            store.cancel(floor, f"drop-{worker_id}")
+
+    _run_threads(worker)
+
+
+def _expected_per_floor():
+    expected = collections.Counter()
+    for worker_id in range(THREADS):
+        for i in range(OPS_PER_THREAD):
+            expected[(FLOORS[(worker_id + i) % len(FLOORS)], f"keep-{worker_id}")] += 1
+    return expected
+
+
+def _observed_per_floor(store):
+    return collections.Counter((floor, res['name']) for floor, rows in store.snapshot_all().items() for res in rows)
+
+
+def test_concurrent_reserve_and_cancel_lose_nothing():
+    store = ReservationStore(FLOORS)
+    _reserve_and_cancel(store)
+    # 사라진 예약도, 중복된 예약도, 취소되지 않은 예약도 없어야 합니다.
+    assert _observed_per_floor(store) == _expected_per_floor()
+    for floor in FLOORS:
+        rows = store.snapshot(floor)
+        assert store.count(floor) == len(rows)
+        assert [(res['date'], res['time']) for res in rows] == sorted((res['date'], res['time']) for res in rows)
+
+
+def test_concurrent_writes_survive_restart(tmp_path):
+    log = ReservationLog(str(tmp_path))
+    store = ReservationStore(FLOORS, log=log)
+    _reserve_and_cancel(store)
+    log.close()
+    restored = ReservationStore(FLOORS, log=ReservationLog(str(tmp_path)))
+    assert _observed_per_floor(restored) == _expected_per_floor()
+
+
+def test_concurrent_reserves_respect_capacity():
+    capacity = 3
+    store = ReservationStore(FLOORS, capacity=capacity)
+    time_obj = datetime.time(8, 50)
+    accepted = []
+    rejected = []
+
+    def worker(worker_id):
+        try:
+            accepted.append(store.reserve(FLOORS[0], time_obj, f"user-{worker_id}", TOMORROW))
+        except SlotFullError:
+            rejected.append(worker_id)
+
+    _run_threads(worker, threads=64)
+    assert len(accepted) == capacity
+    assert len(rejected) == 64 - capacity
+    assert store.occupancy(FLOORS[0], time_obj, TOMORROW) == capacity
+    assert store.count(FLOORS[0]) == capacity
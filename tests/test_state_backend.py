@@ -0,0 +1,99 @@
+import datetime
+import multiprocessing
+import secrets
+import socket
+import time
+
+import pytest
+
+import state_backend
+from campus import FLOORS
+from state_backend import ManagerBackend, serve
+
+OPS = 100
+TOMORROW = datetime.date.today() + datetime.timedelta(days=1)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _writer(address, authkey, worker_id, results):
+    store = ManagerBackend(address, authkey).reservations
+    for i in range(OPS):
+        store.reserve(FLOORS[i % len(FLOORS)], datetime.time(9, i % 60), f"worker-{worker_id}", TOMORROW)
+    # 취소도 다른 프로세스에 보여야 합니다.
+    store.cancel(FLOORS[0], f"worker-{worker_id}")
+    results.put(worker_id)
+
+
+def _reader(address, authkey, results):
+    store = ManagerBackend(address, authkey).reservations
+    results.put((store.version(), {floor: store.count(floor) for floor in FLOORS}))
+
+
+@pytest.fixture
+def state_server(tmp_path):
+    """임시 data_dir로 상태 서버 프로세스를 띄우고 (주소, 비밀번호)를 돌려줍니다."""
+    ctx = multiprocessing.get_context("spawn")
+    address = ("127.0.0.1", _free_port())
+    authkey = secrets.token_hex(16).encode()
+    server = ctx.Process(target=serve, kwargs={'host': address[0], 'port': address[1], 'authkey': authkey,
+                                               'data_dir': str(tmp_path), 'slot_capacity': 0,
+                                               'rate_per_minute': 0},
+                         daemon=True)
+    server.start()
+    deadline = time.time() + 20
+    while True:
+        try:
+            ManagerBackend(address, authkey)
+            break
+        except OSError:
+            if time.time() > deadline:
+                server.terminate()
+                raise
+            time.sleep(0.1)
+    yield ctx, address, authkey
+    server.terminate()
+    server.join()
+
+
+def test_two_client_processes_agree(state_server):
+    ctx, address, authkey = state_server
+    observer = ManagerBackend(address, authkey).reservations
+    start_version = observer.version()
+
+    results = ctx.Queue()
+    writers = [ctx.Process(target=_writer, args=(address, authkey, n, results)) for n in range(2)]
+    for p in writers:
+        p.start()
+    # 다른 프로세스의 쓰기로 변경 알림이 와야 합니다.
+    assert observer.wait_for_change(start_version, 20) != start_version
+    for p in writers:
+        p.join(60)
+        assert p.exitcode == 0
+    assert sorted(results.get(timeout=10) for _ in writers) == [0, 1]
+
+    readers = [ctx.Process(target=_reader, args=(address, authkey, results)) for _ in range(2)]
+    for p in readers:
+        p.start()
+    views = [results.get(timeout=30) for _ in readers]
+    for p in readers:
+        p.join(30)
+
+    per_worker = OPS - len(range(0, OPS, len(FLOORS)))   # 첫 번째 층 예약은 취소됨
+    expected_counts = {floor: 0 if floor == FLOORS[0] else 2 * len(range(i, OPS, len(FLOORS)))
+                       for i, floor in enumerate(FLOORS)}
+    assert views[0] == views[1]
+    version, counts = views[0]
+    assert counts == expected_counts
+    assert sum(counts.values()) == 2 * per_worker
+    assert version == observer.version()
+
+
+def test_serve_refuses_open_host_without_key(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_backend, "STATE_AUTHKEY", None)
+    with pytest.raises(SystemExit):
+        serve("0.0.0.0", _free_port(), data_dir=str(tmp_path))
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+import uuid
+import weakref
+
+# --------------------------------------------------------------------------------
+# 세션별 사용자 상태 (작은 __slots__ 객체) + 오래 쓰지 않은 세션 정리
+# --------------------------------------------------------------------------------
+# 예전에는 세션마다 st.session_state에 층 목록, 혼잡도 레벨/색상 표까지 복사해 두었습니다.
+# 이 값들은 모든 사용자에게 같으므로 모듈 상수(campus.FLOORS, congestion_feed.CONGESTION_COLORS 등)를 쓰고,
+# 세션에는 사용자마다 다른 값만 UserSession 하나로 담습니다. (dict 대신 __slots__ - 세션당 수백 바이트)
+#   - SessionRegistry는 살아 있는 세션을 약한 참조로만 들고 있어서, 닫힌 세션은 그대로 메모리에서 사라집니다.
+#   - 로그인한 채로 SESSION_IDLE_MINUTES분 넘게 아무 조작이 없던 세션은 로그아웃시키고 개인 값을 지웁니다.
+#     (다음에 조작하면 로그인 화면과 안내가 나옵니다)
+#   - rendered에는 자동 갱신 영역마다 마지막으로 그린 (기준, 변경 버스 버전, 내용)을 둡니다.
+#     버스 버전이 그대로면 공유 상태를 다시 읽지 않고 그 내용을 그대로 다시 그립니다. (change_bus.py)
+
+SESSION_IDLE_MINUTES = int(os.environ.get("SESSION_IDLE_MINUTES", "30"))
+# 정리 작업은 조작이 들어올 때 이 간격(초)마다 한 번만 돕니다.
+REAP_INTERVAL_SECONDS = 60
+
+DEFAULT_ALERT_TIME = "08:50"
+ALERT_WINDOW_MINUTES = 5   # 알림 시간 전후로 알림이 활성화되는 시간 (분)
+
+
+class UserSession:
+    """한 브라우저 세션의 사용자별 상태입니다. st.session_state.user에 하나만 둡니다."""
+
+    __slots__ = (
+        'logged_in', 'user_id', 'user_name',
+        'alert_floor', 'alert_time_str', 'alert_active_until',
+        'reserve_suggestion', 'steps_submission_id', 'building', 'rendered', 'admin', 'last_seen', 'expired',
+        '__weakref__',
+    )
+
+    def __init__(self, now=None):
+        self.last_seen = time.time() if now is None else now
+        self.expired = False   # 오래 쓰지 않아 로그아웃되었으면 True (로그인 화면에 안내 - 다시 로그인하면 False)
+        # 제출 번호: 같은 화면에서 누른 '걸음 수 추가하기'는 같은 번호로 들어가서 한 번만 적립됩니다.
+        self.steps_submission_id = uuid.uuid4().hex
+        self.building = 0   # 화면에 보고 있는 건물 번호 (campus.CAMPUS.buildings의 위치)
+        self.logout()
+
+    def login(self, user_id, user_name):
+        self.logged_in = True
+        self.user_id = user_id
+        self.user_name = user_name
+        self.expired = False
+
+    def logout(self):
+        """개인 값을 모두 지웁니다. (알림 설정 등은 프로필에 저장되어 있으므로 다음 로그인 때 복원)"""
+        self.logged_in = False
+        self.user_id = ""
+        self.user_name = ""
+        self.alert_floor = None
+        self.alert_time_str = DEFAULT_ALERT_TIME
+        self.alert_active_until = 0   # 스케줄러가 울린 알림을 이 시각(timestamp)까지 표시
+        self.reserve_suggestion = None   # 예약 칸이 가득 찼을 때 제안받은 (층, 'HH:MM')
+        self.rendered = {}   # 영역 이름 -> (기준, 변경 버스 버전, 그린 내용) / 'alerts' -> 확인한 알림 버전
+        self.admin = False   # 관리자 비밀번호를 확인했으면 True (탈래말래.py - ADMIN_PASSWORD)
+
+    def new_submission(self):
+        self.steps_submission_id = uuid.uuid4().hex
+
+
+class SessionRegistry:
+    """프로세스의 살아 있는 UserSession 목록입니다. (약한 참조 - 모든 세션이 공유)"""
+
+    def __init__(self, idle_minutes=SESSION_IDLE_MINUTES, clock=time.time, reap_interval=REAP_INTERVAL_SECONDS):
+        self.idle_seconds = idle_minutes * 60
+        self.reap_interval = reap_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sessions = weakref.WeakSet()
+        self._last_reap = clock()
+        self.reaped = 0
+
+    def touch(self, session):
+        """session에 조작이 들어왔음을 기록합니다. 이 세션이 이미 오래 쉬었으면 먼저 로그아웃시킵니다."""
+        now = self._clock()
+        if session.logged_in and self._idle(session, now):
+            self._expire(session)
+        session.last_seen = now
+        with self._lock:
+            self._sessions.add(session)
+            due = now - self._last_reap >= self.reap_interval
+            if due:
+                self._last_reap = now
+        if due:
+            self.reap(now)
+
+    def reap(self, now=None):
+        """오래 쉰 로그인 세션을 모두 로그아웃시키고 그 수를 반환합니다."""
+        now = self._clock() if now is None else now
+        with self._lock:
+            idle = [session for session in self._sessions if self._idle(session, now)]
+            for session in idle:
+                self._sessions.discard(session)
+        count = 0
+        for session in idle:
+            if session.logged_in:
+                self._expire(session)
+                count += 1
+        return count
+
+    def _idle(self, session, now):
+        return self.idle_seconds > 0 and now - session.last_seen > self.idle_seconds
+
+    def _expire(self, session):
+        session.logout()
+        session.expired = True
+        with self._lock:
+            self.reaped += 1
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self._sessions)
+        return {
+            'sessions': len(sessions),
+            'logged_in': sum(1 for session in sessions if session.logged_in),
+            'reaped': self.reaped,
+        }
@@ -1,8 +1,20 @@
 import streamlit as st
-import random
 import time
 import datetime
-import re
+import hmac
+import os
+from cashwalk_ledger import DAILY_CASH_CAP, STEPS_PER_CASH
+from congestion_feed import CONGESTION_COLORS
+from congestion_forecast import SLOT_MINUTES
+from state_backend import create_backend
+from campus import CAMPUS, FLOORS
+from dispatch_sim import DispatchPlanner, at
+from floor_grid import FloorCardCache
+from metrics import METRICS, METRICS_PORT, section, timed
+from reservation_bulk import iter_export, parse_reservations, parse_time
+from reservation_store import RateLimitedError, SlotFullError
+from styles import GLOBAL_CSS
+from user_session import ALERT_WINDOW_MINUTES, DEFAULT_ALERT_TIME, SESSION_IDLE_MINUTES, SessionRegistry, UserSession
 # import requests # <<< 1. 수정된 부분 (로고 파일 로드에 더 이상 필요 없음)
 # from io import BytesIO # <<< 1. 수정된 부분 (로고 파일 로드에 더 이상 필요 없음)
 
@@ -10,187 +22,18 @@ import re
 # 0. 전역 설정 및 디자인 (하얀 배경, 짙은 파란색 포인트)
 # --------------------------------------------------------------------------------
 
-# 1. 색상 팔레트 정의 (수정)
-PRIMARY_COLOR = "#0D47A1"  # 짙은 파란색 (포인트)
-BACKGROUND_COLOR = "#F4F6F8" # 하얀색 계열 배경
-SECONDARY_COLOR = "#FFFFFF" # 뉴모피즘 컴포넌트 배경
-ACCENT_COLOR = "#42A5F5"   # 밝은 파란색 (보조)
-
-# 2. 전역 CSS 스타일 (하얀 배경 뉴모피즘)
-st.markdown(f"""
-    <style>
-    /* Google Noto Sans KR 폰트 불러오기 */
-    @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+KR:wght@400;500;700&display=swap');
-
-    /* CSS 변수 정의 */
-    :root {{
-        --primary-color: {PRIMARY_COLOR};
-        --background-color: {BACKGROUND_COLOR};
-        --secondary-color: {SECONDARY_COLOR};
-        --accent-color: {ACCENT_COLOR};
-        --light-shadow: rgba(255, 255, 255, 0.8); /* 밝은 그림자 */
-        --dark-shadow: rgba(174, 174, 192, 0.4);  /* 어두운 그림자 */
-        --font-family: 'Noto Sans KR', sans-serif; /* 폰트 적용 */
-    }}
-
-    /* 전체 배경색 및 폰트 */
-    .stApp {{
-        background-color: var(--background-color);
-        color: #333333;
-        font-family: var(--font-family);
-    }}
-
-    /* 사이드바 배경색 */
-    .stSidebar {{
-        background-color: var(--background-color);
-        border-right: 1px solid #E0E0E0;
-    }}
-    .stSidebar .st-emotion-cache-1jicfl2 {{
-         background-color: var(--background-color);
-    }}
-
-    /* 버튼 기본 스타일 (뉴모피즘) */
-    .stButton > button {{
-        background-color: var(--secondary-color);
-        color: #333333;
-        border: none;
-        border-radius: 12px;
-        box-shadow: 6px 6px 12px var(--dark-shadow), -6px -6px 12px var(--light-shadow);
-        transition: all 0.2s ease-in-out;
-        padding: 10px 20px;
-        font-weight: 600;
-        font-family: var(--font-family);
-    }}
-    .stButton > button:hover {{
-        box-shadow: 2px 2px 4px var(--dark-shadow), -2px -2px 4px var(--light-shadow);
-        transform: scale(0.98);
-    }}
-    .stButton > button:active {{
-        box-shadow: inset 2px 2px 4px var(--dark-shadow), inset -2px -2px 4px var(--light-shadow);
-    }}
-
-    /* 짙은 파란색 버튼 (포인트) - type="primary" */
-    .stButton > button[kind="primary"] {{
-        background-color: var(--primary-color);
-        color: white;
-        box-shadow: 6px 6px 12px var(--dark-shadow), -6px -6px 12px var(--light-shadow);
-    }}
-    .stButton > button[kind="primary"]:hover {{
-        background-color: #0B3A80; /* 호버 시 조금 더 어둡게 */
-        box-shadow: 2px 2px 4px var(--dark-shadow), -2px -2px 4px var(--light-shadow);
-    }}
-    .stButton > button[kind="primary"]:active {{
-        box-shadow: inset 2px 2px 4px var(--dark-shadow), inset -2px -2px 4px var(--light-shadow);
-    }}
-
-    /* 텍스트 입력 필드 */
-    .stTextInput > div > div > input,
-    .stNumberInput > div > div > input {{
-        background-color: var(--secondary-color);
-        border: none;
-        border-radius: 12px;
-        box-shadow: inset 2px 2px 5px var(--dark-shadow), inset -5px -5px 10px var(--light-shadow);
-        padding: 10px;
-        color: #333333;
-        font-family: var(--font-family);
-    }}
-
-/* <<< 2. 수정된 부분: Selectbox 스타일 (안정적인 '볼록한' 스타일로 변경) >>> */
-    /*
-        [수정 이유]
-        st.selectbox의 'inset(오목한)' 그림자는 Streamlit의 복잡한
-        내부 구조와 충돌하여 텍스트를 가리는 고질적인 문제가 있습니다.
-        가장 안정적인 해결책은 '볼록한(convex)' 스타일로 변경하는 것입니다.
-    */
-    .stSelectbox > div > div {{
-        background-color: var(--secondary-color); /* 버튼과 동일한 배경 */
-        color: #333333; /* 텍스트 색상 */
-        border: none;
-        border-radius: 12px;
-        
-        /* (핵심) 'inset' 대신 '볼록한' 그림자로 변경 (st.button과 유사) */
-        box-shadow: 6px 6px 12px var(--dark-shadow), -6px -6px 12px var(--light-shadow);
-        
-        padding: 10px; /* 텍스트를 위한 내부 패딩 */
-        font-family: var(--font-family);
-    }}
-
-    /* Selectbox 내부 텍스트 요소 (z-index 등 복잡한 설정 제거) */
-    .stSelectbox > div > div > div {{
-         color: #333333 !important;
-         background-color: transparent !important;
-    }}
-    
-    /* 드롭다운 화살표 색상 */
-    .stSelectbox svg {{
-        fill: var(--primary-color) !important;
-    }}
-    /* <<< 2. 수정 끝 >>> */
-
-    /* metric (수치 표시) */
-    .stMetric {{
-        background-color: var(--secondary-color);
-        border-radius: 12px;
-        box-shadow: 6px 6px 12px var(--dark-shadow), -6px -6px 12px var(--light-shadow);
-        padding: 15px;
-        margin-bottom: 15px;
-        text-align: center;
-    }}
-    .stMetric > div[data-testid="stMetricValue"] {{
-        color: var(--primary-color); /* 포인트 색상 */
-        font-weight: 700;
-    }}
-    
-    /* popover (예약 현황) */
-    .stPopover > button {{
-        background-color: var(--secondary-color);
-        border-radius: 12px;
-        box-shadow: 3px 3px 6px var(--dark-shadow), -3px -3px 6px var(--light-shadow);
-        color: var(--primary-color);
-        font-weight: 600;
-    }}
-    .stPopover > button:hover {{
-        box-shadow: 1px 1px 2px var(--dark-shadow), -1px -1px 2px var(--light-shadow);
-    }}
-
-    /* 컨테이너 (border=True) - UI 글자 잘림 현상 해결 (padding 수정) */
-    .stContainer {{
-        background-color: var(--secondary-color);
-        border-radius: 15px;
-        box-shadow: 8px 8px 16px var(--dark-shadow), -8px -8px 16px var(--light-shadow);
-        padding: 15px; /* 20px -> 15px로 줄여 공간 확보 */
-        margin-bottom: 20px;
-    }}
-    
-    /* 알림 메시지 (info, success, error 등) */
-    .stAlert {{
-        background-color: var(--secondary-color);
-        border-radius: 12px;
-        box-shadow: inset 2px 2px 5px var(--dark-shadow), inset -5px -5px 10px var(--light-shadow);
-        color: #333333;
-        font-family: var(--font-family);
-        border: none;
-    }}
-    .stAlert.info {{ border-left: 8px solid var(--accent-color); }} /* 파란색 */
-    .stAlert.success {{ border-left: 8px solid #4CAF50; }} /* 초록색 */
-    .stAlert.error {{ border-left: 8px solid #F44336; }} /* 빨간색 */
-    .stAlert.warning {{ border-left: 8px solid #FFC107; }} /* 노란색 */
-
-
-    /* 헤더 스타일 */
-    h1, h2, h3, h4, h5, h6 {{
-        color: #333333;
-        font-family: var(--font-family);
-        font-weight: 700;
-        text-shadow: 1px 1px 2px rgba(255,255,255,0.7);
-    }}
-    
-    /* 구분선 */
-    hr {{
-        background-color: var(--dark-shadow);
-    }}
-    </style>
-""", unsafe_allow_html=True)
+# rerun 한 번 전체 시간 측정 시작 (METRICS=1일 때만 기록 - metrics.py 참고)
+RERUN_STARTED = time.perf_counter()
+
+# 1, 2. 색상 팔레트와 전역 CSS는 styles.py에 있습니다. (프로세스당 한 번만 계산 + minify)
+with section("ui.css"):
+    st.markdown(GLOBAL_CSS, unsafe_allow_html=True)
+
+# 예약 일괄 등록/내보내기를 쓸 수 있는 관리자 학번 (ADMIN_IDS 환경변수, 쉼표로 구분)
+ADMIN_IDS = frozenset(filter(None, (admin_id.strip() for admin_id in os.environ.get("ADMIN_IDS", "").split(","))))
+# 학번은 누구나 입력할 수 있으므로, 관리자 화면은 이 비밀번호(ADMIN_PASSWORD 환경변수)를 확인한 세션에만 엽니다.
+# (내보내기에는 학생 이름이 들어 있음 - 비밀번호를 설정하지 않으면 관리자 화면을 열지 않습니다)
+ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "")
 
 
 # --------------------------------------------------------------------------------
@@ -199,91 +42,133 @@ st.markdown(f"""
 @st.cache_resource
 def get_shared_state():
     """모든 앱 인스턴스에서 공유될 상태를 반환합니다. (Firebase 임시 대체)"""
+    # STATE_BACKEND 환경변수에 따라 이 프로세스 안에 만들거나(기본값),
+    # 여러 레플리카가 함께 쓰는 상태 서버에 접속합니다. (state_backend.py 참고)
+    backend = create_backend()
+    if METRICS.enabled and METRICS_PORT:
+        METRICS.serve()   # /metrics 엔드포인트 (프로세스당 한 번)
     return {
-        'reservations': {floor: [] for floor in ['B1', '1F', '2F', '3F', '4F', '5F']}
+        'reservations': backend.reservations,
+        'congestion': backend.congestion,
+        'alerts': backend.alerts,
+        'profiles': backend.profiles,
+        # 캐시워크 걸음 수/캐시 장부 (모든 세션 공유, 자정에 자동 초기화)
+        'cashwalk': backend.cashwalk,
+        # 혼잡도 기록 (시계열 - 구간 조회/집계)
+        'history': backend.history,
+        # 요일 x 5분 칸 예상 혼잡도 (표에서 꺼내기만 함)
+        'forecast': backend.forecast,
+        # 예약 / 혼잡도 / 알림 변경 버스 (세션은 버전 하나로 바뀐 것이 있는지 확인 - change_bus.py)
+        'bus': backend.bus,
+        # 층별 카드 markdown 캐시 (바뀐 층만 다시 만듦)
+        'floor_cards': FloorCardCache(CONGESTION_COLORS),
+        # 건물별 운행 계획 (예약/혼잡도가 바뀌거나 1분이 지날 때만 다시 시뮬레이션)
+        'dispatch': DispatchPlanner(),
+        # 이 프로세스의 세션 목록 (오래 쉰 세션 로그아웃)
+        'sessions': SessionRegistry(),
     }
 
 # --------------------------------------------------------------------------------
 # 1. 앱 상태 초기화 (Session State)
 # --------------------------------------------------------------------------------
 def initialize_state():
-    if 'initialized' not in st.session_state:
-        st.session_state.initialized = True # 초기화 완료 플래그
-        
-        # (신규) 로그인 상태 추가
-        st.session_state.logged_in = False
-        st.session_state.user_name = ""
-        st.session_state.user_id = "" # 학번
-        
-        # 층 목록
-        st.session_state.floors = ['B1', '1F', '2F', '3F', '4F', '5F']
-        
-        # 혼잡도 레벨 및 색상 정의 (기능 1, 2)
-        st.session_state.congestion_levels = ['여유', '보통', '혼잡']
-        st.session_state.congestion_colors = {'여유': '🟢', '보통': '🟠', '혼잡': '🔴'}
-        
-        # --- 데이터 시뮬레이션 ---
-        # 1. 엘리베이터 내부 혼잡도 (기능 1)
-        st.session_state.elevator_congestion = random.choice(st.session_state.congestion_levels)
-        
-        # 2. 층별 대기 혼잡도 (기능 2)
-        st.session_state.floor_congestion = {
-            floor: random.choice(st.session_state.congestion_levels) 
-            for floor in st.session_state.floors
-        }
-        
-        # 3. 층별 예약 상태 (get_shared_state()로 대체)
-        # st.session_state.reservations = {floor: [] for floor in st.session_state.floors} # 주석 처리
-        
-        # 5. 캐시워크 상태 (기능 5)
-        st.session_state.cashwalk = {'steps': 0, 'cash': 0}
-        if 'steps_to_add_input' not in st.session_state:
-            st.session_state.steps_to_add_input = 0
-
-        # 6. 정기 알림 설정 상태
-        st.session_state.alert_floor = None 
-        st.session_state.alert_time_str = "08:50"
-        st.session_state.alert_window_minutes = 5 
+    # 세션에는 사용자별 값만 담은 UserSession 하나만 둡니다. (user_session.py)
+    # 층 목록 / 혼잡도 레벨·색상 같은 공통 표는 모듈 상수(FLOORS, CONGESTION_COLORS)를 그대로 씁니다.
+    if 'user' not in st.session_state:
+        st.session_state.user = UserSession()
+    # 걸음 수 입력칸 (위젯 key - 콜백이 읽음)
+    if 'steps_to_add_input' not in st.session_state:
+        st.session_state.steps_to_add_input = 0
 
 # --------------------------------------------------------------------------------
 # 2. 헬퍼 함수 (기능별 로직)
 # --------------------------------------------------------------------------------
 
-# (시뮬레이션) 혼잡도 데이터를 랜덤으로 새로고침하는 함수
+# (시뮬레이션) 혼잡도 데이터를 지금 바로 새로고침하는 함수
+@timed()
 def update_congestion_data():
-    """모든 층과 엘리베이터의 혼잡도를 랜덤으로 다시 설정합니다."""
-    st.session_state.elevator_congestion = random.choice(st.session_state.congestion_levels)
-    st.session_state.floor_congestion = {
-        floor: random.choice(st.session_state.congestion_levels) 
-        for floor in st.session_state.floors
-    }
+    """공유 혼잡도 피드에 즉시 새로고침을 요청합니다. (모든 사용자에게 같은 데이터가 보입니다)"""
+    forget_rendered() # 누른 사람은 변경이 묶여 확정될 때까지 기다리지 않고 바로 봅니다.
+    # 시계열/예측표 샘플은 피드 스레드만 일정한 간격으로 남깁니다. (누른 횟수만큼 기록이 쏠리지 않도록)
+    return get_shared_state()['congestion'].refresh(record=False)
 
 # (기능 3, 4) 엘리베이터 예약 로직 (수정 - 다중 예약 및 공유 상태 사용)
+@timed()
 def reserve_elevator(floor, time_obj, user_name):
     """특정 층에, 지정된 시간으로 '현재 사용자'의 예약을 추가합니다. 공유 상태 사용."""
     shared_state = get_shared_state() # 공유 상태 가져오기
-    new_reservation = {'name': user_name, 'time': time_obj}
-    shared_state['reservations'][floor].append(new_reservation) # 공유 상태에 저장
-    
     time_str = time_obj.strftime('%H:%M')
-    st.sidebar.success(f"{user_name}님, {floor} {time_str} 예약 완료!")
+    try:
+        # 공유 상태에 저장 (층별 락 + 정원 확인) - 오늘 이미 지난 시각이면 내일로 예약됩니다.
+        reservation = shared_state['reservations'].reserve(floor, time_obj, user_name)
+    except SlotFullError as e:
+        if e.suggestion:
+            st.session_state.user.reserve_suggestion = (floor, e.suggestion.strftime('%H:%M'))
+            st.sidebar.warning(f"{floor} {time_str} 예약이 가득 찼습니다. 가장 가까운 빈 시간은 {e.suggestion.strftime('%H:%M')}입니다.")
+        else:
+            st.session_state.user.reserve_suggestion = None
+            st.sidebar.warning(f"{floor} {time_str} 근처에 빈 예약 시간이 없습니다.")
+        return
+    except RateLimitedError:
+        st.sidebar.warning("요청이 너무 많습니다. 잠시 후 다시 시도하세요.")
+        return
+    
+    st.session_state.user.reserve_suggestion = None
+    forget_rendered()
+    day = " (내일)" if reservation['date'] > datetime.date.today() else ""
+    st.sidebar.success(f"{user_name}님, {floor}{day} {time_str} 예약 완료!")
+
+# (기능 4) 제안받은 빈 시간으로 예약하는 버튼 콜백
+def on_click_reserve_suggestion():
+    floor, time_str = st.session_state.user.reserve_suggestion
+    reserve_elevator(floor, validate_time_format(time_str), st.session_state.user.user_name)
+
+# (관리자) 예약 일괄 등록 로직 (CSV/JSON 파일)
+@timed()
+def import_reservations(uploaded_file):
+    """(관리자) CSV/JSON 파일의 예약을 검증해서 한 번에 등록합니다."""
+    fmt = 'json' if uploaded_file.name.lower().endswith('.json') else 'csv'
+    try:
+        rows, errors = parse_reservations(uploaded_file.getvalue(), fmt, FLOORS)
+    except (ValueError, UnicodeDecodeError) as e:
+        st.sidebar.error(f"파일을 읽을 수 없습니다: {e}")
+        return
+    result = get_shared_state()['reservations'].bulk_reserve(rows) if rows else {'added': 0, 'rejected': []}
+    forget_rendered()
+    st.sidebar.success(f"{result['added']}건 등록 완료")
+    # 검증 오류는 파일의 행 번호, 정원 초과는 검증을 통과한 행 중 몇 번째인지로 보여줍니다.
+    problems = [f"{line_no}행: {reason}" for line_no, reason in errors]
+    problems += [f"{rows[position][1]} ({rows[position][0]} {rows[position][2].strftime('%H:%M')}): {reason}"
+                 for position, reason in result['rejected']]
+    if problems:
+        st.sidebar.warning(f"{len(problems)}건은 등록하지 못했습니다.\n\n" + "\n\n".join(problems[:20]))
+
+# (관리자) 예약 내보내기 파일 - 예약이 바뀌었을 때(version)만 다시 만듭니다. (관리자 화면을 다시 그릴 때마다 만들지 않음)
+@st.cache_resource(max_entries=2)
+def export_reservations(version, fmt):
+    return "".join(iter_export(get_shared_state()['reservations'], FLOORS, fmt))
 
 # (기능 3) 예약 취소 로직 (수정 - 다중 예약 및 공유 상태 사용)
+@timed()
 def cancel_reservation(floor, user_name):
     """특정 층의 예약 리스트에서 '현재 사용자'의 예약을 모두 제거합니다. 공유 상태 사용."""
     shared_state = get_shared_state() # 공유 상태 가져오기
-    current_reservations = shared_state['reservations'][floor] # 공유 상태에서 읽기
-    reservations_to_keep = [res for res in current_reservations if res['name'] != user_name]
+    try:
+        removed = shared_state['reservations'].cancel(floor, user_name) # 읽기+삭제를 한 번에 (층별 락)
+    except RateLimitedError:
+        st.sidebar.warning("요청이 너무 많습니다. 잠시 후 다시 시도하세요.")
+        return
     
-    if len(reservations_to_keep) == len(current_reservations):
+    if removed == 0:
         st.sidebar.warning(f"{floor}에 {user_name}님의 예약이 없습니다.")
     else:
-        shared_state['reservations'][floor] = reservations_to_keep # 공유 상태 업데이트
+        forget_rendered()
         st.sidebar.info(f"{floor} {user_name}님 예약이 취소되었습니다.")
 
 # (수정 1 - 기능 5) 캐시워크 버튼 클릭 시 실행될 '콜백 함수'
-def on_click_add_steps():
-    """'걸음 수 추가하기' 버튼이 눌렸을 때 호출될 함수 (오류 수정)"""
+@timed()
+def on_click_add_steps(submission_id):
+    """'걸음 수 추가하기' 버튼이 눌렸을 때 호출될 함수 (공유 장부에 원자적으로 적립)"""
     
     steps_to_add = st.session_state.steps_to_add_input
     
@@ -291,77 +176,309 @@ def on_click_add_steps():
         st.sidebar.warning("0보단 큰 값을 입력하세요.")
         return
 
-    current_cash = st.session_state.cashwalk['cash']
-    if current_cash >= 100:
-        st.sidebar.warning("오늘은 100캐시를 모두 적립했습니다.")
-        # 입력창 초기화는 여기서도 필요
-        st.session_state.steps_to_add_input = 0
-        return
-        
-    st.session_state.cashwalk['steps'] += steps_to_add
-    cash_to_add = (steps_to_add // 10) * 1
-    new_cash = min(current_cash + cash_to_add, 100)
-    
-    added_cash = new_cash - current_cash
-    if added_cash > 0:
-        st.sidebar.success(f"{added_cash} 캐시 적립!")
-    elif cash_to_add > 0:
-         st.sidebar.warning("일일 최대 100캐시를 초과했습니다.")
-    else:
-        st.sidebar.info("캐시를 적립하기엔 걸음 수가 부족합니다. (10보당 1원)")
-
-    st.session_state.cashwalk['cash'] = new_cash
+    # 읽기+계산+쓰기를 장부 안에서 한 번에 처리합니다. (같은 submission_id는 한 번만 적립)
+    result = get_shared_state()['cashwalk'].add_steps(st.session_state.user.user_id, steps_to_add, submission_id)
     st.session_state.steps_to_add_input = 0 # 로직 실행 후, 입력창을 0으로 리셋
+    st.session_state.user.new_submission() # 다음 제출은 새 번호
+
+    if result['duplicate']:
+        st.sidebar.info("이미 적립된 요청입니다.")
+    elif result['added_cash'] > 0:
+        st.sidebar.success(f"{result['added_cash']} 캐시 적립!")
+    elif result['cash'] >= DAILY_CASH_CAP:
+        st.sidebar.warning(f"오늘은 {DAILY_CASH_CAP}캐시를 모두 적립했습니다.")
+    else:
+        st.sidebar.info(f"캐시를 적립하기엔 걸음 수가 부족합니다. ({STEPS_PER_CASH}보당 1원)")
+
+# (기능 5) 캐시워크 리셋 버튼 콜백 (입력창 값은 위젯이 그려지기 전인 콜백에서만 바꿀 수 있음)
+def on_click_reset_cash():
+    get_shared_state()['cashwalk'].reset(st.session_state.user.user_id)
+    st.session_state.steps_to_add_input = 0
+
+# (관리자) 비밀번호 확인 버튼 콜백 (입력한 비밀번호는 확인 후 바로 지움)
+def on_click_admin_login():
+    password = st.session_state.admin_password_input
+    st.session_state.admin_password_input = ""
+    if ADMIN_PASSWORD and hmac.compare_digest(password.encode(), ADMIN_PASSWORD.encode()):
+        st.session_state.user.admin = True
+    else:
+        st.sidebar.error("관리자 비밀번호가 올바르지 않습니다.")
 
 # (기능 6) 정기 알림 설정 저장 함수
 def set_alert(floor, time_str):
-    st.session_state.alert_floor = floor
-    st.session_state.alert_time_str = time_str
+    st.session_state.user.alert_floor = floor
+    st.session_state.user.alert_time_str = time_str
+    st.session_state.user.alert_active_until = 0
+    # 서버의 알림 스케줄러에 등록 (이 세션이 다시 실행되지 않아도 제시간에 울림)
+    get_shared_state()['alerts'].register(
+        st.session_state.user.user_id, floor, validate_time_format(time_str), ALERT_WINDOW_MINUTES
+    )
+    get_shared_state()['profiles'].update(st.session_state.user.user_id, alert_floor=floor, alert_time=time_str)
     st.sidebar.success(f"{floor} {time_str} 알림 저장!")
 
 # (기능 6) 정기 알림 설정 해제 함수
 def clear_alert():
-    st.session_state.alert_floor = None
-    st.session_state.alert_time_str = "08:50"
+    st.session_state.user.alert_floor = None
+    st.session_state.user.alert_time_str = DEFAULT_ALERT_TIME
+    st.session_state.user.alert_active_until = 0
+    get_shared_state()['alerts'].unregister(st.session_state.user.user_id)
+    get_shared_state()['profiles'].update(st.session_state.user.user_id, alert_floor=None, alert_time=None)
     st.sidebar.info("정기 알림이 해제되었습니다.")
 
+# (공통) 로그인 시 저장된 프로필을 세션으로 복원하는 함수
+def restore_profile(user_id, user_name):
+    """학번으로 프로필을 한 번 조회해서 알림 설정을 세션에 채웁니다. 처음이면 새로 만듭니다.
+    (걸음 수/캐시는 캐시워크 장부가 필요할 때 프로필에서 읽습니다)"""
+    profiles = get_shared_state()['profiles']
+    profile = profiles.get(user_id)
+    if profile is None or profile['name'] != user_name:
+        profile = profiles.update(user_id, name=user_name)
+    if profile['alert_floor'] and profile['alert_time']:
+        st.session_state.user.alert_floor = profile['alert_floor']
+        st.session_state.user.alert_time_str = profile['alert_time']
+
+# (공통) 지금 보고 있는 건물
+def current_building():
+    """세션이 보고 있는 건물(campus.Building)을 반환합니다. (배열 한 칸 읽기)"""
+    return CAMPUS.buildings[st.session_state.user.building]
+
+def on_change_building():
+    st.session_state.user.building = st.session_state.building_sel
+
+# (공통) 자동 갱신 영역의 '마지막으로 그린 내용' 재사용
+def reuse_rendered(area, basis, topics, start=0, stop=0):
+    """area를 마지막으로 그린 뒤 topics가 바뀌지 않았으면 그때 그린 내용을, 바뀌었으면 None을 반환합니다.
+
+    basis(건물 번호 등)가 달라졌으면 다시 그려야 합니다. stop > start이면 층 번호 [start, stop)의 변경만 봅니다.
+    반환값과 상관없이 지금의 버스 버전을 돌려주므로, 다시 그렸으면 remember_rendered()에 넘깁니다.
+    """
+    bus = get_shared_state()['bus']
+    version = bus.settled() # 몰려 들어온 변경은 잠잠해진 뒤 한 번에 올라가는 버전
+    rendered = st.session_state.user.rendered.get(area)
+    if rendered is None or rendered[0] != basis:
+        return None, version
+    seen = rendered[1]
+    if seen == version:
+        return rendered[2], version
+    if stop > start:
+        changed = bus.changed_floors(topics, seen, start, stop)
+    else:
+        changed = [topic for topic in bus.changed_topics(seen) if topic in topics]
+    if changed:
+        return None, version
+    # 다른 건물 / 다른 주제만 바뀌었으면 그린 내용은 그대로 두고 버전만 따라갑니다.
+    st.session_state.user.rendered[area] = (basis, version, rendered[2])
+    return rendered[2], version
+
+def remember_rendered(area, basis, version, content):
+    st.session_state.user.rendered[area] = (basis, version, content)
+
+def forget_rendered():
+    """이 세션이 직접 바꾼 것은 변경이 묶여 확정되기를 기다리지 않고 다음 화면에 바로 보이도록 합니다."""
+    st.session_state.user.rendered.clear()
+
+# (공통) 예상 혼잡도 문자열 함수
+def expected_congestion(floor, time_obj):
+    """다가오는 time_obj 시각의 floor 예상 혼잡도를 '🔴 혼잡' 형태로 반환합니다. 기록이 없으면 None."""
+    now = datetime.datetime.now()
+    when = datetime.datetime.combine(now.date(), time_obj)
+    if when < now - datetime.timedelta(minutes=SLOT_MINUTES):
+        when += datetime.timedelta(days=1) # 이미 지난 시각이면 내일 같은 시각
+    level = get_shared_state()['forecast'].expected(floor, when) # 미리 계산된 표에서 꺼내기만 함 (O(1))
+    return None if level is None else f"{CONGESTION_COLORS[level]} {level}"
+
 # (공통) 시간 형식 검증 함수 (HH:MM)
 def validate_time_format(time_str):
     """ "HH:MM" (예: 08:30, 14:05) 형식인지 검증하고 time 객체로 변환합니다. """
-    time_pattern = re.compile(r'^([01]\d|2[0-3]):([0-5]\d)$')
-    if not time_pattern.match(time_str):
-        return None
-    try:
-        return datetime.datetime.strptime(time_str, '%H:%M').time()
-    except ValueError:
-        return None
+    # 정규식은 reservation_bulk에서 한 번만 컴파일해 둔 것을 씁니다. (매 실행마다 컴파일/strptime 하지 않음)
+    return parse_time(time_str)
+
+# --------------------------------------------------------------------------------
+# 2-1. 자동 갱신 영역 (fragment)
+# --------------------------------------------------------------------------------
+# '현황 새로고침' 버튼을 누르면 CSS, 로고, 사이드바까지 스크립트 전체가 다시 실행됩니다.
+# 실시간 현황 / 층별 대기 현황은 st.fragment로 분리해서 이 부분만 주기적으로 다시 그립니다.
+# 공유 데이터의 버전이 바뀌지 않았으면 세션에 저장해 둔 결과를 그대로 다시 씁니다.
+# 무엇이 바뀌었는지는 변경 버스(change_bus.py)의 버전 하나로 확인합니다. (바뀌지 않았으면 공유 상태를 읽지 않음)
+LIVE_REFRESH_SECONDS = 5
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+@timed("ui.live_status")
+def render_live_status():
+    """(기능 1) 엘리베이터 내부 혼잡도 영역"""
+    st.subheader("실시간 현황")
+    st.caption("실제로는 카메라가 이 데이터를 업데이트합니다.")
+    
+    # 현황 새로고침 버튼 (fragment 안에 있으므로 이 영역만 다시 실행됨)
+    if st.button("현황 새로고침 (데이터 시뮬레이션)", key="refresh_btn", type="primary"):
+        update_congestion_data()
+        
+    building = current_building()
+    statuses, version = reuse_rendered('banks', building.id, ('congestion',))
+    if statuses is None:
+        congestion = get_shared_state()['congestion'].snapshot() # 공유 혼잡도 스냅샷 (한 번만 읽기)
+        statuses = tuple((bank.name, congestion.banks[bank.name]) for bank in building.banks)
+        remember_rendered('banks', building.id, version, statuses)
+    # 보고 있는 건물의 엘리베이터마다 내부 혼잡도를 보여줍니다.
+    for bank_name, elevator_status in statuses:
+        elevator_color_icon = CONGESTION_COLORS[elevator_status]
+        with st.container(border=True): # 엘리베이터 내부 혼잡도도 뉴모피즘 컨테이너로 감쌈
+            st.markdown(f"## {elevator_color_icon} {bank_name} 내부: **{elevator_status}**")
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+@timed("ui.alert_card")
+def render_alert_card():
+    """(기능 6) 나의 맞춤 알림 영역. 서버의 알림 스케줄러가 배달한 알림을 받아서 보여줍니다."""
+    st.subheader("🔔 나의 맞춤 알림")
+    
+    alert_time_str = st.session_state.user.alert_time_str
+    target_floor = st.session_state.user.alert_floor
+
+    if not target_floor:
+        st.info("사이드바에서 '정기 알림'을 설정해 보세요. ⏰")
+        return
+
+    # 받은편지함 확인 - 누군가의 알림이 울려 'alerts' 버전이 바뀌었을 때만 확인합니다. (묶지 않고 바로)
+    alerts_version = get_shared_state()['bus'].version('alerts')
+    if st.session_state.user.rendered.get('alerts') != alerts_version:
+        st.session_state.user.rendered['alerts'] = alerts_version
+        for event in get_shared_state()['alerts'].poll(st.session_state.user.user_id):
+            st.session_state.user.alert_active_until = event['until']
+            st.toast(f"💥 지금 {event['floor']}로 갈 시간입니다! ({event['time']} 알림)")
+
+    window_min = ALERT_WINDOW_MINUTES
+    alert_time_obj = validate_time_format(alert_time_str)
+    expected = expected_congestion(target_floor, alert_time_obj) if alert_time_obj else None
+    # 알림창을 컨테이너로 감싸기
+    with st.container(border=True):
+        if time.time() <= st.session_state.user.alert_active_until:
+            status = get_shared_state()['congestion'].snapshot().floors[target_floor]
+            color_icon = CONGESTION_COLORS[status]
+            # st.error 대신 st.markdown으로 스타일링
+            st.markdown(f"### <span style='color: #F44336;'>💥 지금 {target_floor}로 갈 시간입니다!</span>", unsafe_allow_html=True)
+            st.markdown(f"#### ( {alert_time_str} 알림 )")
+            st.markdown(f"## 현재 혼잡도: {color_icon} {status}")
+            if expected:
+                st.caption(f"( {alert_time_str} 예상: {expected} )")
+        else:
+            # st.success 대신 st.markdown으로 스타일링
+            st.markdown(f"### <span style='color: #4CAF50;'>✅ {target_floor} {alert_time_str} 알림 설정됨</span>", unsafe_allow_html=True)
+            st.caption(f"( {window_min}분 전후로 활성화됩니다 )")
+            if expected:
+                st.markdown(f"#### {alert_time_str} 예상: {expected}")
+
+# 층별 카드를 한 줄에 몇 개씩 놓을지
+FLOOR_GRID_COLUMNS = 3
+
+def render_floor_grid(cards):
+    """층 카드들을 FLOOR_GRID_COLUMNS개씩 줄을 나누어 그립니다. (층 수에 상관없이 동작)"""
+    for row_start in range(0, len(cards), FLOOR_GRID_COLUMNS):
+        cols = st.columns(FLOOR_GRID_COLUMNS)
+        for col, card in zip(cols, cards[row_start:row_start + FLOOR_GRID_COLUMNS]):
+            with col:
+                st.markdown(f"#### {card.floor}") # UI 글자 잘림 현상 해결 (h3 -> h4)
+                with st.container(border=True):
+                    st.markdown(card.status_md) # UI 글자 잘림 현상 해결 (h2 -> h3)
+                    if card.count:
+                        with st.popover(f"🚑 예약 ({card.count}명)"):
+                            st.markdown(f"**{card.floor} - 총 {card.count}건의 예약**")
+                            # 저장소가 이미 시간순으로 정렬해 두었으므로 그대로 표시
+                            st.markdown(card.popover_md)
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+@timed("ui.floor_status")
+def render_floor_status():
+    """(기능 2, 3, 4) 층별 대기 혼잡도 + 예약 현황 영역"""
+    st.subheader("층별 대기 현황")
+
+    building = current_building()
+    if len(CAMPUS.buildings) > 1:
+        st.markdown(f"##### 🏢 {building.name}")
+    # 이 건물의 층 중 혼잡도나 예약이 바뀐 층이 없으면 지난번 카드를 그대로 그립니다.
+    # (날짜가 바뀌면 '내일' 표시가 달라지므로 오늘 날짜도 basis에 넣습니다.)
+    today = datetime.date.today()
+    cards, version = reuse_rendered('floors', (building.id, today), ('reservations', 'congestion'),
+                                    building.start, building.stop)
+    if cards is None:
+        shared_state = get_shared_state()
+        # 혼잡도 스냅샷은 렌더마다 한 번만 읽어서 모든 층에 같은 시점의 데이터를 씁니다.
+        congestion = shared_state['congestion'].snapshot()
+        # 혼잡도나 예약이 바뀐 층만 카드를 다시 만들고, 나머지는 공유 캐시에서 가져옵니다.
+        # (건물 전체가 그대로면 카드 목록을 통째로 재사용)
+        cards = shared_state['floor_cards'].cards(building, congestion, shared_state['reservations'], today)
+        remember_rendered('floors', (building.id, today), version, cards)
+    render_floor_grid(cards)
+
+# 운행 계획에서 보여줄 🚑 예약 수
+DISPATCH_PREVIEW = 10
+
+def format_wait(seconds):
+    """대기 시간(초)을 '1분 20초' 형태로 바꿉니다."""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes}분 {seconds}초" if minutes else f"{seconds}초"
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+@timed("ui.dispatch_plan")
+def render_dispatch_plan():
+    """(기능 2, 3, 4) 예약 + 혼잡도로 시뮬레이션한 엘리베이터 운행 계획 영역"""
+    st.subheader("🛗 운행 계획 (시뮬레이션)")
+    st.caption("지금 혼잡도와 예약으로 층별 예상 대기 시간과 🚑 예약 처리 순서를 계산합니다.")
+
+    shared_state = get_shared_state()
+    congestion = shared_state['congestion'].snapshot()
+    building = current_building()
+    for bank in building.banks:
+        if len(building.banks) > 1:
+            st.markdown(f"##### 🛗 {bank.name}")
+        plan = shared_state['dispatch'].plan(bank, shared_state['reservations'], congestion)
+        # 층별 예상 대기 시간 (한 줄의 markdown으로 묶어서 전송)
+        st.markdown(" · ".join(f"**{wait.floor}** {format_wait(wait.average_wait)}" for wait in plan.waits.values()))
+        if plan.service_order:
+            with st.expander(f"🚑 예약 처리 순서 ({len(plan.service_order)}건)"):
+                st.markdown("\n".join(
+                    f"- {at(plan, stop.eta).strftime('%H:%M:%S')} {stop.floor} "
+                    f"(예약 {at(plan, stop.reserved).strftime('%H:%M')}, 대기 {format_wait(stop.wait)}, {stop.car}호기)"
+                    for stop in plan.service_order[:DISPATCH_PREVIEW]
+                ))
 
 # --------------------------------------------------------------------------------
 # 3. Streamlit UI 렌더링
 # --------------------------------------------------------------------------------
 
 initialize_state()
-shared_state = get_shared_state() # 공유 상태를 사용
+with section("shared_state"):
+    shared_state = get_shared_state() # 공유 상태를 사용
+# 조작이 있었음을 기록합니다. (오래 쉰 세션은 여기서 로그아웃 - fragment 자동 갱신은 조작으로 치지 않음)
+shared_state['sessions'].touch(st.session_state.user)
 
 # --- 최상단 로고 및 앱 이름 (UI 추가 1) ---
 # <<< 1. 수정된 부분: 로컬 PNG 파일 사용 >>>
 # (Replit에 'logo.png' 파일을 업로드해야 합니다)
-LOGO_FILE = "logo.png" 
+LOGO_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logo.png")
+
+@st.cache_resource
+def load_logo():
+    """로고 파일을 프로세스당 한 번만 읽어 bytes로 반환합니다. (매 실행마다 디스크를 읽지 않도록)"""
+    with open(LOGO_FILE, "rb") as f:
+        return f.read()
 
-try:
-    st.image(LOGO_FILE, width=80) # 로고 파일 경로와 너비 설정
-except Exception as e:
-    st.warning("로고 파일(logo.png)을 불러오는 데 실패했습니다. Replit에 파일이 업로드되었는지 확인하세요.")
-    # st.error(e) # 디버깅 시 사용
+with section("ui.logo"):
+    try:
+        st.image(load_logo(), width=80) # 캐시된 로고 bytes와 너비 설정
+    except Exception as e:
+        st.warning("로고 파일(logo.png)을 불러오는 데 실패했습니다. Replit에 파일이 업로드되었는지 확인하세요.")
+        # st.error(e) # 디버깅 시 사용
 # <<< 1. 수정 끝 >>>
 
 st.title("탈래말래") # 앱 이름
 st.markdown("---") # 구분선
 
 # --- 로그인 게이트 ---
-if not st.session_state.logged_in:
+if not st.session_state.user.logged_in:
     with st.container(border=True):
         st.header("🏫 우리 학교 엘리베이터 앱 로그인")
+        if st.session_state.user.expired:
+            st.info(f"{SESSION_IDLE_MINUTES}분 동안 사용하지 않아 로그아웃되었습니다. 다시 로그인해 주세요.")
         
         user_id_input = st.text_input("학번", key="login_id")
         user_name_input = st.text_input("이름", key="login_name")
@@ -369,9 +486,9 @@ if not st.session_state.logged_in:
         # 로그인 버튼에 primary-button 클래스 적용
         if st.button("로그인", key="login_btn", help="로그인하려면 학번과 이름을 입력하세요.", type="primary"):
             if user_id_input and user_name_input:
-                st.session_state.logged_in = True
-                st.session_state.user_id = user_id_input
-                st.session_state.user_name = user_name_input
+                st.session_state.user.login(user_id_input, user_name_input)
+                # 저장된 프로필 불러오기 (캐시 조회 한 번) - 알림 설정, 걸음 수/캐시 복원
+                restore_profile(user_id_input, user_name_input)
                 st.rerun() 
             else:
                 st.error("학번과 이름을 모두 입력해주세요.")
@@ -380,204 +497,185 @@ else:
     # --- 사이드바 UI (기능 조작 패널) ---
     with st.sidebar: # 사이드바 전체를 with 문으로 묶어 가독성 향상
         st.title("🛠️ 기능 조작 패널")
-        st.markdown(f"**{st.session_state.user_name}**님 ( {st.session_state.user_id} )")
+        st.markdown(f"**{st.session_state.user.user_name}**님 ( {st.session_state.user.user_id} )")
         if st.button("로그아웃", key="logout_btn"):
             # 로그아웃 시 공유 상태 초기화 (선택 사항)
             # shared_state = get_shared_state()
-            # shared_state['reservations'] = {floor: [] for floor in st.session_state.floors}
+            # shared_state['reservations'] = {floor: [] for floor in FLOORS}
             
-            st.session_state.logged_in = False
-            st.session_state.user_name = ""
-            st.session_state.user_id = ""
+            # 개인 설정은 프로필에 저장되어 있으므로 세션에서는 지웁니다. (다음 로그인 시 복원)
+            st.session_state.user.logout()
             st.rerun() 
 
         st.markdown("---") # 구분선
 
         # --- (기능 6) 정기 알림 설정 ---
-        st.header("⏰ 정기 알림 설정")
-        
-        default_floor_index = 0
-        if st.session_state.alert_floor:
-            try:
-                default_floor_index = st.session_state.floors.index(st.session_state.alert_floor)
-            except ValueError:
-                pass 
-                
-        alert_floor_input = st.selectbox(
-            "알림 받을 층", st.session_state.floors, index=default_floor_index, key="alert_floor_sel"
-        )
-        alert_time_input_str = st.text_input(
-            "알림 시간 (HH:MM):", 
-            value=st.session_state.alert_time_str, key="alert_time_in"
-        )
-
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("알림 저장", key="save_alert_btn", type="primary"):
-                time_obj = validate_time_format(alert_time_input_str)
-                if time_obj:
-                    set_alert(alert_floor_input, alert_time_input_str)
-                else:
-                    st.error("시간 형식이 올바르지 않습니다. (예: 08:30)")
-        with col2:
-            if st.button("알림 해제", key="clear_alert_btn"):
-                clear_alert()
+        with section("ui.sidebar.alert"):
+            st.header("⏰ 정기 알림 설정")
+
+            default_floor_index = 0
+            if st.session_state.user.alert_floor:
+                try:
+                    default_floor_index = FLOORS.index(st.session_state.user.alert_floor)
+                except ValueError:
+                    pass 
+
+            alert_floor_input = st.selectbox(
+                "알림 받을 층", FLOORS, index=default_floor_index, key="alert_floor_sel"
+            )
+            alert_time_input_str = st.text_input(
+                "알림 시간 (HH:MM):", 
+                value=st.session_state.user.alert_time_str, key="alert_time_in"
+            )
+            alert_time_preview = validate_time_format(alert_time_input_str)
+            alert_expected = expected_congestion(alert_floor_input, alert_time_preview) if alert_time_preview else None
+            if alert_expected:
+                st.caption(f"{alert_time_input_str} 예상: {alert_expected}")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("알림 저장", key="save_alert_btn", type="primary"):
+                    time_obj = validate_time_format(alert_time_input_str)
+                    if time_obj:
+                        set_alert(alert_floor_input, alert_time_input_str)
+                    else:
+                        st.error("시간 형식이 올바르지 않습니다. (예: 08:30)")
+            with col2:
+                if st.button("알림 해제", key="clear_alert_btn"):
+                    clear_alert()
 
         st.markdown("---") # 구분선
 
         # --- (기능 3, 4) 엘리베이터 예약 ---
-        st.header("🚑 엘리베이터 예약 (긴급)")
-        st.caption("다친 사람을 위한 우선 예약 기능입니다.")
-
-        selected_floor = st.selectbox("예약할 층", st.session_state.floors, key="reserve_floor_sel")
-        
-        default_reserve_time_str = (datetime.datetime.now() + datetime.timedelta(minutes=5)).strftime('%H:%M')
-        selected_time_str = st.text_input(
-            "예약 시간 (HH:MM):", 
-            value=default_reserve_time_str, 
-            key="reserve_time_in"
-        )
-
-        col1_reserve, col2_reserve = st.columns(2)
-        with col1_reserve:
-            if st.button("예약하기", key="make_reserve_btn", type="primary"):
-                time_obj = validate_time_format(selected_time_str)
-                if time_obj:
-                    reserve_elevator(selected_floor, time_obj, st.session_state.user_name)
+        with section("ui.sidebar.reserve"):
+            st.header("🚑 엘리베이터 예약 (긴급)")
+            st.caption("다친 사람을 위한 우선 예약 기능입니다.")
+
+            selected_floor = st.selectbox("예약할 층", current_building().floors, key="reserve_floor_sel")
+
+            default_reserve_time_str = (datetime.datetime.now() + datetime.timedelta(minutes=5)).strftime('%H:%M')
+            selected_time_str = st.text_input(
+                "예약 시간 (HH:MM):", 
+                value=default_reserve_time_str, 
+                key="reserve_time_in"
+            )
+            reserve_time_preview = validate_time_format(selected_time_str)
+            reserve_expected = expected_congestion(selected_floor, reserve_time_preview) if reserve_time_preview else None
+            if reserve_expected:
+                st.caption(f"{selected_time_str} 예상: {reserve_expected}")
+            reserve_capacity = get_shared_state()['reservations'].capacity(selected_floor)
+            if reserve_time_preview and reserve_capacity:
+                taken = get_shared_state()['reservations'].occupancy(selected_floor, reserve_time_preview)
+                st.caption(f"{selected_time_str} 예약 현황: {taken}/{reserve_capacity}명")
+
+            col1_reserve, col2_reserve = st.columns(2)
+            with col1_reserve:
+                if st.button("예약하기", key="make_reserve_btn", type="primary"):
+                    time_obj = validate_time_format(selected_time_str)
+                    if time_obj:
+                        reserve_elevator(selected_floor, time_obj, st.session_state.user.user_name)
+                    else:
+                        st.error("시간 형식이 올바르지 않습니다. (예: 09:05)")
+            with col2_reserve:
+                if st.button("예약 취소", key="cancel_reserve_btn"):
+                    cancel_reservation(selected_floor, st.session_state.user.user_name)
+            if st.session_state.user.reserve_suggestion:
+                suggested_floor, suggested_time = st.session_state.user.reserve_suggestion
+                st.button(f"👉 {suggested_floor} {suggested_time}로 예약하기", key="reserve_suggestion_btn",
+                          on_click=on_click_reserve_suggestion)
+
+        # --- (관리자) 예약 일괄 등록 / 내보내기 ---
+        if st.session_state.user.user_id in ADMIN_IDS and not st.session_state.user.admin:
+            with st.expander("🔒 관리자 확인"):
+                if not ADMIN_PASSWORD:
+                    st.caption("ADMIN_PASSWORD 환경변수를 설정해야 관리자 기능을 쓸 수 있습니다.")
+                else:
+                    st.text_input("관리자 비밀번호", type="password", key="admin_password_input")
+                    st.button("확인", on_click=on_click_admin_login, key="admin_login_btn")
+        if st.session_state.user.user_id in ADMIN_IDS and st.session_state.user.admin:
+            with section("ui.sidebar.admin"):
+                with st.expander("📋 예약 일괄 등록 / 내보내기 (관리자)"):
+                    st.caption("머리글: floor,name,time,date (또는 층,이름,시간,날짜) - 날짜를 비우면 오늘")
+                    uploaded = st.file_uploader("CSV / JSON 파일", type=['csv', 'json'], key="bulk_upload")
+                    if uploaded is not None and st.button("일괄 등록", key="bulk_import_btn", type="primary"):
+                        import_reservations(uploaded)
+                    export_fmt = st.radio("내보내기 형식", ['csv', 'json'], horizontal=True, key="bulk_export_fmt")
+                    st.download_button(
+                        "예약 내보내기",
+                        export_reservations(get_shared_state()['reservations'].version(), export_fmt),
+                        file_name=f"reservations_{datetime.date.today().isoformat()}.{export_fmt}",
+                        mime='text/csv' if export_fmt == 'csv' else 'application/json',
+                        key="bulk_export_btn",
+                    )
+            # 구간별 실행 시간 (METRICS=1일 때만 쌓임 - Prometheus 형식은 METRICS_PORT의 /metrics)
+            with st.expander("📈 성능 지표 (관리자)"):
+                if not METRICS.enabled:
+                    st.caption("METRICS=1 환경변수로 실행하면 구간별 실행 시간을 기록합니다.")
                 else:
-                    st.error("시간 형식이 올바르지 않습니다. (예: 09:05)")
-        with col2_reserve:
-            if st.button("예약 취소", key="cancel_reserve_btn"):
-                cancel_reservation(selected_floor, st.session_state.user_name)
+                    st.dataframe(METRICS.summary(), hide_index=True)
+                    st.download_button("Prometheus 텍스트", METRICS.render_prometheus(),
+                                       file_name="metrics.txt", mime='text/plain', key="metrics_export_btn")
 
         st.markdown("---") # 구분선
 
         # --- (기능 5) 캐시워크 ---
-        st.header("👟 천보 걸을래 말래")
-        st.caption("핸드폰 건강 앱의 걸음 수를 직접 입력하세요.")
-        
-        st.number_input(
-            "추가할 걸음 수 입력:", 
-            min_value=0, 
-            max_value=10000, 
-            value=0, 
-            step=100, 
-            key="steps_to_add_input" # 이 key를 콜백이 사용
-        )
-
-        st.button(
-            "걸음 수 추가하기", 
-            on_click=on_click_add_steps, # 콜백 함수
-            key="add_steps_btn", 
-            type="primary"
-        )
-
-        st.metric("오늘 총 걸음", f"{st.session_state.cashwalk['steps']} 보")
-        st.metric("오늘 적립 캐시", f"{st.session_state.cashwalk['cash']} 원")
-        if st.button("캐시워크 리셋", key="reset_cash_btn"):
-            st.session_state.cashwalk = {'steps': 0, 'cash': 0}
-            st.session_state.steps_to_add_input = 0 
+        with section("ui.sidebar.cashwalk"):
+            st.header("👟 천보 걸을래 말래")
+            st.caption("핸드폰 건강 앱의 걸음 수를 직접 입력하세요.")
+
+            st.number_input(
+                "추가할 걸음 수 입력:", 
+                min_value=0, 
+                max_value=10000, 
+                value=0, 
+                step=100, 
+                key="steps_to_add_input" # 이 key를 콜백이 사용
+            )
+
+            st.button(
+                "걸음 수 추가하기", 
+                on_click=on_click_add_steps, # 콜백 함수
+                args=(st.session_state.user.steps_submission_id,), # 화면을 그릴 때의 제출 번호 (더블 클릭 중복 방지)
+                key="add_steps_btn", 
+                type="primary"
+            )
+
+            cashwalk = get_shared_state()['cashwalk'].balance(st.session_state.user.user_id)
+            st.metric("오늘 총 걸음", f"{cashwalk['steps']} 보")
+            st.metric("오늘 적립 캐시", f"{cashwalk['cash']} 원")
+            st.button("캐시워크 리셋", on_click=on_click_reset_cash, key="reset_cash_btn")
 
 
     # --- 메인 화면 UI (대시보드) ---
     # st.title("🏫 우리 학교 엘리베이터 앱") # 최상단에 로고와 함께 이미 정의됨
 
-    # --- (기능 6) 정기 알림판 ---
-    st.subheader("🔔 나의 맞춤 알림")
-    
-    alert_time_str = st.session_state.alert_time_str
-    alert_time_obj = validate_time_format(alert_time_str)
-    target_floor = st.session_state.alert_floor
+    # --- 건물 선택 (건물이 여러 개일 때만) ---
+    # 미리 만들어 둔 건물 보기(campus.Building)를 바꿔 끼울 뿐이라 다시 만드는 것이 없습니다. (O(1))
+    if len(CAMPUS.buildings) > 1:
+        st.radio(
+            "🏢 건물", range(len(CAMPUS.buildings)), index=st.session_state.user.building,
+            format_func=lambda building_id: CAMPUS.buildings[building_id].name,
+            horizontal=True, key="building_sel", on_change=on_change_building,
+        )
 
-    if not target_floor or not alert_time_obj:
-        st.info("사이드바에서 '정기 알림'을 설정해 보세요. ⏰")
-    else:
-        window_min = st.session_state.alert_window_minutes
-        now = datetime.datetime.now()
-        now_time = now.time()
-        
-        alert_datetime = datetime.datetime.combine(now.date(), alert_time_obj)
-        start_alert_time = (alert_datetime - datetime.timedelta(minutes=window_min)).time()
-        end_alert_time = (alert_datetime + datetime.timedelta(minutes=window_min)).time()
-        
-        # 알림창을 컨테이너로 감싸기
-        with st.container(border=True):
-            if start_alert_time <= now_time <= end_alert_time:
-                status = st.session_state.floor_congestion[target_floor]
-                color_icon = st.session_state.congestion_colors[status]
-                # st.error 대신 st.markdown으로 스타일링
-                st.markdown(f"### <span style='color: #F44336;'>💥 지금 {target_floor}로 갈 시간입니다!</span>", unsafe_allow_html=True)
-                st.markdown(f"#### ( {alert_time_str} 알림 )")
-                st.markdown(f"## 현재 혼잡도: {color_icon} {status}")
-            else:
-                # st.success 대신 st.markdown으로 스타일링
-                st.markdown(f"### <span style='color: #4CAF50;'>✅ {target_floor} {alert_time_str} 알림 설정됨</span>", unsafe_allow_html=True)
-                st.caption(f"( {window_min}분 전후로 활성화됩니다 )")
+    # --- (기능 6) 정기 알림판 ---
+    # 알림 스케줄러가 배달한 알림을 주기적으로 확인하는 fragment
+    render_alert_card()
 
 
-    # --- (기능 1, 2) 실시간 현황 ---
-    st.subheader("실시간 현황")
-    st.caption("실제로는 카메라가 이 데이터를 업데이트합니다.")
-    
-    # 현황 새로고침 버튼
-    if st.button("현황 새로고침 (데이터 시뮬레이션)", key="refresh_btn", type="primary"):
-        update_congestion_data()
-        
-    elevator_status = st.session_state.elevator_congestion
-    elevator_color_icon = st.session_state.congestion_colors[elevator_status]
-    
-    with st.container(border=True): # 엘리베이터 내부 혼잡도도 뉴모피즘 컨테이너로 감쌈
-        st.markdown(f"## {elevator_color_icon} 엘리베이터 내부: **{elevator_status}**")
+    # --- (기능 1, 2) 실시간 현황 / (기능 2, 3, 4) 층별 대기 현황 ---
+    # 두 영역은 fragment로 분리되어 스스로 갱신됩니다. (전체 스크립트 재실행 없음)
+    render_live_status()
     
     st.markdown("---") # 구분선
 
-    # --- (기능 2, 3, 4) 층별 대기 현황 ---
-    st.subheader("층별 대기 현황")
+    render_floor_status()
 
-    # B1, 1F, 2F
-    cols_top = st.columns(3)
-    for i in range(3): 
-        floor = st.session_state.floors[i]
-        with cols_top[i]:
-            st.markdown(f"#### {floor}") # UI 글자 잘림 현상 해결 (h3 -> h4)
-            
-            reservation_list = get_shared_state()['reservations'][floor] # 공유 상태에서 읽기
-            status = st.session_state.floor_congestion[floor]
-            color_icon = st.session_state.congestion_colors[status]
-
-            with st.container(border=True):
-                st.markdown(f"### {color_icon} {status}") # UI 글자 잘림 현상 해결 (h2 -> h3)
-
-                if reservation_list:
-                    count = len(reservation_list)
-                    with st.popover(f"🚑 예약 ({count}명)"):
-                        st.markdown(f"**{floor} - 총 {count}건의 예약**")
-                        # 예약 시간을 기준으로 정렬
-                        sorted_reservations = sorted(reservation_list, key=lambda x: x['time'])
-                        # 이름(res['name']) 대신 시간만 표시
-                        for res in sorted_reservations:
-                            st.markdown(f"- {res['time'].strftime('%H:%M')}")
-
-    # 3F, 4F, 5F
-    cols_bottom = st.columns(3)
-    for i in range(3): 
-        floor = st.session_state.floors[i + 3] # 3, 4, 5
-        with cols_bottom[i]:
-            st.markdown(f"#### {floor}") # UI 글자 잘림 현상 해결 (h3 -> h4)
-            
-            reservation_list = get_shared_state()['reservations'][floor] # 공유 상태에서 읽기
-            status = st.session_state.floor_congestion[floor]
-            color_icon = st.session_state.congestion_colors[status]
-
-            with st.container(border=True):
-                st.markdown(f"### {color_icon} {status}") # UI 글자 잘림 현상 해결 (h2 -> h3)
-                
-                if reservation_list:
-                    count = len(reservation_list)
-                    with st.popover(f"🚑 예약 ({count}명)"):
-                        st.markdown(f"**{floor} - 총 {count}건의 예약**")
-                        # 예약 시간을 기준으로 정렬
-                        sorted_reservations = sorted(reservation_list, key=lambda x: x['time'])
-                        # 이름(res['name']) 대신 시간만 표시
-                        for res in sorted_reservations:
-                            st.markdown(f"- {res['time'].strftime('%H:%M')}")
+    st.markdown("---") # 구분선
+
+    # --- 운행 계획 (예약 + 혼잡도 시뮬레이션) ---
+    render_dispatch_plan()
+
+# rerun 한 번 전체 시간 (st.rerun()으로 중간에 다시 시작한 실행은 기록되지 않음)
+if METRICS.enabled:
+    METRICS.observe("rerun", time.perf_counter() - RERUN_STARTED)